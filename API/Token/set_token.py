@@ -8,7 +8,8 @@ def set_gigachat_access_token() -> str:
     Получает токен от GigaChat API и сохраняет его в переменную окружения GIGACHAT_ACCESS_TOKEN в файле .env.
     Возвращает полученный токен.
     """
-    url = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
+    # Адрес можно переопределить (например, заглушкой GigaChat при нагрузочном тесте)
+    url = os.getenv("GIGACHAT_AUTH_URL", "https://ngw.devices.sberbank.ru:9443/api/v2/oauth")
     payload = {
         'scope': 'GIGACHAT_API_PERS'
     }
@@ -0,0 +1,220 @@
+"""Допуск запросов к агенту: лимит частоты по tg_id и справедливая очередь.
+
+- Лимит частоты: у каждого tg_id ведро на RATE_LIMIT_BURST запросов,
+  которое пополняется со скоростью RATE_LIMIT_PER_MINUTE. Запрос сверх
+  лимита получает 429 с Retry-After и не занимает очередь.
+- Справедливая очередь: у каждого пользователя своя очередь (не длиннее
+  MAX_QUEUED_PER_USER), AGENT_WORKERS исполнителей берут задачи по кругу —
+  по одной от каждого пользователя, у которого есть ожидающие запросы. Пока
+  выполняется запрос пользователя, его следующие запросы ждут, поэтому один
+  активный пользователь занимает не больше одного исполнителя и не
+  увеличивает ожидание остальных.
+
+Задача выполняется в пуле потоков в контексте запроса (спан трассировки и
+дедлайн сохраняются).
+"""
+import asyncio
+import contextvars
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional, Set, Tuple
+
+from metrics import counter, gauge, histogram
+
+
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "6"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "3"))
+# Сколько ведер храним, прежде чем удалять полные (давно неактивные пользователи)
+RATE_LIMIT_MAX_USERS = 10000
+
+AGENT_WORKERS = int(os.getenv("AGENT_WORKERS", "8"))
+MAX_QUEUED_PER_USER = int(os.getenv("MAX_QUEUED_PER_USER", "2"))
+MAX_QUEUED = int(os.getenv("MAX_QUEUED", "200"))
+
+REJECTIONS = counter("career_admission_rejections_total", "Запросы, не допущенные к агенту", ["reason"])
+QUEUE_WAIT = histogram("career_scheduler_wait_seconds", "Ожидание запроса в очереди до исполнителя")
+
+
+class Rejected(Exception):
+    """Запрос не допущен; status — код ответа, retry_after — через сколько секунд повторить"""
+
+    def __init__(self, reason: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(math.ceil(self.retry_after), 1))} if self.retry_after is not None else {}
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Ведро токенов на каждый tg_id"""
+
+    def __init__(self, per_minute: float = RATE_LIMIT_PER_MINUTE, burst: int = RATE_LIMIT_BURST):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _refill(self, bucket: TokenBucket, now: float):
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+        bucket.updated = now
+
+    def take(self, tg_id: str) -> Tuple[bool, float]:
+        """(допущен ли запрос, через сколько секунд появится следующий токен)"""
+        if self.rate <= 0:
+            return True, 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(tg_id)
+            if bucket is None:
+                if len(self._buckets) >= RATE_LIMIT_MAX_USERS:
+                    self._prune(now)
+                bucket = self._buckets[tg_id] = TokenBucket(self.burst, now)
+            self._refill(bucket, now)
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return True, 0.0
+            return False, (1 - bucket.tokens) / self.rate
+
+    def _prune(self, now: float):
+        for tg_id, bucket in list(self._buckets.items()):
+            self._refill(bucket, now)
+            if bucket.tokens >= self.burst:
+                del self._buckets[tg_id]
+
+    def stats(self) -> Dict:
+        return {"per_minute": self.rate * 60, "burst": self.burst, "tracked_users": len(self._buckets)}
+
+
+class FairScheduler:
+    """Очереди по пользователям и круговой обход исполнителями"""
+
+    def __init__(self, workers: int = AGENT_WORKERS, max_per_user: int = MAX_QUEUED_PER_USER,
+                 max_queued: int = MAX_QUEUED):
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.max_queued = max_queued
+        self._queues: Dict[str, Deque] = {}
+        # Пользователи с ожидающими задачами в порядке обхода (без тех, чья задача выполняется)
+        self._rotation: "OrderedDict[str, None]" = OrderedDict()
+        self._running: Set[str] = set()
+        self.queued = 0
+        self.busy = 0
+        self._wakeup: Optional[asyncio.Condition] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks = []
+
+    def _start(self):
+        """Исполнители запускаются при первой задаче — в цикле событий сервера"""
+        if not self._tasks:
+            self._wakeup = asyncio.Condition()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="agent")
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def submit(self, tg_id: str, func: Callable):
+        """Ставит func в очередь пользователя и возвращает ее результат"""
+        self._start()
+        if self.queued >= self.max_queued:
+            REJECTIONS.inc("queue_full")
+            raise Rejected("queue_full", 503, retry_after=5)
+        queue = self._queues.setdefault(tg_id, deque())
+        if len(queue) >= self.max_per_user:
+            REJECTIONS.inc("user_queue_full")
+            raise Rejected("user_queue_full", 429, retry_after=5)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append((future, contextvars.copy_context(), func, time.perf_counter()))
+        self.queued += 1
+        if tg_id not in self._running:
+            self._rotation[tg_id] = None
+        async with self._wakeup:
+            self._wakeup.notify()
+        return await future
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            async with self._wakeup:
+                await self._wakeup.wait_for(lambda: bool(self._rotation))
+                tg_id, _ = self._rotation.popitem(last=False)
+            queue = self._queues[tg_id]
+            future, context, func, enqueued = queue.popleft()
+            self.queued -= 1
+            self._running.add(tg_id)
+            self.busy += 1
+            QUEUE_WAIT.observe(time.perf_counter() - enqueued)
+            try:
+                if not future.cancelled():
+                    # Контекст запроса (спан, дедлайн) переносится в поток исполнения
+                    result = await loop.run_in_executor(self._executor, context.run, func)
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.busy -= 1
+                self._running.discard(tg_id)
+                if queue:
+                    # Следующая задача пользователя — в конец круга, после остальных
+                    self._rotation[tg_id] = None
+                    async with self._wakeup:
+                        self._wakeup.notify()
+                else:
+                    del self._queues[tg_id]
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queued": self.queued,
+            "users_waiting": len(self._rotation),
+            "max_queued_per_user": self.max_per_user,
+        }
+
+
+rate_limiter = RateLimiter()
+scheduler = FairScheduler()
+
+
+def admit(tg_id: str):
+    """Проверяет лимит частоты пользователя; сверх лимита — Rejected (429)"""
+    allowed, retry_after = rate_limiter.take(str(tg_id))
+    if not allowed:
+        REJECTIONS.inc("rate_limited")
+        raise Rejected("rate_limited", 429, retry_after)
+
+gauge("career_scheduler_queued", "Запросы в очереди к агенту", lambda: scheduler.queued)
+gauge("career_scheduler_busy_workers", "Занятые исполнители агента", lambda: scheduler.busy)
+gauge("career_scheduler_users_waiting", "Пользователи с ожидающими запросами",
+      lambda: scheduler.stats()["users_waiting"])
+
+
+def stats() -> Dict:
+    return {"rate_limit": rate_limiter.stats(), "scheduler": scheduler.stats(),
+            "rejections": {reason: REJECTIONS.value(reason)
+                           for reason in ("rate_limited", "user_queue_full", "queue_full")}}
@@ -0,0 +1,103 @@
+"""База карьерных советов с полнотекстовым поиском.
+
+Статьи лежат в jsons/career_advice.json (путь можно переопределить
+переменной CAREER_ADVICE_PATH): тема, ключевые слова, примеры вопросов и
+текст ответа. По ним строится BM25-индекс, поэтому вопрос пользователя
+любой длины сопоставляется со всей базой за доли миллисекунды.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from corpus import JSONS_DIR, load_cached
+from fulltext import BM25Index
+
+
+logger = logging.getLogger(__name__)
+
+ADVICE_PATH = JSONS_DIR / 'career_advice.json'
+
+# Веса полей статьи: тема и примеры вопросов важнее текста ответа
+ADVICE_FIELD_WEIGHTS = {
+    "topic": 3.0,
+    "keywords": 3.0,
+    "questions": 2.0,
+    "answer": 0.5,
+}
+# Минимальная оценка BM25, при которой статья считается подходящей
+MIN_ADVICE_SCORE = 1.0
+
+
+class AdviceBase:
+    """Статьи с советами и индекс по ним (строится лениво, один раз на версию файла)"""
+
+    def __init__(self, articles: List[Dict], fallback: str, version: str, path: Optional[Path] = None):
+        self.articles = articles
+        self.fallback = fallback
+        self.version = version
+        self.path = path
+        self._lock = threading.Lock()
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    @property
+    def index(self) -> BM25Index:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = BM25Index.build((advice_document(a) for a in self.articles),
+                                                  ADVICE_FIELD_WEIGHTS)
+        return self._index
+
+    def search(self, question: str, k: int = 3) -> List[Tuple[Dict, float]]:
+        """k самых подходящих статей как список (статья, оценка)"""
+        return [(self.articles[position], score) for position, score in self.index.search(question, k)
+                if score >= MIN_ADVICE_SCORE]
+
+
+def advice_document(article: Dict) -> Dict[str, str]:
+    """Поля статьи для полнотекстового индекса"""
+    return {
+        "topic": article.get("topic") or "",
+        "keywords": " ".join(article.get("keywords") or []),
+        "questions": " ".join(article.get("questions") or []),
+        "answer": article.get("answer") or "",
+    }
+
+
+def _make_advice_base(data, version: str, path: Path) -> AdviceBase:
+    if isinstance(data, list):
+        data = {"articles": data}
+    return AdviceBase(data.get("articles") or [], data.get("fallback") or "", version, path)
+
+
+def get_advice_base(path: str | Path = None) -> AdviceBase:
+    """Возвращает базу советов (перечитывается только при изменении файла)"""
+    path = Path(path or os.getenv("CAREER_ADVICE_PATH") or ADVICE_PATH)
+    base = load_cached(path, _make_advice_base)
+    if base is None:
+        logger.warning("Файл базы советов не найден: %s", path)
+        return AdviceBase([], "", "empty", path)
+    return base
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    base = get_advice_base()
+    questions = sys.argv[1:] or ["Я хочу сменить профессию, что делать?", "как подготовиться к собеседованию в яндекс",
+                                 "сколько просить денег на первой работе", "с чего начать если я студент"]
+    base.index
+    for question in questions:
+        start = time.perf_counter()
+        for _ in range(1000):
+            results = base.search(question)
+        elapsed_us = (time.perf_counter() - start) * 1000
+        print(f"'{question}': {elapsed_us:.0f} мкс")
+        for article, score in results:
+            print(f"  {score:.2f}  {article['topic']}")
@@ -1,40 +1,44 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 from main import process_career_query, initialize_user_session
-from Token.set_token import set_gigachat_access_token
+from corpus import get_vacancy_corpus
+from role_skills import cluster_key
+from roles import resolve_role
+from skill_taxonomy import normalize_skill
+from metrics import REGISTRY
+from tracing import span, traced
+from profiling import profiling
+from logging_setup import setup_logging
+from db import close_pool, get_pool, pool_stats
+from warmup import refresh_gigachat_token, token_age, warmup
+from health import (agent_in_flight, process_memory, register_gauges, requests_in_flight, session_stats,
+                    uptime)
+from response_cache import response_cache
+from tools import ranking_cache_stats
+from resilience import deadline
+from admission import Rejected, admit, scheduler as agent_scheduler
+import admission
+import resilience
 import uvicorn
+import asyncio
+import functools
+import threading
+import time
 from contextlib import asynccontextmanager
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from dotenv import load_dotenv
 import os
-import psycopg2.pool
+import psycopg2
 from psycopg2.extras import RealDictCursor
 import logging
 
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Создание пула соединений
-DSN = "host=localhost port=54321 dbname=aigovnodb user=postgres password=4268 sslmode=disable"
-try:
-    connection_pool = psycopg2.pool.SimpleConnectionPool(1, 10, dsn=DSN)
-    logger.info("Connection pool created successfully")
-
-    conn = connection_pool.getconn()
-    try:
-        with conn.cursor() as cur:
-            logger.info("Database connection is OK")
-            conn.commit()
-    except Exception as e:
-        logger.error(f"Database connection error: {e}")
-        
-except psycopg2.OperationalError as e:
-    logger.error(f"Failed to connect to database: {e}")
-    raise
-
 
+@traced()
 def get_user_data_by_tg_id(tg_id: int) -> Optional[Dict]:
     """
     Возвращает данные пользователя из таблицы user_data по tg_id.
@@ -43,7 +47,7 @@ def get_user_data_by_tg_id(tg_id: int) -> Optional[Dict]:
     conn = None
     try:
         # Получаем соединение из пула
-        conn = connection_pool.getconn()
+        conn = get_pool().getconn()
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
                 SELECT 
@@ -60,31 +64,100 @@ def get_user_data_by_tg_id(tg_id: int) -> Optional[Dict]:
             
             result = cur.fetchone()
             if result:
-                logger.debug(f"User data fetched for tg_id={tg_id}: {result}")
+                # Сам профиль не логируется: только какие поля заполнены
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("User data fetched for tg_id=%s (fields: %s)", tg_id,
+                                 ", ".join(key for key, value in result.items() if value))
             else:
-                logger.debug(f"No user found for tg_id={tg_id}")
+                logger.debug("No user found for tg_id=%s", tg_id)
             return result
     except psycopg2.Error as e:
-        logger.error(f"Database error while fetching user_data for tg_id={tg_id}: {e}")
+        logger.error("Database error while fetching user_data for tg_id=%s: %s", tg_id, e)
         return None
     finally:
-            connection_pool.putconn(conn)
+        if conn is not None:
+            get_pool().putconn(conn)
+
+
+
+
+# Анкеты, которые бот передал до записи в БД: tg_id -> (срок, анкета)
+PROFILE_HANDOFF_TTL = float(os.getenv("PROFILE_HANDOFF_TTL", "60"))
+USER_DATA_FIELDS = ("name", "age", "education", "skills", "experience", "target_position")
+_profile_handoff: Dict[int, Tuple[float, Dict]] = {}
+_profile_handoff_lock = threading.Lock()
 
 
+def pending_profile(tg_id: int, user_data: Optional[Dict[str, Any]]) -> Optional[Dict]:
+    """Анкета из запроса, если она принадлежит этому tg_id и поля имеют типы из user_data; иначе None.
 
+    Длина полей не ограничивается: в таблице user_data и в анкете бота ограничений нет.
+    """
+    if not user_data or str(user_data.get("tg_id")) != str(tg_id):
+        return None
+    profile = {"tg_id": tg_id, **{field: user_data.get(field) for field in USER_DATA_FIELDS}}
+    name, age, skills = profile["name"], profile["age"], profile["skills"]
+    texts = [profile[field] for field in ("education", "experience", "target_position")]
+    valid = (
+        isinstance(name, str) and name != ""
+        and (age is None or (isinstance(age, int) and not isinstance(age, bool) and age >= 0))
+        and all(text is None or isinstance(text, str) for text in texts)
+        and (skills is None or (isinstance(skills, list) and all(isinstance(skill, str) for skill in skills)))
+    )
+    return profile if valid else None
+
+
+def load_user_data(tg_id: int, query: "UserQuery") -> Optional[Dict]:
+    """Анкета пользователя с чтением своих записей.
+
+    Бот пишет анкеты в БД пачками с задержкой. Пока запись не выполнена, он
+    помечает запрос profile_pending и передает анкету в user_data — она
+    используется вместо строки БД и хранится PROFILE_HANDOFF_TTL секунд.
+    Анкета принимается, только если ее tg_id совпадает с tg_id запроса и
+    поля проходят проверку (pending_profile). Когда бот перестает помечать
+    запросы, источник снова БД.
+    """
+    now = time.monotonic()
+    profile = pending_profile(tg_id, query.user_data) if query.profile_pending else None
+    if query.profile_pending and profile is None:
+        logger.warning("Анкета profile_pending для tg_id=%s не принята: другой tg_id или неверные поля", tg_id)
+    if profile is not None:
+        with _profile_handoff_lock:
+            for expired in [key for key, (until, _) in _profile_handoff.items() if until <= now]:
+                del _profile_handoff[expired]
+            _profile_handoff[tg_id] = (now + PROFILE_HANDOFF_TTL, profile)
+        return profile
+    with _profile_handoff_lock:
+        handed_off = _profile_handoff.pop(tg_id, None)
+    user_data = get_user_data_by_tg_id(tg_id)
+    if user_data is None and handed_off and handed_off[0] > now:
+        # Строка еще не видна (или БД недоступна) — анкета из недавнего запроса
+        with _profile_handoff_lock:
+            _profile_handoff.setdefault(tg_id, handed_off)
+        return handed_off[1]
+    return user_data
 
-# Планировщик для периодического запуска функции
-scheduler = AsyncIOScheduler()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Планировщик для периодического обновления токена (импортируется только при запуске сервера)
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+    scheduler = AsyncIOScheduler()
     scheduler.start()
-    scheduler.add_job(set_gigachat_access_token, 'interval', minutes=20)
-    set_gigachat_access_token()
+    scheduler.add_job(refresh_gigachat_token, 'interval', minutes=20)
+    # Прогрев идет в фоне: сервер сразу принимает соединения, /ready отвечает 503, пока все этапы не пройдут
+    warmup_task = asyncio.create_task(asyncio.to_thread(warmup.run))
     try:
         yield
     finally:
         scheduler.shutdown()
+        await agent_scheduler.stop()
+        # Поток прогрева не отменяется вместе с задачей: повторы этапов останавливаются явно
+        warmup.stop()
+        if not warmup_task.done():
+            warmup_task.cancel()
+        close_pool()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -100,8 +173,8 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         body_text = "<could not read body>"
 
     # Логируем подробности
-    logger.error(f"Request validation error on {request.url.path}: {exc}")
-    logger.error(f"Request body: {body_text}")
+    logger.error("Request validation error on %s: %s", request.url.path, exc)
+    logger.error("Request body: %s", body_text)
 
     # Возвращаем подробный ответ (для разработки). В продакшн можно убрать тело из ответа
     return JSONResponse(
@@ -115,11 +188,19 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 # Словарь для хранения сессий пользователей (в памяти)
 sessions = {}  # Ключ: tg_id, Значение: сессия
 
+# Токен GigaChat живет 30 минут и обновляется раз в 20; старше этого — обновление не удается
+TOKEN_MAX_AGE = int(os.getenv("TOKEN_MAX_AGE", str(25 * 60)))
+# Сколько запросов может выполняться одновременно, прежде чем /ready начнет отвечать 503 (0 — без ограничения)
+READY_MAX_IN_FLIGHT = int(os.getenv("READY_MAX_IN_FLIGHT", "0"))
+
+register_gauges(sessions, pool_stats, token_age)
+
 # Модель для входящего запроса от бота
 class UserQuery(BaseModel):
     tg_id: str
     user_data: Optional[Dict[str, Any]] = None  # Данные пользователя: name, age, education
     prompt: str  # Запрос к нейросети
+    profile_pending: bool = False  # Анкета еще не записана ботом в БД (берется из user_data)
 
 # Модель для ответа боту
 class QueryResponse(BaseModel):
@@ -127,14 +208,71 @@ class QueryResponse(BaseModel):
     response: str  # Ответ от process_career_query
     user_data: Optional[Dict[str, Any]] = None  # Подтверждение полученных данных
 
+# Токен администратора для служебных эндпоинтов (без него они отключены)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def is_admin(request: Request) -> bool:
+    return bool(ADMIN_TOKEN) and request.headers.get("X-Admin-Token") == ADMIN_TOKEN
+
+
+def require_admin(request: Request):
+    if not is_admin(request):
+        raise HTTPException(status_code=403, detail="Требуется X-Admin-Token")
+
+
 # Эндпоинт для обработки запроса от бота
 @app.post("/career_query", response_model=QueryResponse)
-async def handle_career_query(query: UserQuery):
+async def handle_career_query(query: UserQuery, request: Request):
+    # Трасса продолжается от спана бота (заголовок traceparent), если он передан
+    with requests_in_flight.track(), \
+            span("handle_career_query", traceparent=request.headers.get("traceparent")) as root:
+        root.set_attribute("tg_id", query.tg_id)
+        # Бот передает, сколько готов ждать ответа; вызовы модели укладываются в этот срок
+        with deadline(request_timeout(request)):
+            # Заголовок X-Profile учитывается только вместе с токеном администратора
+            forced = "x-profile" in request.headers and is_admin(request)
+            try:
+                # Лимит частоты и справедливая очередь: частые запросы одного пользователя не задерживают остальных
+                admit(query.tg_id)
+                return await agent_scheduler.submit(
+                    query.tg_id, functools.partial(_run_career_query, query, profiling.claim(query.tg_id, forced),
+                                                   root.trace_id))
+            except Rejected as e:
+                root.set_attribute("rejected", e.reason)
+                logger.info("career_query tg_id=%s не допущен: %s", query.tg_id, e.reason)
+                raise HTTPException(status_code=e.status, detail=REJECTION_MESSAGES[e.reason], headers=e.headers)
+
+
+# Тексты отказов в допуске (бот показывает их пользователю)
+REJECTION_MESSAGES = {
+    "rate_limited": "Слишком много запросов подряд, попробуйте чуть позже",
+    "user_queue_full": "Предыдущие запросы еще обрабатываются, дождитесь ответа",
+    "queue_full": "Сервис перегружен, попробуйте чуть позже",
+}
+
+
+def _run_career_query(query: UserQuery, profile: bool, trace_id: str) -> QueryResponse:
+    """Выполняется исполнителем очереди (cProfile профилирует поток, поэтому включается здесь)"""
+    if profile:
+        with profiling.profile("career_query", query.tg_id, trace_id):
+            return _handle_career_query(query)
+    return _handle_career_query(query)
+
+
+def request_timeout(request: Request) -> Optional[float]:
+    try:
+        return float(request.headers["X-Request-Timeout"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _handle_career_query(query: UserQuery) -> QueryResponse:
     try:
         tg_id = int(query.tg_id)
 
-        # === 1. Получаем данные пользователя из БД ===
-        user_data = get_user_data_by_tg_id(tg_id)
+        # === 1. Получаем данные пользователя (из БД или из запроса, если бот еще не записал анкету) ===
+        user_data = load_user_data(tg_id, query)
         if not user_data:
             raise HTTPException(status_code=404, detail=f"Пользователь с tg_id={tg_id} не найден в БД")
 
@@ -152,7 +290,7 @@ async def handle_career_query(query: UserQuery):
         headers = {"Authorization": f"Bearer {token}"}
 
         # === 4. Отправляем запрос в GigaChat ===
-        logger.info(f"Обрабатываю career_query для tg_id={tg_id}")
+        logger.info("Обрабатываю career_query для tg_id=%s", tg_id)
 
         result = process_career_query(tg_id, query.prompt, session, headers, user_data)
 
@@ -166,10 +304,139 @@ async def handle_career_query(query: UserQuery):
     except HTTPException:
         raise
     except Exception as e:
-        logger.exception(f"Ошибка при обработке career_query: {e}")
+        logger.exception("Ошибка при обработке career_query: %s", e)
         raise HTTPException(status_code=500, detail=f"Ошибка обработки запроса: {str(e)}")
 
 
+# Проба живости: процесс отвечает (без обращений к базе и GigaChat)
+@app.get("/health")
+async def health():
+    age = token_age()
+    return {
+        "status": "ok",
+        "uptime_seconds": round(uptime(), 1),
+        "token_stale": age is not None and age > TOKEN_MAX_AGE,
+    }
+
+
+def saturation() -> Dict[str, Any]:
+    """Причины не принимать новый трафик: пул соединений исчерпан или слишком много запросов"""
+    reasons = {}
+    pool = pool_stats()
+    if pool.get("open") and pool["used"] >= pool["max"]:
+        reasons["db_pool"] = f"заняты все {pool['max']} соединений"
+    if READY_MAX_IN_FLIGHT and requests_in_flight.current >= READY_MAX_IN_FLIGHT:
+        reasons["in_flight"] = f"{requests_in_flight.current} запросов при пределе {READY_MAX_IN_FLIGHT}"
+    # Устаревший токен сюда не входит: он у всех экземпляров сразу, и балансировщик снял бы весь трафик
+    return reasons
+
+
+# Проба готовности: 200 только после прогрева (агент, корпуса с индексами, пул соединений) и без насыщения
+@app.get("/ready")
+async def readiness():
+    report = warmup.report()
+    report["saturation"] = saturation()
+    ready = report["ready"] and not report["saturation"]
+    return JSONResponse(status_code=200 if ready else 503, content=report)
+
+
+# Подробное состояние экземпляра: пул, токен, нагрузка, сессии, память, кэши, версии корпусов
+@app.get("/stats")
+async def stats():
+    age = token_age()
+    role_cache = resolve_role.cache_info()
+    role_lookups = role_cache.hits + role_cache.misses
+    corpora = {}
+    # До окончания прогрева корпуса не загружаются отсюда, чтобы не блокировать цикл событий
+    if warmup.ready:
+        from corpus import get_course_corpus
+        vacancies, courses = get_vacancy_corpus(), get_course_corpus()
+        corpora = {
+            "vacancies": {"version": vacancies.version, "size": len(vacancies)},
+            "courses": {"version": courses.version, "size": len(courses)},
+        }
+    return {
+        "uptime_seconds": round(uptime(), 1),
+        "ready": warmup.ready,
+        "db_pool": pool_stats(),
+        "token": {"age_seconds": round(age, 1) if age is not None else None,
+                  "stale": age is not None and age > TOKEN_MAX_AGE},
+        "requests": {
+            **requests_in_flight.stats(),
+            # Приняты, но еще не дошли до агента (чтение профиля, ожидание)
+            "waiting": max(requests_in_flight.current - agent_in_flight.current, 0),
+        },
+        "agent_calls": agent_in_flight.stats(),
+        "gigachat": resilience.stats(),
+        "admission": admission.stats(),
+        "sessions": session_stats(sessions),
+        "memory": process_memory(),
+        "caches": {
+            "responses": response_cache.stats(),
+            "rankings": ranking_cache_stats(),
+            "roles": {"hits": role_cache.hits, "misses": role_cache.misses, "size": role_cache.currsize,
+                      "hit_rate": round(role_cache.hits / role_lookups, 3) if role_lookups else 0.0},
+        },
+        "corpora": corpora,
+    }
+
+
+# Метрики в формате Prometheus (латентность и ошибки по этапам обработки запроса)
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+# Профилирование запросов: включение для следующих N запросов или для tg_id
+class ProfilingRequest(BaseModel):
+    requests: int = 1
+    tg_id: Optional[str] = None
+
+
+@app.post("/admin/profiling")
+async def enable_profiling(body: ProfilingRequest, request: Request):
+    require_admin(request)
+    return profiling.arm(body.requests, body.tg_id)
+
+
+@app.delete("/admin/profiling")
+async def disable_profiling(request: Request):
+    require_admin(request)
+    return profiling.disarm()
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    require_admin(request)
+    return {"pending": profiling.state(), "profiles": profiling.list_profiles()}
+
+
+@app.get("/admin/profiles/{name}")
+async def download_profile(name: str, request: Request):
+    require_admin(request)
+    path = profiling.resolve(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Профиль {name} не найден")
+    media_type = "text/plain; charset=utf-8" if path.suffix == ".txt" else "application/octet-stream"
+    return FileResponse(path, media_type=media_type, filename=path.name)
+
+
+# Эндпоинт рыночной статистики (из агрегатов корпуса вакансий, без прохода по корпусу).
+# Обычная функция: FastAPI выполняет ее в пуле потоков, и первое построение агрегатов не блокирует цикл событий
+@app.get("/market/stats")
+def market_stats(role: Optional[str] = None, city: Optional[str] = None, skill: Optional[str] = None,
+                 top: int = 10):
+    # Та же привязка к срезу, что у инструмента get_market_overview: роль или группа вакансий по названию
+    resolved_role = (resolve_role(role) or cluster_key(role)) if role else None
+    stats = get_vacancy_corpus().market
+    if role and not stats.sizes.get((resolved_role, None)):
+        raise HTTPException(status_code=404, detail=f"Нет вакансий для должности '{role}'")
+    skills = [normalize_skill(skill)] if skill else []
+    summary = stats.summary(role=resolved_role, city=city, skills=skills, top=min(max(top, 1), 50))
+    if skill:
+        summary["skill_trend"] = stats.trend(skill=skills[0])
+    return summary
+
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8001, log_level="debug")
\ No newline at end of file
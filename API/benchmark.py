@@ -0,0 +1,373 @@
+"""Офлайн-бенчмарк инструментов подбора на синтетических корпусах.
+
+Генератор масштабирует распределения из jsons/processed_vacancies.json и
+jsons/courses.json (названия, города, графики, зарплаты, навыки, фразы
+описаний) до заданного числа записей. Для каждого размера измеряются
+загрузка корпуса и построение индексов, find_matching_vacancies,
+create_learning_plan, provide_career_advice и extract_skills_from_text:
+пропускная способность, p50/p99 и пиковая память (tracemalloc, отдельным
+проходом, чтобы не искажать время). Сеть и GigaChat не нужны.
+
+    python benchmark.py --sizes 10k,100k,1m --output bench.json
+    python benchmark.py --sizes 10k --baseline bench.json   # код выхода 1 при регрессии
+
+Сгенерированные корпуса сохраняются в bench_data/ и переиспользуются
+при повторных запусках с тем же размером и seed.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+import corpus as corpus_module
+from corpus import JSONS_DIR, get_course_corpus, get_vacancy_corpus, parse_courses, parse_vacancies, read_json
+
+
+BENCH_DATA_DIR = Path(__file__).parent / 'bench_data'
+DEFAULT_SIZES = "10k,100k"
+DEFAULT_REPEAT = 200
+# Сколько вызовов повторяется под tracemalloc для оценки пиковой памяти
+MEMORY_CALLS = 20
+# Допустимый рост p99 относительно базового отчета
+DEFAULT_TOLERANCE = 0.2
+# Предел числа фраз в синтетическом описании (держит размер файла на 1M записей в разумных пределах)
+MAX_DESCRIPTION_SENTENCES = 8
+
+_SENTENCE_RE = re.compile(r'(?<=[.!?;])\s+')
+
+
+def parse_size(text: str) -> int:
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = text.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+
+class CorpusProfile:
+    """Эмпирические распределения полей исходных корпусов"""
+
+    def __init__(self, vacancies: List[Dict], courses: List[Dict]):
+        self.vacancies = vacancies
+        self.courses = courses
+        self.names = [v.get("name") or "" for v in vacancies]
+        self.companies = [v.get("company") for v in vacancies]
+        self.locations = [v.get("location") for v in vacancies]
+        self.experiences = [v.get("experience") for v in vacancies]
+        self.employments = [v.get("employment") for v in vacancies]
+        self.schedules = [v.get("schedule") for v in vacancies]
+        self.salaries = [v.get("salary") for v in vacancies]
+        self.skill_lists = [v.get("skills") or [] for v in vacancies]
+        self.sentences = [s for v in vacancies
+                          for s in _SENTENCE_RE.split(v.get("description") or "") if len(s) > 20]
+        self.sentence_counts = [min(max(len(_SENTENCE_RE.split(v.get("description") or "")), 1),
+                                    MAX_DESCRIPTION_SENTENCES) for v in vacancies]
+        dates = [v.get("published_at") for v in vacancies if v.get("published_at")]
+        self.latest = max((datetime.fromisoformat(d[:19]) for d in dates), default=datetime(2025, 10, 1))
+
+    @classmethod
+    def load(cls) -> "CorpusProfile":
+        vacancies, _ = read_json(JSONS_DIR / 'processed_vacancies.json')
+        courses, _ = read_json(JSONS_DIR / 'courses.json')
+        return cls(parse_vacancies(vacancies), parse_courses(courses))
+
+    def vacancy(self, rng: random.Random, number: int) -> Dict:
+        description = " ".join(rng.choices(self.sentences, k=rng.choice(self.sentence_counts)))
+        published = self.latest - timedelta(days=rng.randrange(90), seconds=rng.randrange(86400))
+        return {
+            "id": f"bench-{number}",
+            "name": rng.choice(self.names),
+            "description": description,
+            "skills": list(rng.choice(self.skill_lists)),
+            "company": rng.choice(self.companies),
+            "salary": rng.choice(self.salaries),
+            "experience": rng.choice(self.experiences),
+            "employment": rng.choice(self.employments),
+            "schedule": rng.choice(self.schedules),
+            "url": f"https://example.com/vacancy/{number}",
+            "published_at": published.strftime("%Y-%m-%dT%H:%M:%S+0300"),
+            "source": "benchmark",
+            "location": rng.choice(self.locations),
+        }
+
+    def course(self, rng: random.Random, number: int) -> Dict:
+        course = dict(rng.choice(self.courses))
+        # Категория и длительность смешиваются между курсами, чтобы планировщику было из чего выбирать
+        course["category"] = list(rng.choice(self.courses).get("category") or [])
+        course["duration"] = rng.choice(self.courses).get("duration")
+        course["id"] = f"bench-{number}"
+        course["title"] = f"{course.get('title') or ''} #{number}"
+        return course
+
+
+def synthetic_corpus_paths(size: int, seed: int, profile: Optional[CorpusProfile] = None):
+    """Пути к синтетическим файлам вакансий и курсов (генерируются, если их нет)"""
+    BENCH_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    vacancies_path = BENCH_DATA_DIR / f'vacancies_{size}_{seed}.json'
+    courses_path = BENCH_DATA_DIR / f'courses_{size}_{seed}.json'
+    if vacancies_path.exists() and courses_path.exists():
+        return vacancies_path, courses_path
+
+    profile = profile or CorpusProfile.load()
+    rng = random.Random(seed)
+    # Курсов столько же на вакансию, сколько в исходных данных
+    course_count = max(len(profile.courses), size * len(profile.courses) // max(len(profile.vacancies), 1))
+    started = time.perf_counter()
+    _write_json_array(vacancies_path, (profile.vacancy(rng, i) for i in range(size)))
+    _write_json_array(courses_path, (profile.course(rng, i) for i in range(course_count)))
+    print(f"Сгенерировано: {size} вакансий, {course_count} курсов за {time.perf_counter() - started:.1f} с "
+          f"-> {vacancies_path.name}")
+    return vacancies_path, courses_path
+
+
+def _write_json_array(path: Path, items):
+    """Пишет массив потоково, не собирая весь корпус в памяти"""
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for number, item in enumerate(items):
+            if number:
+                f.write(",\n")
+            f.write(json.dumps(item, ensure_ascii=False))
+        f.write("]")
+    os.replace(tmp_path, path)
+
+
+def _use_corpus(vacancies_path: Path, courses_path: Path):
+    """Переключает инструменты на синтетический корпус и сбрасывает кэш корпусов"""
+    corpus_module.VACANCIES_PATH = vacancies_path
+    corpus_module.COURSES_PATH = courses_path
+    corpus_module._CORPUS_CACHE.clear()
+    gc.collect()
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Отладочный вывод инструментов не попадает в отчет (но его стоимость остается в замерах)"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def _summary(stage: str, size: int, samples: Sequence[float], peak_bytes: Optional[int]) -> Dict:
+    samples = np.asarray(samples, dtype=np.float64)
+    total = float(samples.sum())
+    return {
+        "size": size,
+        "stage": stage,
+        "calls": int(len(samples)),
+        "throughput": round(len(samples) / total, 2) if total else None,
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 3),
+        "peak_mb": round(peak_bytes / 2 ** 20, 2) if peak_bytes is not None else None,
+    }
+
+
+def _peak_memory(run: Callable[[], None]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure_calls(stage: str, size: int, func: Callable, inputs: Sequence, memory: bool = True) -> Dict:
+    """Время каждого вызова func(input), затем пиковая память на части вызовов"""
+    with _quiet():
+        for item in inputs[:3]:
+            func(item)
+        samples = []
+        for item in inputs:
+            started = time.perf_counter()
+            func(item)
+            samples.append(time.perf_counter() - started)
+        peak = _peak_memory(lambda: [func(item) for item in inputs[:MEMORY_CALLS]]) if memory else None
+    return _summary(stage, size, samples, peak)
+
+
+def measure_once(stage: str, size: int, run: Callable[[], None], reset: Callable[[], None],
+                 memory: bool = True) -> Dict:
+    """Однократная операция (загрузка, построение индекса): время, затем память повторным проходом"""
+    reset()
+    with _quiet():
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        peak = None
+        if memory:
+            reset()
+            peak = _peak_memory(run)
+    return _summary(stage, size, [elapsed], peak)
+
+
+def _load_stages(size: int, memory: bool) -> List[Dict]:
+    """Загрузка корпуса и построение каждого индекса по отдельности"""
+    results = []
+
+    def reset_all():
+        corpus_module._CORPUS_CACHE.clear()
+        gc.collect()
+
+    results.append(measure_once("load:vacancies", size, get_vacancy_corpus, reset_all, memory))
+    results.append(measure_once("load:courses", size, get_course_corpus, reset_all, memory))
+
+    vacancies = get_vacancy_corpus()
+    for index in ("skills", "facets", "fulltext", "embeddings", "role_skills", "market"):
+        attribute = f"_{index}"
+
+        def reset_index(attribute=attribute):
+            setattr(vacancies, attribute, None)
+            # Рыночные агрегаты досчитываются от предыдущей версии; для честного замера строим с нуля
+            import market
+            market._LAST_STATS = None
+            gc.collect()
+
+        results.append(measure_once(f"index:{index}", size, lambda index=index: getattr(vacancies, index),
+                                    reset_index, memory))
+    courses = get_course_corpus()
+    courses.skill_index
+    return results
+
+
+def _vacancy_queries(rng: random.Random, vocabulary: List[str], repeat: int) -> List[Dict]:
+    levels = ["Нет опыта", "junior", "middle", "От 1 года до 3 лет"]
+    texts = [None, None, "финтех", "удалённая работа", "геймдев", "высоконагруженные сервисы"]
+    cities = [None, None, "Москва", "Санкт-Петербург", "Новосибирск"]
+    queries = []
+    for _ in range(repeat):
+        queries.append({
+            "user_skills": rng.sample(vocabulary, k=min(len(vocabulary), rng.randint(2, 6))),
+            "experience_level": rng.choice(levels),
+            "query": rng.choice(texts),
+            "location": rng.choice(cities),
+            "min_salary": rng.choice([None, None, 80000, 150000]),
+        })
+    return queries
+
+
+def _plan_queries(rng: random.Random, vocabulary: List[str], repeat: int) -> List[Dict]:
+    from roles import ROLE_ALIASES
+    targets = [alias for role, aliases in ROLE_ALIASES.items() for alias in [role, *aliases]]
+    return [{"skills": rng.sample(vocabulary, k=min(len(vocabulary), rng.randint(1, 5))),
+             "target_position": rng.choice(targets)} for _ in range(repeat)]
+
+
+def _advice_questions(rng: random.Random, repeat: int) -> List[Dict]:
+    from advice import get_advice_base
+    questions = [q for article in get_advice_base().articles for q in article.get("questions") or []]
+    questions = questions or ["как подготовиться к собеседованию"]
+    tails = ["", " подскажи пожалуйста", " если я студент", " в ИТ", " без опыта работы"]
+    return [{"question": rng.choice(questions) + rng.choice(tails)} for _ in range(repeat)]
+
+
+def run_size(size: int, seed: int, repeat: int, memory: bool, profile: CorpusProfile) -> List[Dict]:
+    import tools
+
+    vacancies_path, courses_path = synthetic_corpus_paths(size, seed, profile)
+    _use_corpus(vacancies_path, courses_path)
+    results = _load_stages(size, memory)
+
+    vacancy_corpus = get_vacancy_corpus()
+    vocabulary = list(vacancy_corpus.skills.vocabulary.names) or ["Python", "SQL", "Git"]
+    rng = random.Random(seed)
+
+    results.append(measure_calls("find_matching_vacancies", size, tools.find_matching_vacancies.invoke,
+                                 _vacancy_queries(rng, vocabulary, repeat), memory))
+    results.append(measure_calls("create_learning_plan", size, tools.create_learning_plan.invoke,
+                                 _plan_queries(rng, vocabulary, repeat), memory))
+    results.append(measure_calls("provide_career_advice", size, tools.provide_career_advice.invoke,
+                                 _advice_questions(rng, repeat), memory))
+    descriptions = [v.get("description") or "" for v in rng.sample(vacancy_corpus.vacancies,
+                                                                   k=min(repeat, len(vacancy_corpus)))]
+    results.append(measure_calls("extract_skills_from_text", size, tools.extract_skills_from_text,
+                                 descriptions, memory))
+    return results
+
+
+def print_report(results: List[Dict]):
+    header = f"{'размер':>9}  {'этап':<26}{'вызовов':>8}{'оп/с':>11}{'p50, мс':>11}{'p99, мс':>11}{'пик, МБ':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        throughput = f"{row['throughput']:.1f}" if row["throughput"] else "-"
+        peak = f"{row['peak_mb']:.1f}" if row["peak_mb"] is not None else "-"
+        print(f"{row['size']:>9}  {row['stage']:<26}{row['calls']:>8}{throughput:>11}"
+              f"{row['p50_ms']:>11.2f}{row['p99_ms']:>11.2f}{peak:>10}")
+
+
+def compare_with_baseline(results: List[Dict], baseline_path: Path, tolerance: float) -> List[str]:
+    """Этапы, у которых p99 или пиковая память выросли больше допустимого"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(row["size"], row["stage"]): row for row in json.load(f)["results"]}
+    regressions = []
+    for row in results:
+        previous = baseline.get((row["size"], row["stage"]))
+        if previous is None:
+            continue
+        for metric in ("p99_ms", "peak_mb"):
+            old, new = previous.get(metric), row.get(metric)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{row['size']} {row['stage']}: {metric} {old} -> {new} "
+                                   f"(+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк инструментов карьерного навигатора")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="размеры корпуса через запятую (10k,100k,1m)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="вызовов каждого инструмента")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="не измерять пиковую память")
+    parser.add_argument("--output", type=Path, help="сохранить отчет в JSON")
+    parser.add_argument("--baseline", type=Path, help="сравнить с отчетом предыдущего запуска")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    profile = CorpusProfile.load()
+    results = []
+    for size in [parse_size(s) for s in args.sizes.split(",") if s.strip()]:
+        print(f"\n=== Корпус на {size} вакансий ===")
+        rows = run_size(size, args.seed, args.repeat, not args.no_memory, profile)
+        print_report(rows)
+        results.extend(rows)
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nОтчет сохранен: {args.output}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"\nРегрессии относительно {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nРегрессий относительно {args.baseline} нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,11 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from skill_taxonomy import course_category_matcher, course_skill_matcher
+
 
 class StepikCourseCollector:
     """Класс для сбора данных о IT-курсах с Stepik через комбинацию API и парсинга"""
@@ -399,32 +404,7 @@ class StepikCourseCollector:
 
     def _categorize_course(self, text: str) -> str:
         """Определяет категорию курса на основе текста"""
-        text_lower = text.lower()
-
-        category_mapping = {
-            'Python': ['python', 'django', 'flask', 'fastapi'],
-            'JavaScript': ['javascript', 'js', 'node', 'react', 'vue', 'angular'],
-            'Java': ['java', 'spring'],
-            'Web Development': ['web', 'fullstack', 'full-stack', 'html', 'css'],
-            'Frontend': ['frontend', 'front-end'],
-            'Backend': ['backend', 'back-end'],
-            'Data Science': ['data science', 'data scientist', 'ml', 'machine learning'],
-            'AI': ['ai', 'artificial intelligence', 'нейросеть'],
-            'DevOps': ['devops', 'docker', 'kubernetes', 'aws', 'cloud'],
-            'Mobile': ['mobile', 'android', 'ios', 'react native', 'flutter'],
-            'Cybersecurity': ['cybersecurity', 'security', 'безопасность', 'hacking'],
-            'Database': ['database', 'sql', 'postgresql', 'mysql', 'mongodb'],
-            'Game Development': ['game', 'unity', 'unreal'],
-            'Design': ['design', 'ui', 'ux', 'figma'],
-            'Management': ['project management', 'agile', 'scrum'],
-            'QA': ['qa', 'testing', 'test', 'quality assurance']
-        }
-
-        for category, keywords in category_mapping.items():
-            if any(keyword in text_lower for keyword in keywords):
-                return category
-
-        return 'Other IT'
+        return course_category_matcher.first(text) or 'Other IT'
 
     def _determine_level(self, text: str) -> str:
         """Определяет уровень сложности курса"""
@@ -442,27 +422,7 @@ class StepikCourseCollector:
 
     def _extract_skills(self, text: str) -> List[str]:
         """Извлекает навыки из описания курса"""
-        skills = []
-        text_lower = text.lower()
-
-        # Список IT-навыков для поиска
-        it_skills = [
-            'python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
-            'html', 'css', 'sass', 'less', 'typescript',
-            'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring',
-            'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
-            'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'jenkins', 'git',
-            'machine learning', 'deep learning', 'tensorflow', 'pytorch', 'pandas', 'numpy',
-            'linux', 'bash', 'nginx', 'apache',
-            'rest api', 'graphql', 'microservices', 'ci/cd',
-            'agile', 'scrum', 'kanban', 'jira'
-        ]
-
-        for skill in it_skills:
-            if skill in text_lower:
-                skills.append(skill.title())
-
-        return skills[:10]  # Ограничиваем количество навыков
+        return course_skill_matcher.find(text)[:10]  # Ограничиваем количество навыков
 
     def _clean_description(self, description: str) -> str:
         """Очищает описание от HTML-тегов"""
@@ -4,6 +4,13 @@ import time
 from typing import Dict, List, Optional
 import re
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ingest import normalize_vacancy_skills
+from salary import structured_salary
+
 
 class HHDataCollector:
     """Класс для сбора данных с HH.ru API"""
@@ -130,6 +137,9 @@ class HHDataCollector:
             # Если детальная информация недоступна, используем базовую
             key_skills = [skill['name'] for skill in raw_vacancy.get('key_skills', [])]
 
+        # Канонические навыки по таксономии и навыки, которых в ней нет (для ревью)
+        normalized_skills, unmatched_skills = normalize_vacancy_skills(key_skills)
+
         # Очистка описания
         description = ""
         if detailed_info:
@@ -145,8 +155,12 @@ class HHDataCollector:
             "name": raw_vacancy.get("name"),
             "description": description[:1500],  # Ограничиваем длину
             "key_skills": key_skills,
+            "normalized_skills": normalized_skills,
+            "unmatched_skills": unmatched_skills,
             "company": raw_vacancy.get('employer', {}).get('name'),
             "salary": salary_info,
+            # Структурированная зарплата для числовых фильтров и сортировки
+            **structured_salary(salary),
             "experience": raw_vacancy.get('experience', {}).get('name'),
             "employment": raw_vacancy.get('employment', {}).get('name'),
             "schedule": raw_vacancy.get('schedule', {}).get('name'),
@@ -273,6 +287,15 @@ class HHDataCollector:
         for skill, count in list(skills_stats.items())[:15]:
             print(f"  {skill}: {count} упоминаний")
 
+        # Показываем навыки, которых нет в таксономии
+        unmatched_stats = {}
+        for vacancy in processed_vacancies:
+            for skill in vacancy.get('unmatched_skills', []):
+                unmatched_stats[skill] = unmatched_stats.get(skill, 0) + 1
+        print(f"\n🧩 Навыков вне таксономии: {len(unmatched_stats)} (топ-15):")
+        for skill, count in sorted(unmatched_stats.items(), key=lambda x: x[1], reverse=True)[:15]:
+            print(f"  {skill}: {count} упоминаний")
+
         # Показываем количество вакансий с навыками
         vacancies_with_skills = sum(1 for v in processed_vacancies if v.get('key_skills'))
         print(f"\n📈 Вакансий с указанными навыками: {vacancies_with_skills}/{len(processed_vacancies)}")
@@ -286,4 +309,4 @@ class HHDataCollector:
 # Использование
 if __name__ == "__main__":
     collector = HHDataCollector()
-    vacancies = collector.run_collection()
\ No newline at end of file
+    vacancies = collector.run_collection()
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""Загрузка корпусов вакансий и курсов с кэшированием и ленивым построением индексов"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+JSONS_DIR = Path(__file__).parent / 'jsons'
+VACANCIES_PATH = JSONS_DIR / 'processed_vacancies.json'
+COURSES_PATH = JSONS_DIR / 'courses.json'
+
+
+def read_json(path: Path):
+    """Читает JSON файл и возвращает (данные, версия). Версия — хэш содержимого файла"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return json.loads(raw.decode('utf-8')), hashlib.sha1(raw).hexdigest()[:12]
+
+
+def parse_vacancies(data) -> List[Dict]:
+    """Приводит содержимое файла вакансий к списку словарей.
+
+    Поддерживает два формата файла:
+    - Список вакансий (корневой элемент — массив)
+    - Словарь {"vacancies": [...]}
+    """
+    if isinstance(data, dict) and 'vacancies' in data:
+        return data.get('vacancies') or []
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def parse_courses(data) -> List[Dict]:
+    """Приводит содержимое файла курсов к списку словарей"""
+    if isinstance(data, dict) and 'courses' in data:
+        return data.get('courses') or []
+    if isinstance(data, list):
+        return data
+    return []
+
+
+class VacancyCorpus:
+    """Корпус вакансий: данные и индексы, которые строятся один раз на версию файла"""
+
+    def __init__(self, vacancies: List[Dict], version: str, path: Optional[Path] = None):
+        self.vacancies = vacancies
+        self.version = version
+        self.path = path
+        self._lock = threading.Lock()
+        self._embeddings = None
+        self._fulltext = None
+        self._facets = None
+        self._skills = None
+        self._role_skills = None
+        self._market = None
+
+    def __len__(self) -> int:
+        return len(self.vacancies)
+
+    @property
+    def market(self):
+        """Рыночная статистика: навыки по ролям и городам, перцентили зарплат, спрос по неделям"""
+        if self._market is None:
+            # Навыки строятся до захвата блокировки: агрегаты читают self.skills
+            self.skills
+            with self._lock:
+                if self._market is None:
+                    from market import build_market_stats
+                    self._market = build_market_stats(self)
+        return self._market
+
+    @property
+    def role_skills(self):
+        """Требования ролей по вакансиям (из опубликованной таблицы с досчетом новых вакансий)"""
+        if self._role_skills is None:
+            # Навыки строятся до захвата блокировки: досчет таблицы читает self.skills
+            self.skills
+            with self._lock:
+                if self._role_skills is None:
+                    from role_skills import load_or_build_role_skills
+                    self._role_skills = load_or_build_role_skills(self)
+        return self._role_skills
+
+    @property
+    def skills(self):
+        """Нормализованные навыки вакансий: словарь идентификаторов и множества по вакансиям"""
+        if self._skills is None:
+            with self._lock:
+                if self._skills is None:
+                    from ingest import ingest_vacancy_skills
+                    self._skills = ingest_vacancy_skills(self.vacancies)
+        return self._skills
+
+    @property
+    def facets(self):
+        """Фасетные индексы по городу, графику, занятости, опыту и зарплате"""
+        if self._facets is None:
+            with self._lock:
+                if self._facets is None:
+                    from facets import FacetIndex
+                    self._facets = FacetIndex.build(self.vacancies)
+        return self._facets
+
+    @property
+    def fulltext(self):
+        """Полнотекстовый BM25-индекс по названию, компании и описанию вакансий"""
+        if self._fulltext is None:
+            with self._lock:
+                if self._fulltext is None:
+                    from fulltext import build_vacancy_index
+                    self._fulltext = build_vacancy_index(self.vacancies)
+        return self._fulltext
+
+    @property
+    def embeddings(self):
+        """Семантический индекс вакансий (загружается из артефакта или строится в памяти)"""
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    from embeddings import load_or_build_vacancy_index
+                    self._embeddings = load_or_build_vacancy_index(self.vacancies, self.version)
+        return self._embeddings
+
+
+class CourseCorpus:
+    """Корпус курсов: данные и индексы, которые строятся один раз на версию файла"""
+
+    def __init__(self, courses: List[Dict], version: str, path: Optional[Path] = None):
+        self.courses = courses
+        self.version = version
+        self.path = path
+        self._lock = threading.Lock()
+        self._embeddings = None
+        self._skill_index = None
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    @property
+    def embeddings(self):
+        """Семантический индекс курсов (загружается из артефакта или строится в памяти)"""
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    from embeddings import load_or_build_course_index
+                    self._embeddings = load_or_build_course_index(self.courses, self.version)
+        return self._embeddings
+
+    @property
+    def skill_index(self):
+        """Индекс навык -> курсы с пререквизитами и уровнями для учебных планов"""
+        if self._skill_index is None:
+            from embeddings import is_semantic
+            # Индекс эмбеддингов курсов нужен только с моделью (иначе поиск курсов — точный и нечеткий)
+            embeddings = self.embeddings if is_semantic() else None
+            with self._lock:
+                if self._skill_index is None:
+                    from planner import CourseSkillIndex
+                    self._skill_index = CourseSkillIndex(self.courses, embeddings)
+        return self._skill_index
+
+
+# Кэш корпусов: путь -> (mtime, size, корпус). Файл перечитывается только при изменении
+_CACHE_LOCK = threading.Lock()
+_CORPUS_CACHE: Dict[str, tuple] = {}
+
+
+def load_cached(path: Path, factory):
+    """Объект, построенный factory(data, version, path) из JSON-файла; кэшируется до изменения файла.
+
+    Возвращает None, если файла нет.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = str(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _CORPUS_CACHE.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with _CACHE_LOCK:
+        cached = _CORPUS_CACHE.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        data, version = read_json(path)
+        corpus = factory(data, version, path)
+        _CORPUS_CACHE[key] = (stamp, corpus)
+        return corpus
+
+
+def get_vacancy_corpus(path: str | Path = None) -> VacancyCorpus:
+    """Возвращает закэшированный корпус вакансий (пустой, если файла нет)"""
+    path = Path(path) if path is not None else VACANCIES_PATH
+    corpus = load_cached(path, lambda data, version, p: VacancyCorpus(parse_vacancies(data), version, p))
+    return corpus if corpus is not None else VacancyCorpus([], 'empty', path)
+
+
+def get_course_corpus(path: str | Path = None) -> CourseCorpus:
+    """Возвращает закэшированный корпус курсов (пустой, если файла нет)"""
+    path = Path(path) if path is not None else COURSES_PATH
+    corpus = load_cached(path, lambda data, version, p: CourseCorpus(parse_courses(data), version, p))
+    return corpus if corpus is not None else CourseCorpus([], 'empty', path)
@@ -0,0 +1,73 @@
+"""Пул соединений с базой данных.
+
+Пул создается при первом обращении (или на этапе прогрева), а не при
+импорте модуля, поэтому импорт API не требует доступной базы.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+import psycopg2.pool
+
+
+logger = logging.getLogger(__name__)
+
+DSN = os.getenv("DSN", "host=localhost port=54321 dbname=aigovnodb user=postgres password=4268 sslmode=disable")
+# Сколько соединений открывается сразу и сколько может быть всего
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+
+_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """Возвращает пул, создавая его при первом вызове"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = open_pool()
+    return _pool
+
+
+def open_pool(dsn: str = DSN) -> psycopg2.pool.ThreadedConnectionPool:
+    """Открывает DB_POOL_MIN соединений и проверяет одно из них запросом"""
+    try:
+        pool = psycopg2.pool.ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, dsn=dsn)
+    except psycopg2.OperationalError as e:
+        logger.error("Failed to connect to database: %s", e)
+        raise
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.commit()
+    finally:
+        pool.putconn(conn)
+    logger.info("Connection pool created successfully (%d connections)", DB_POOL_MIN)
+    return pool
+
+
+def pool_stats() -> Dict:
+    """Занятость пула: выданные и свободные соединения относительно максимума"""
+    pool = _pool
+    if pool is None:
+        return {"open": False, "max": DB_POOL_MAX}
+    used, idle = len(pool._used), len(pool._pool)
+    return {
+        "open": not pool.closed,
+        "used": used,
+        "idle": idle,
+        "max": pool.maxconn,
+        "utilization": round(used / pool.maxconn, 3) if pool.maxconn else 0.0,
+    }
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
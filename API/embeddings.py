@@ -0,0 +1,243 @@
+"""Семантический индекс эмбеддингов для вакансий и курсов.
+
+Эмбеддинги считаются офлайн (python embeddings.py) и хранятся в компактной
+матрице float16 в каталоге jsons/. Во время работы сервиса нужна только
+загрузка матрицы и перемножение на CPU, сеть не используется.
+"""
+import logging
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIM = 256
+VACANCY_INDEX_PATH = Path(__file__).parent / 'jsons' / 'vacancy_embeddings.npz'
+COURSE_INDEX_PATH = Path(__file__).parent / 'jsons' / 'course_embeddings.npz'
+
+# Веса полей документа: заголовок и навыки важнее длинного описания
+TITLE_WEIGHT = 1.0
+BODY_WEIGHT = 0.5
+BODY_CHARS = 600
+_CHUNK_ROWS = 8192
+
+_TOKEN_RE = re.compile(r'[a-zа-яё0-9][a-zа-яё0-9+#]*')
+
+
+class HashingEncoder:
+    """Локальный энкодер без модели: слова и символьные триграммы хэшируются в плотный вектор.
+
+    Триграммы сближают словоформы и близкие написания ("разработчик"/"разработка",
+    "postgres"/"postgresql"), чего не дает точное сравнение строк.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-v1-{dim}"
+
+    def _add_feature(self, vector: np.ndarray, feature: str, weight: float):
+        h = zlib.crc32(feature.encode('utf-8'))
+        vector[h % self.dim] += weight if h & 0x80000000 else -weight
+
+    def _encode_one(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN_RE.findall(text.lower()):
+            self._add_feature(vector, token, 1.0)
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                self._add_feature(vector, padded[i:i + 3], 0.5)
+        return vector
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Кодирует тексты в матрицу (n, dim) с L2-нормированными строками"""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            if text:
+                matrix[i] = self._encode_one(text)
+        return _normalize(matrix)
+
+
+class SentenceTransformerEncoder:
+    """Энкодер на локальной модели sentence-transformers (путь в EMBEDDING_MODEL_PATH)"""
+
+    def __init__(self, model_path: str):
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_path, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.name = f"st-{Path(model_path).name}-{self.dim}"
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self.model.encode(list(texts), batch_size=64, normalize_embeddings=True,
+                                    convert_to_numpy=True, show_progress_bar=False)
+        return vectors.astype(np.float32)
+
+
+_ENCODER = None
+_ENCODER_LOCK = threading.Lock()
+
+
+def get_encoder():
+    """Возвращает энкодер: локальную модель, если она указана и доступна, иначе хэширующий"""
+    global _ENCODER
+    if _ENCODER is None:
+        with _ENCODER_LOCK:
+            if _ENCODER is None:
+                model_path = os.getenv("EMBEDDING_MODEL_PATH")
+                encoder = None
+                if model_path:
+                    try:
+                        encoder = SentenceTransformerEncoder(model_path)
+                    except Exception as e:
+                        logger.warning("Не удалось загрузить модель эмбеддингов %s: %s", model_path, e)
+                _ENCODER = encoder or HashingEncoder()
+    return _ENCODER
+
+
+def is_semantic() -> bool:
+    """Загружена модель эмбеддингов. Хэширующий энкодер сравнивает написание, а не смысл
+    ("java" близко к "javascript"), поэтому семантические оценки с ним не используются"""
+    return isinstance(get_encoder(), SentenceTransformerEncoder)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def encode_query(text: str) -> np.ndarray:
+    """Кодирует короткий запрос (например, список навыков пользователя) в вектор"""
+    return get_encoder().encode([text])[0]
+
+
+def encode_documents(titles: Sequence[str], bodies: Sequence[str], encoder=None) -> np.ndarray:
+    """Кодирует документы как взвешенную сумму заголовка и тела"""
+    encoder = encoder or get_encoder()
+    title_vectors = encoder.encode(titles)
+    body_vectors = encoder.encode([body[:BODY_CHARS] for body in bodies])
+    return _normalize(TITLE_WEIGHT * title_vectors + BODY_WEIGHT * body_vectors)
+
+
+def vacancy_fields(vacancy: Dict) -> Tuple[str, str]:
+    """Возвращает (заголовок, тело) вакансии для эмбеддинга"""
+    skills = vacancy.get("skills") or vacancy.get("required_skills") or []
+    title = " ".join([vacancy.get("name") or vacancy.get("title") or ""] + list(skills))
+    return title, vacancy.get("description") or ""
+
+
+def course_fields(course: Dict) -> Tuple[str, str]:
+    """Возвращает (заголовок, тело) курса для эмбеддинга"""
+    category = course.get("category") or []
+    if isinstance(category, str):
+        category = [category]
+    title = " ".join([course.get("title") or ""] + list(category) + list(course.get("skills") or []))
+    return title, course.get("description") or ""
+
+
+class EmbeddingIndex:
+    """Точный поиск по косинусной близости над матрицей float16.
+
+    Для десятков тысяч документов одно матрично-векторное умножение на CPU
+    занимает единицы миллисекунд, поэтому приближенный индекс не нужен.
+    """
+
+    def __init__(self, matrix: np.ndarray, encoder_name: str, corpus_version: str):
+        self.matrix = matrix.astype(np.float16, copy=False)
+        self.encoder_name = encoder_name
+        self.corpus_version = corpus_version
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def similarities(self, query_vector: np.ndarray) -> np.ndarray:
+        """Косинусная близость запроса ко всем документам"""
+        query_vector = query_vector.astype(np.float32, copy=False)
+        scores = np.empty(len(self), dtype=np.float32)
+        # float16 хранится компактно, но считается блоками в float32 (BLAS не умеет float16)
+        for start in range(0, len(self), _CHUNK_ROWS):
+            block = self.matrix[start:start + _CHUNK_ROWS]
+            scores[start:start + block.shape[0]] = block.astype(np.float32) @ query_vector
+        return scores
+
+    def search(self, query_vector: np.ndarray, k: int = 10,
+               candidates: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """Возвращает k ближайших документов как список (позиция, близость)"""
+        scores = self.similarities(query_vector)
+        if candidates is not None:
+            positions = np.fromiter(candidates, dtype=np.int64)
+            scores = scores[positions]
+        else:
+            positions = np.arange(scores.shape[0])
+        if scores.shape[0] == 0:
+            return []
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(positions[i]), float(scores[i])) for i in top]
+
+    def save(self, path: Path):
+        np.savez(path, matrix=self.matrix, encoder_name=self.encoder_name,
+                 corpus_version=self.corpus_version)
+
+    @classmethod
+    def load(cls, path: Path) -> "EmbeddingIndex":
+        with np.load(path) as data:
+            return cls(data["matrix"], str(data["encoder_name"]), str(data["corpus_version"]))
+
+
+def build_index(fields: List[Tuple[str, str]], corpus_version: str, encoder=None) -> EmbeddingIndex:
+    """Строит индекс по списку пар (заголовок, тело)"""
+    encoder = encoder or get_encoder()
+    titles = [title for title, _ in fields]
+    bodies = [body for _, body in fields]
+    matrix = encode_documents(titles, bodies, encoder) if fields else np.zeros((0, encoder.dim), np.float32)
+    return EmbeddingIndex(matrix, encoder.name, corpus_version)
+
+
+def _load_or_build(path: Path, fields: List[Tuple[str, str]], corpus_version: str) -> EmbeddingIndex:
+    encoder = get_encoder()
+    if path.exists():
+        try:
+            index = EmbeddingIndex.load(path)
+            if (index.corpus_version == corpus_version and index.encoder_name == encoder.name
+                    and len(index) == len(fields)):
+                return index
+        except Exception as e:
+            logger.warning("Не удалось прочитать индекс эмбеддингов %s: %s", path, e)
+    # Артефакт отсутствует или устарел — строим в памяти (офлайн-сборка: python embeddings.py)
+    return build_index(fields, corpus_version, encoder)
+
+
+def load_or_build_vacancy_index(vacancies: List[Dict], corpus_version: str) -> EmbeddingIndex:
+    return _load_or_build(VACANCY_INDEX_PATH, [vacancy_fields(v) for v in vacancies], corpus_version)
+
+
+def load_or_build_course_index(courses: List[Dict], corpus_version: str) -> EmbeddingIndex:
+    return _load_or_build(COURSE_INDEX_PATH, [course_fields(c) for c in courses], corpus_version)
+
+
+if __name__ == "__main__":
+    # Офлайн-сборка артефактов эмбеддингов для текущих корпусов
+    import time
+    from corpus import get_vacancy_corpus, get_course_corpus
+
+    vacancy_corpus = get_vacancy_corpus()
+    course_corpus = get_course_corpus()
+    jobs = [
+        ("вакансий", [vacancy_fields(v) for v in vacancy_corpus.vacancies], vacancy_corpus.version, VACANCY_INDEX_PATH),
+        ("курсов", [course_fields(c) for c in course_corpus.courses], course_corpus.version, COURSE_INDEX_PATH),
+    ]
+    for name, fields, version, path in jobs:
+        start = time.perf_counter()
+        index = build_index(fields, version)
+        index.save(path)
+        elapsed = time.perf_counter() - start
+        print(f"Индекс {name}: {len(index)} x {index.matrix.shape[1]} ({index.encoder_name}), "
+              f"{index.matrix.nbytes / 1024:.0f} КБ, {elapsed:.1f} с -> {path}")
@@ -0,0 +1,202 @@
+"""Фасетные индексы вакансий: город, график, занятость, опыт и зарплата.
+
+Для каждого значения фасета заранее строится битовая маска по корпусу, а
+зарплаты разбираются в числовые диапазоны с отсортированным индексом.
+Фильтры пользователя пересекают маски до подсчета оценок, поэтому скоринг
+идет только по подходящим вакансиям.
+"""
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from salary import vacancy_salary_rub
+
+
+# Корзины опыта HH.ru
+EXPERIENCE_BUCKETS = {
+    "нет опыта": "noExperience",
+    "от 1 года до 3 лет": "between1And3",
+    "от 3 до 6 лет": "between3And6",
+    "более 6 лет": "moreThan6",
+}
+
+# Какие корзины опыта подходят пользователю с данным уровнем
+EXPERIENCE_LEVELS = {
+    "нет опыта": ("noExperience", "between1And3"),
+    "без опыта": ("noExperience", "between1And3"),
+    "beginner": ("noExperience", "between1And3"),
+    "junior": ("noExperience", "between1And3"),
+}
+
+# Разговорные формы значений фасетов -> нормализованное значение
+CITY_ALIASES = {
+    "мск": "москва",
+    "спб": "санкт-петербург",
+    "питер": "санкт-петербург",
+    "екб": "екатеринбург",
+}
+SCHEDULE_ALIASES = {
+    "удаленно": "удаленная работа",
+    "удаленка": "удаленная работа",
+    "удаленная": "удаленная работа",
+    "remote": "удаленная работа",
+    "офис": "полный день",
+    "в офисе": "полный день",
+    "сменный": "сменный график",
+    "гибкий": "гибкий график",
+}
+EMPLOYMENT_ALIASES = {
+    "полная": "полная занятость",
+    "full-time": "полная занятость",
+    "частичная": "частичная занятость",
+    "part-time": "частичная занятость",
+    "проект": "проектная работа",
+    "проектная": "проектная работа",
+    "стажировка": "стажировка",
+}
+
+# Префикс значения короче этого сравнивается только целиком ("с" не совпадает с "самара")
+MIN_PREFIX_LENGTH = 4
+
+_AMOUNT_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*(k|к|тыс|т\.р|млн|m)?', re.IGNORECASE)
+
+
+def normalize_value(value: Optional[str]) -> str:
+    """Нормализует значение фасета для сравнения"""
+    return (value or "").strip().lower().replace("ё", "е")
+
+
+def parse_salary_amount(text) -> Optional[float]:
+    """Разбирает сумму из пользовательского фильтра: 100000, "100k", "от 100 тыс", "1.5 млн" """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = _AMOUNT_RE.search(str(text).replace(" ", ""))
+    if not match:
+        return None
+    amount = float(match.group(1).replace(",", "."))
+    unit = (match.group(2) or "").lower()
+    if unit in ("k", "к", "тыс", "т.р"):
+        amount *= 1_000
+    elif unit in ("млн", "m"):
+        amount *= 1_000_000
+    return amount
+
+
+class FacetIndex:
+    """Битовые маски по значениям фасетов и отсортированный индекс зарплат"""
+
+    FIELDS = ("location", "schedule", "employment", "experience")
+
+    def __init__(self, size: int, bitmaps: Dict[str, Dict[str, np.ndarray]],
+                 salary_min: np.ndarray, salary_max: np.ndarray):
+        self.size = size
+        self.bitmaps = bitmaps
+        self.salary_min = salary_min
+        self.salary_max = salary_max
+        self._experience_known = np.zeros(size, dtype=bool)
+        for bitmap in bitmaps.get("experience", {}).values():
+            self._experience_known |= bitmap
+        # Верхняя граница зарплаты (или нижняя, если верхней нет) — по ней фильтр "от N"
+        upper = np.where(np.isnan(salary_max), salary_min, salary_max)
+        known = np.flatnonzero(~np.isnan(upper))
+        order = np.argsort(upper[known], kind="stable")
+        self._salary_sorted_positions = known[order]
+        self._salary_sorted_values = upper[known][order]
+
+    @classmethod
+    def build(cls, vacancies: List[Dict]) -> "FacetIndex":
+        size = len(vacancies)
+        bitmaps: Dict[str, Dict[str, np.ndarray]] = {field: {} for field in cls.FIELDS}
+        salary_min = np.full(size, np.nan, dtype=np.float64)
+        salary_max = np.full(size, np.nan, dtype=np.float64)
+
+        for position, vacancy in enumerate(vacancies):
+            values = {
+                "location": vacancy.get("location"),
+                "schedule": vacancy.get("schedule"),
+                "employment": vacancy.get("employment"),
+                "experience": EXPERIENCE_BUCKETS.get(normalize_value(
+                    vacancy.get("experience") or vacancy.get("experience_level"))),
+            }
+            for field, value in values.items():
+                key = normalize_value(value) if field != "experience" else value
+                if not key:
+                    continue
+                bitmap = bitmaps[field].get(key)
+                if bitmap is None:
+                    bitmap = bitmaps[field][key] = np.zeros(size, dtype=bool)
+                bitmap[position] = True
+
+            low, high = vacancy_salary_rub(vacancy)
+            if low is not None:
+                salary_min[position] = low
+            if high is not None:
+                salary_max[position] = high
+
+        return cls(size, bitmaps, salary_min, salary_max)
+
+    def values(self, field: str) -> List[str]:
+        """Известные значения фасета"""
+        return sorted(self.bitmaps.get(field, {}))
+
+    def _value_mask(self, field: str, value: str, aliases: Dict[str, str]) -> np.ndarray:
+        wanted = normalize_value(value)
+        wanted = aliases.get(wanted, wanted)
+        exact = self.bitmaps[field].get(wanted)
+        if exact is not None:
+            return exact.copy()
+        mask = np.zeros(self.size, dtype=bool)
+        if len(wanted) < MIN_PREFIX_LENGTH:
+            return mask
+        # "иваново" -> "иваново (ивановская область)", "москва и область" -> "москва"
+        for key, bitmap in self.bitmaps[field].items():
+            if key.startswith(wanted) or (len(key) >= MIN_PREFIX_LENGTH and wanted.startswith(key)):
+                mask |= bitmap
+        return mask
+
+    def experience_mask(self, experience_level: str) -> Optional[np.ndarray]:
+        """Маска вакансий, подходящих по опыту (None — без ограничения)"""
+        buckets = EXPERIENCE_LEVELS.get(normalize_value(experience_level))
+        if not buckets:
+            return None
+        mask = np.zeros(self.size, dtype=bool)
+        for bucket in buckets:
+            bitmap = self.bitmaps["experience"].get(bucket)
+            if bitmap is not None:
+                mask |= bitmap
+        # Вакансии без указанного опыта не отбрасываем
+        return mask | ~self._experience_known
+
+    def salary_mask(self, min_salary: float) -> np.ndarray:
+        """Маска вакансий, где зарплата может быть не ниже min_salary (RUB)"""
+        start = np.searchsorted(self._salary_sorted_values, min_salary, side="left")
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self._salary_sorted_positions[start:]] = True
+        return mask
+
+    def filter(self, location: Optional[str] = None, schedule: Optional[str] = None,
+               employment: Optional[str] = None, experience_level: Optional[str] = None,
+               min_salary: Optional[float] = None) -> Optional[np.ndarray]:
+        """Пересекает маски всех заданных фильтров. Возвращает None, если фильтров нет"""
+        masks = []
+        if location:
+            masks.append(self._value_mask("location", location, CITY_ALIASES))
+        if schedule:
+            masks.append(self._value_mask("schedule", schedule, SCHEDULE_ALIASES))
+        if employment:
+            masks.append(self._value_mask("employment", employment, EMPLOYMENT_ALIASES))
+        if experience_level:
+            experience = self.experience_mask(experience_level)
+            if experience is not None:
+                masks.append(experience)
+        if min_salary:
+            masks.append(self.salary_mask(min_salary))
+        if not masks:
+            return None
+        result = masks[0].copy()
+        for mask in masks[1:]:
+            result &= mask
+        return result
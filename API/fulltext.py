@@ -0,0 +1,181 @@
+"""Полнотекстовый индекс BM25 по названию, компании, навыкам и описанию вакансий.
+
+Индекс строится один раз при загрузке корпуса. Вклад каждого документа в
+оценку терма (impact) считается заранее, поэтому поиск сводится к сложению
+нескольких массивов постингов и выбору top-k.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import snowballstemmer
+
+
+# Параметры BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Веса полей вакансии (упрощенный BM25F: взвешенная частота терма)
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "company": 2.0,
+    "skills": 2.0,
+    "description": 1.0,
+}
+
+# Разговорные формы, которые стеммер не сводит к словам из описаний вакансий
+QUERY_SYNONYMS = {
+    "удаленка": ["удаленная", "удаленно", "remote"],
+    "удалёнка": ["удаленная", "удаленно", "remote"],
+    "геймдев": ["gamedev", "игровой", "игр", "игры"],
+    "gamedev": ["геймдев", "игровой", "игр"],
+    "финтех": ["fintech", "банк", "финансовый", "платежный"],
+    "fintech": ["финтех", "банк", "финансовый"],
+    "ии": ["ai", "ml", "нейросети"],
+    "фронтенд": ["frontend"],
+    "бэкенд": ["backend"],
+}
+
+_TOKEN_RE = re.compile(r'[a-zа-яё0-9][a-zа-яё0-9+#]*')
+_STOP_WORDS = frozenset(
+    "и в во на с со по для от до из к ко о об а но или не что как мы вы вас нас наш ваш "
+    "это а the and of to in for with on at is are we you".split()
+)
+_RU_STEMMER = snowballstemmer.stemmer("russian")
+_EN_STEMMER = snowballstemmer.stemmer("english")
+
+
+@lru_cache(maxsize=200_000)
+def stem(word: str) -> str:
+    """Возвращает основу слова (русский или английский стеммер Snowball)"""
+    if word.isascii():
+        return _EN_STEMMER.stemWord(word)
+    return _RU_STEMMER.stemWord(word.replace("ё", "е"))
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбивает текст на основы слов без стоп-слов"""
+    return [stem(token) for token in _TOKEN_RE.findall(text.lower()) if token not in _STOP_WORDS]
+
+
+def expand_query(query: str) -> List[str]:
+    """Токенизирует запрос пользователя с учетом разговорных синонимов"""
+    terms = []
+    for token in _TOKEN_RE.findall(query.lower()):
+        if token in _STOP_WORDS:
+            continue
+        terms.append(stem(token))
+        for synonym in QUERY_SYNONYMS.get(token, []):
+            terms.append(stem(synonym))
+    return list(dict.fromkeys(terms))
+
+
+class BM25Index:
+    """Инвертированный индекс BM25 с заранее посчитанными вкладами постингов"""
+
+    def __init__(self, postings: Dict[str, Tuple[np.ndarray, np.ndarray]], doc_count: int):
+        self.postings = postings
+        self.doc_count = doc_count
+
+    def __len__(self) -> int:
+        return self.doc_count
+
+    @classmethod
+    def build(cls, documents: Iterable[Dict[str, str]], field_weights: Dict[str, float] = None) -> "BM25Index":
+        """Строит индекс по документам вида {поле: текст}"""
+        field_weights = field_weights or FIELD_WEIGHTS
+        term_freqs: List[Dict[str, float]] = []
+        lengths = []
+        for document in documents:
+            freqs: Dict[str, float] = {}
+            length = 0.0
+            for field, weight in field_weights.items():
+                for term in tokenize(document.get(field) or ""):
+                    freqs[term] = freqs.get(term, 0.0) + weight
+                    length += weight
+            term_freqs.append(freqs)
+            lengths.append(length)
+
+        doc_count = len(term_freqs)
+        avg_length = (sum(lengths) / doc_count) if doc_count else 1.0
+        raw_postings: Dict[str, Tuple[List[int], List[float]]] = {}
+        for doc_id, freqs in enumerate(term_freqs):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / (avg_length or 1.0))
+            for term, tf in freqs.items():
+                docs, impacts = raw_postings.setdefault(term, ([], []))
+                docs.append(doc_id)
+                impacts.append(tf * (BM25_K1 + 1) / (tf + norm))
+
+        postings = {}
+        for term, (docs, impacts) in raw_postings.items():
+            df = len(docs)
+            idf = np.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            postings[term] = (np.asarray(docs, dtype=np.int32), np.asarray(impacts, dtype=np.float32) * idf)
+        return cls(postings, doc_count)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Оценки BM25 запроса для всех документов (нули для несовпавших)"""
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for term in expand_query(query):
+            posting = self.postings.get(term)
+            if posting is not None:
+                docs, impacts = posting
+                scores[docs] += impacts
+        return scores
+
+    def search(self, query: str, k: int = 10, candidates: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """Возвращает k лучших документов как список (позиция, оценка BM25)"""
+        scores = self.scores(query)
+        if candidates is not None:
+            positions = np.fromiter(candidates, dtype=np.int64)
+            scores = scores[positions]
+        else:
+            positions = np.arange(self.doc_count)
+        matched = np.flatnonzero(scores > 0)
+        if matched.shape[0] == 0:
+            return []
+        k = min(k, matched.shape[0])
+        top = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(positions[i]), float(scores[i])) for i in top]
+
+
+def vacancy_document(vacancy: Dict) -> Dict[str, str]:
+    """Поля вакансии для полнотекстового индекса"""
+    skills = vacancy.get("skills") or vacancy.get("required_skills") or []
+    return {
+        "name": vacancy.get("name") or vacancy.get("title") or "",
+        "company": vacancy.get("company") or vacancy.get("employer") or "",
+        "skills": " ".join(skills),
+        "description": " ".join(filter(None, [vacancy.get("description"), vacancy.get("schedule")])),
+    }
+
+
+def build_vacancy_index(vacancies: List[Dict]) -> BM25Index:
+    """Строит BM25-индекс по корпусу вакансий"""
+    return BM25Index.build(vacancy_document(v) for v in vacancies)
+
+
+if __name__ == "__main__":
+    # Замер построения индекса и времени поиска на текущем корпусе
+    import sys
+    import time
+    from corpus import get_vacancy_corpus
+
+    corpus = get_vacancy_corpus()
+    start = time.perf_counter()
+    index = build_vacancy_index(corpus.vacancies)
+    print(f"Индекс построен: {len(index)} документов, {len(index.postings)} термов, "
+          f"{time.perf_counter() - start:.2f} с")
+
+    queries = sys.argv[1:] or ["финтех", "геймдев", "удалёнка python", "банк аналитик sql"]
+    for query in queries:
+        start = time.perf_counter()
+        for _ in range(1000):
+            results = index.search(query, k=5)
+        elapsed_us = (time.perf_counter() - start) * 1000
+        print(f"\n'{query}': {elapsed_us:.0f} мкс на запрос")
+        for position, score in results:
+            vacancy = corpus.vacancies[position]
+            print(f"  {score:.2f}  {vacancy.get('name')} — {vacancy.get('company')}")
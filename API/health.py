@@ -0,0 +1,105 @@
+"""Состояние экземпляра API для проб и автомасштабирования.
+
+Счетчики выполняющихся запросов и вызовов агента, память процесса и
+оценка размера сессий. /health (жив ли процесс), /ready (готов ли
+принимать трафик) и /stats (подробности) в api.py собираются из этих
+значений, а основные из них экспортируются в /metrics.
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from metrics import gauge
+
+
+STARTED_AT = time.time()
+# Сколько сессий берется для оценки их среднего размера
+SESSION_SAMPLE_SIZE = 50
+
+
+class InFlight:
+    """Число выполняющихся операций и максимум с момента запуска"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.current = 0
+        self.peak = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self.current += 1
+            self.total += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.current -= 1
+
+    def stats(self) -> Dict:
+        return {"current": self.current, "peak": self.peak, "total": self.total}
+
+
+# Запросы /career_query целиком и вызовы агента внутри них
+requests_in_flight = InFlight("requests")
+agent_in_flight = InFlight("agent")
+
+
+def process_memory() -> Dict:
+    """Резидентная память процесса (текущая и пиковая) в мегабайтах"""
+    result = {}
+    try:
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        result["rss_mb"] = round(rss_pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # ru_maxrss в килобайтах (Linux)
+        result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    return result
+
+
+def session_stats(sessions: Dict) -> Dict:
+    """Число сессий, сообщений в истории и оценка занимаемой памяти по выборке"""
+    values = list(sessions.values())
+    if not values:
+        return {"count": 0, "history_messages": 0, "approx_bytes": 0}
+    sample = random.sample(values, min(len(values), SESSION_SAMPLE_SIZE))
+    sample_bytes = sum(len(json.dumps(session, ensure_ascii=False, default=str).encode("utf-8"))
+                       for session in sample)
+    return {
+        "count": len(values),
+        "history_messages": sum(len(session.get("conversation_history") or ()) for session in values),
+        "approx_bytes": int(sample_bytes / len(sample) * len(values)),
+    }
+
+
+def uptime() -> float:
+    return time.time() - STARTED_AT
+
+
+def register_gauges(sessions: Dict, pool_stats, token_age):
+    """Экспорт насыщения в /metrics: запросы, пул соединений, сессии, токен, память"""
+    gauge("career_requests_in_flight", "Выполняющиеся запросы /career_query",
+          lambda: requests_in_flight.current)
+    gauge("career_agent_calls_in_flight", "Выполняющиеся вызовы агента", lambda: agent_in_flight.current)
+    gauge("career_db_pool_used_connections", "Выданные соединения пула",
+          lambda: pool_stats().get("used", 0))
+    gauge("career_db_pool_max_connections", "Размер пула соединений", lambda: pool_stats()["max"])
+    gauge("career_sessions", "Сессии пользователей в памяти", lambda: len(sessions))
+    # Пока возраст токена неизвестен (None), метрика не выводится
+    gauge("career_gigachat_token_age_seconds", "Возраст токена GigaChat", token_age)
+    gauge("career_process_resident_memory_mb", "Резидентная память процесса",
+          lambda: process_memory()["rss_mb"])
+
@@ -0,0 +1,68 @@
+"""Отчет о времени импорта модуля.
+
+Запускает `python -X importtime -c "import <module>"` в отдельном процессе
+(модули не должны быть уже загружены) и печатает самые дорогие модули и
+пакеты верхнего уровня по суммарному времени импорта.
+
+    python importtime_report.py               # import api
+    python importtime_report.py main --top 30
+"""
+import argparse
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure_imports(module: str = "api") -> List[Dict]:
+    """Строки отчета -X importtime: модуль, собственное и суммарное время (мкс), глубина"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", f"import {module}"],
+        cwd=Path(__file__).parent, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} завершился ошибкой:\n{completed.stderr[-2000:]}")
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            entries.append({
+                "module": match.group(4),
+                "self_us": int(match.group(1)),
+                "cumulative_us": int(match.group(2)),
+                "depth": len(match.group(3)) // 2,
+            })
+    return entries
+
+
+def by_package(entries: List[Dict]) -> Dict[str, int]:
+    """Собственное время импорта, сложенное по пакетам верхнего уровня"""
+    totals: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        totals[entry["module"].split(".")[0]] += entry["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def print_report(module: str, entries: List[Dict], top: int = 20):
+    total = next((e["cumulative_us"] for e in entries if e["module"] == module and e["depth"] == 0), 0)
+    print(f"import {module}: {total / 1e6:.3f} с, модулей: {len(entries)}\n")
+
+    print("Пакеты (собственное время):")
+    for package, micros in list(by_package(entries).items())[:top]:
+        print(f"  {micros / 1e3:9.1f} мс  {package}")
+
+    print("\nМодули (суммарное время):")
+    for entry in sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top]:
+        print(f"  {entry['cumulative_us'] / 1e3:9.1f} мс  {'  ' * entry['depth']}{entry['module']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Время импорта модуля по данным -X importtime")
+    parser.add_argument("module", nargs="?", default="api")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+    print_report(args.module, measure_imports(args.module), args.top)
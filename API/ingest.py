@@ -0,0 +1,115 @@
+"""Нормализация навыков вакансий при загрузке корпуса.
+
+Сырые навыки вакансий ("Golang", "PostgreSQL", "VueJS") один раз приводятся
+к каноническим через таксономию и получают целочисленные идентификаторы.
+Для каждой вакансии хранится frozenset идентификаторов, поэтому сравнение
+с навыками пользователя на запросе — пересечение множеств целых чисел.
+Навыки, которых нет в таксономии, собираются для ее пополнения.
+"""
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+from skill_taxonomy import is_known_skill, normalize_skill
+
+
+UNMATCHED_REPORT_PATH = Path(__file__).parent / 'jsons' / 'unmatched_skills.json'
+
+
+def raw_vacancy_skills(vacancy: Dict) -> List[str]:
+    """Сырые навыки вакансии (поле называется по-разному в разных источниках)"""
+    return vacancy.get("skills") or vacancy.get("key_skills") or vacancy.get("required_skills") or []
+
+
+def normalize_vacancy_skills(raw_skills: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """Возвращает (канонические навыки без повторов, навыки вне таксономии)"""
+    normalized = []
+    unmatched = []
+    for raw_skill in raw_skills:
+        if not raw_skill or not raw_skill.strip():
+            continue
+        canonical = normalize_skill(raw_skill)
+        if canonical not in normalized:
+            normalized.append(canonical)
+        if not is_known_skill(raw_skill):
+            unmatched.append(raw_skill.strip())
+    return normalized, unmatched
+
+
+class SkillVocabulary:
+    """Соответствие канонических навыков и целочисленных идентификаторов"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, skill: str) -> int:
+        skill_id = self.ids.get(skill)
+        if skill_id is None:
+            skill_id = self.ids[skill] = len(self.names)
+            self.names.append(skill)
+        return skill_id
+
+    def lookup(self, skills: Iterable[str]) -> FrozenSet[int]:
+        """Идентификаторы навыков пользователя (неизвестные корпусу навыки пропускаются)"""
+        ids = (self.ids.get(normalize_skill(skill)) for skill in skills if skill)
+        return frozenset(skill_id for skill_id in ids if skill_id is not None)
+
+
+class VacancySkills:
+    """Результат нормализации навыков корпуса вакансий"""
+
+    def __init__(self, vocabulary: SkillVocabulary, skill_sets: List[FrozenSet[int]], unmatched: Counter):
+        self.vocabulary = vocabulary
+        self.skill_sets = skill_sets
+        self.unmatched = unmatched
+
+    def overlap(self, user_ids: FrozenSet[int], position: int) -> float:
+        """Доля навыков вакансии, которыми владеет пользователь"""
+        vacancy_ids = self.skill_sets[position]
+        if not user_ids or not vacancy_ids:
+            return 0.0
+        return len(user_ids & vacancy_ids) / len(vacancy_ids)
+
+    def write_unmatched_report(self, path: Path = UNMATCHED_REPORT_PATH):
+        """Сохраняет навыки вне таксономии по убыванию частоты для ревью"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.unmatched.most_common()), f, ensure_ascii=False, indent=2)
+
+
+def ingest_vacancy_skills(vacancies: List[Dict]) -> VacancySkills:
+    """Нормализует навыки всех вакансий корпуса.
+
+    Если сборщик уже записал поле normalized_skills, повторная нормализация
+    не выполняется.
+    """
+    vocabulary = SkillVocabulary()
+    skill_sets = []
+    unmatched: Counter = Counter()
+    for vacancy in vacancies:
+        normalized = vacancy.get("normalized_skills")
+        if normalized is None:
+            normalized, vacancy_unmatched = normalize_vacancy_skills(raw_vacancy_skills(vacancy))
+        else:
+            vacancy_unmatched = vacancy.get("unmatched_skills") or []
+        unmatched.update(vacancy_unmatched)
+        skill_sets.append(frozenset(vocabulary.add(skill) for skill in normalized))
+    return VacancySkills(vocabulary, skill_sets, unmatched)
+
+
+if __name__ == "__main__":
+    # Отчет о навыках вакансий, которых нет в таксономии
+    from corpus import get_vacancy_corpus
+
+    corpus = get_vacancy_corpus()
+    skills = corpus.skills
+    skills.write_unmatched_report()
+    with_skills = sum(1 for skill_set in skills.skill_sets if skill_set)
+    print(f"Вакансий: {len(corpus)}, с навыками: {with_skills}, канонических навыков: {len(skills.vocabulary)}")
+    print(f"Навыков вне таксономии: {len(skills.unmatched)} -> {UNMATCHED_REPORT_PATH}")
+    for skill, count in skills.unmatched.most_common(15):
+        print(f"  {skill}: {count}")
@@ -2,17 +2,25 @@ import sys
 
 sys.path.append('..')
 
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_gigachat.chat_models import GigaChat
-from langchain.schema.messages import HumanMessage
-from tools import find_matching_vacancies, create_learning_plan, provide_career_advice 
+from langchain_core.messages import AIMessage, HumanMessage
+from tools import find_matching_vacancies, create_learning_plan, provide_career_advice, get_market_overview
 from typing import Dict, Optional, List
 import json
+from prompt_builder import build_prompt
+from response_cache import RESPONSE_CACHE_ENABLED, is_cacheable, personalize, response_cache, shared_profile
+from tracing import TracingCallbackHandler, span, traced
+from health import agent_in_flight
+from resilience import (GIGACHAT_CALL_TIMEOUT, ModelGuard, UpstreamUnavailable, breaker, current_deadline,
+                        fallback_answer)
+from logging_setup import setup_logging
 
 from dotenv import find_dotenv, load_dotenv
 import os
+import logging
 import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 # Загрузка переменных окружения
 load_dotenv(find_dotenv())
@@ -40,25 +48,40 @@ system_prompt = (
     "3. Возвращай результат поиска вакансий как есть, без дополнительного форматирования "
     "4. Не удаляй ссылки (🔗) из результатов поиска вакансий "
     "5. Не преобразуй текст в Markdown формат "
-    "user_skills и experience_level из профиля пользователя. Используй список known_technologies "
-    "как user_skills и поле experience как experience_level. "
+    "6. Если пользователь называет сферу, компанию или условия работы (например, финтех, геймдев, удалёнка), "
+    "передай их текстом в параметр query "
+    "7. Если пользователь указывает город, график, тип занятости или желаемую зарплату, "
+    "передай их в параметры location, schedule, employment и min_salary "
+    "8. Если пользователь просит показать ещё вакансии, вызови инструмент с теми же параметрами "
+    "и offset, равным числу уже показанных вакансий "
+    "user_skills и experience_level из профиля пользователя. Используй навыки из профиля "
+    "как user_skills и опыт как experience_level. "
+    "Если пользователь спрашивает, что сейчас востребовано на рынке, какие навыки нужны или сколько платят, "
+    "используй инструмент get_market_overview и передай target_position и location, если они известны. "
     "Если ты уверен, что дал полный ответ пользователю, ответь напрямую и не вызывай инструменты повторно. "
     "Никогда не вызывай один и тот же инструмент более одного раза в рамках одной задачи."
 )
 
-TOOLS = [find_matching_vacancies, create_learning_plan, provide_career_advice]
+TOOLS = [find_matching_vacancies, create_learning_plan, provide_career_advice, get_market_overview]
 
 
 def _init_agent(token: str):
     """Создает и возвращает нового агента с предоставленным токеном"""
     # Устанавливаем переменную окружения для GigaChat
     os.environ["GIGACHAT_CREDENTIALS"] = token
+    # langgraph и langchain_gigachat импортируются здесь: это самая долгая часть импорта
+    # модуля, а агент создается только на прогреве или при первом запросе
+    from langgraph.prebuilt import create_react_agent
+    from langchain_gigachat.chat_models import GigaChat
+
     # Инициализируем модель и агента
-    model = GigaChat(model="GigaChat-2", verify_ssl_certs=False)
-    agent = create_react_agent(model, tools=TOOLS, checkpointer=MemorySaver(), prompt=system_prompt)
+    # Таймаут клиента ограничивает каждый вызов модели; дедлайн запроса проверяет ModelGuard
+    model = GigaChat(model="GigaChat-2", verify_ssl_certs=False, timeout=GIGACHAT_CALL_TIMEOUT)
+    agent = create_react_agent(model, tools=TOOLS, prompt=system_prompt)
     return agent
 
 
+@traced("get_agent")
 def _get_agent(headers: Optional[Dict] = None):
     """Возвращает кэшированного агента; инициализирует если отсутствует или токен изменился"""
     global _AGENT, _AGENT_TOKEN
@@ -85,39 +108,77 @@ def _get_agent(headers: Optional[Dict] = None):
     return _AGENT
 
 
-def run_agent(question: str, user_profile: Optional[Dict] = None, headers: Optional[Dict] = None) -> str:
-    """Запускает агента с вопросом и опциональными данными профиля пользователя"""
-    agent = _get_agent(headers)
+@traced()
+def run_agent(question: str, user_profile: Optional[Dict] = None, headers: Optional[Dict] = None,
+              history: Optional[List[Dict]] = None, usage: Optional[Dict] = None) -> str:
+    """Запускает агента с вопросом, профилем пользователя и историей диалога.
+
+    Профиль и история собираются в запрос один раз и в пределах бюджета
+    токенов (prompt_builder). История передается явно, поэтому состояние
+    агента между вызовами не хранится. Если передан словарь usage, в него
+    записывается число токенов запроса по частям.
+
+    Кэшируемый вопрос задается модели с общей частью профиля и без истории
+    (ответ подходит всем пользователям с той же подписью профиля), а
+    обращение по имени добавляется к ответу после кэша.
+    """
+    # Готовый ответ для того же вопроса и похожего профиля
+    use_cache = RESPONSE_CACHE_ENABLED and is_cacheable(question, history)
+    if use_cache:
+        with span("response_cache.get") as lookup:
+            cached = response_cache.get(question, user_profile)
+            lookup.set_attribute("hit", cached is not None)
+        if cached is not None:
+            answer, kind = cached
+            logger.info("Кэш ответов: попадание (%s), статистика: %s", kind, response_cache.stats())
+            if usage is not None:
+                usage.update(total=0, cached=kind)
+            return personalize(answer, user_profile)
+
+    # Предохранитель открыт — модель не вызывается, ответ сразу собирается из инструментов
+    if breaker.rejecting():
+        return fallback_answer(question, user_profile, "circuit_open")
 
-    # Если предоставлены данные профиля пользователя, добавляем их к вопросу
-    if user_profile is not None:
-        try:
-            # Создаем удобочитаемый блок из словаря
-            pairs = [f"{k}: {v}" for k, v in user_profile.items()]
-            profile_block = "\n".join(pairs)
-            full_question = f"{question}\n\nПрофиль пользователя:\n{profile_block}"
-        except Exception:
-            # Резервный вариант - сырая JSON строка
-            full_question = f"{question}\n\nПрофиль пользователя:\n{json.dumps(user_profile, ensure_ascii=False)}"
-        messages = [HumanMessage(content=full_question)]
-    else:
-        messages = [HumanMessage(content=question)]
+    agent = _get_agent(headers)
 
-    config = {"configurable": {"thread_id": 1}}
+    with span("build_prompt") as build:
+        if use_cache:
+            plan = build_prompt(question, shared_profile(user_profile), None, system_prompt)
+        else:
+            plan = build_prompt(question, user_profile, history, system_prompt)
+        build.set_attribute("prompt_tokens", plan.total_tokens)
+    messages = [HumanMessage(content=text) if role == "human" else AIMessage(content=text)
+                for role, text in plan.messages]
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Запрос к модели: %s", plan.report())
+    if usage is not None:
+        usage.update(plan.tokens, total=plan.total_tokens, dropped_turns=plan.dropped_turns)
 
     # Отладочный вывод сообщений если запрошено через env
     if os.getenv("DEBUG_AGENT_PAYLOAD"):
-        print("DEBUG: исходящие сообщения:")
-        for m in messages:
-            print("---")
-            print(m.content)
+        logger.info("Исходящие сообщения:\n%s", "\n---\n".join(str(m.content) for m in messages))
 
     try:
-        resp = agent.invoke({"messages": messages}, config=config, recursion_limit=10)
+        started = time.perf_counter()
+        # Узлы графа, вызовы GigaChat и инструменты попадают в трассу через колбэки;
+        # ModelGuard стоит первым: он может отклонить вызов модели до начала спана
+        callbacks = [ModelGuard(current_deadline()), TracingCallbackHandler()]
+        with agent_in_flight.track():
+            resp = agent.invoke({"messages": messages}, config={"recursion_limit": 10, "callbacks": callbacks})
         answer = resp["messages"][-1].content
+        if use_cache:
+            response_cache.put(question, user_profile, answer, time.perf_counter() - started)
+            return personalize(answer, user_profile)
         return answer
+    except UpstreamUnavailable as e:
+        logger.warning("Вызов GigaChat отклонен (%s): %s", e.reason, e)
+        return fallback_answer(question, user_profile, e.reason)
     except Exception as e:
-        return f"Произошла ошибка при обработке запроса: {str(e)}"
+        logger.warning("Ошибка агента, ответ без модели: %s", e)
+        try:
+            return fallback_answer(question, user_profile, "error")
+        except Exception:
+            return f"Произошла ошибка при обработке запроса: {str(e)}"
 
 
 def run_career_navigator_interactive():
@@ -130,6 +191,7 @@ def run_career_navigator_interactive():
     print("=" * 50)
 
     user_profile = {}
+    history = []
 
     while True:
         try:
@@ -141,6 +203,7 @@ def run_career_navigator_interactive():
 
             if user_input.lower() in ['сброс', 'reset']:
                 user_profile = {}
+                history = []
                 print("🔄 Начинаем новый диалог!")
                 continue
 
@@ -152,7 +215,8 @@ def run_career_navigator_interactive():
             if not user_profile and len(user_input) > 20:
                 user_profile["initial_description"] = user_input
 
-            response = run_agent(user_input, user_profile)
+            response = run_agent(user_input, user_profile, history=history)
+            history.append({"query": user_input, "response": response})
             print(f"\n🤖 Навигатор: {response}")
 
         except KeyboardInterrupt:
@@ -199,15 +263,18 @@ def process_career_query(user_id: str, query: str, session_data: Optional[Dict]
             from tools import extract_experience
             profile['experience'] = extract_experience(query)
 
-    # Добавляем контекст из профиля в запрос
-    enhanced_query = query
-    if session_data.get("profile"):
-        profile_context = f"Контекст пользователя: {json.dumps(session_data['profile'], ensure_ascii=False)}"
-        enhanced_query = f"{query}\n\n{profile_context}"
+        # Целевая должность распознается один раз на пользователя (повторно — только при ее изменении)
+        if profile.get('target_position'):
+            from roles import resolve_user_role
+            role = resolve_user_role(user_id, profile['target_position'])
+            if role:
+                profile['target_role'] = role
 
     try:
-        # Передаём расширенный запрос и профиль
-        response = run_agent(enhanced_query, session_data.get("profile"), headers)
+        # Профиль и история добавляются к запросу один раз, в пределах бюджета токенов
+        usage = {}
+        response = run_agent(query, session_data.get("profile"), headers,
+                             history=session_data.get("conversation_history"), usage=usage)
 
         # Обновляем историю общения
         session_data.setdefault("conversation_history", []).append({
@@ -224,7 +291,8 @@ def process_career_query(user_id: str, query: str, session_data: Optional[Dict]
             "success": True,
             "response": response,
             "session_data": session_data,
-            "suggested_actions": extract_suggested_actions(response)
+            "suggested_actions": extract_suggested_actions(response),
+            "prompt_tokens": usage
         }
 
     except Exception as e:
@@ -256,4 +324,5 @@ __all__ = ["run_agent", "run_career_navigator_interactive", "process_career_quer
 
 if __name__ == "__main__":
     # Запуск интерактивного режима если файл запущен напрямую
-    run_career_navigator_interactive()
\ No newline at end of file
+    setup_logging()
+    run_career_navigator_interactive()
\ No newline at end of file
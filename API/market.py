@@ -0,0 +1,229 @@
+"""Рыночная статистика по корпусу вакансий.
+
+Агрегаты материализуются один раз на версию корпуса: счетчики навыков по
+ролям и городам, зарплаты по навыкам и по ролям/городам (с перцентилями)
+и спрос по неделям публикации. Запросы читают готовые счетчики и не проходят по
+корпусу. При обновлении корпуса, если старые вакансии в нем остались,
+досчитываются только новые вакансии.
+
+Вакансии относятся к роли по той же группировке, что и требования ролей
+(role_skills.cluster_key: только точное совпадение с названием роли или
+синонимом), а слова из названий ролей ("backend") не считаются навыками.
+"""
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from facets import CITY_ALIASES, MIN_PREFIX_LENGTH, normalize_value
+from role_skills import cluster_key, is_role_word, vacancy_key
+from salary import vacancy_salary_rub
+
+
+# Перцентили зарплат и минимум значений, при котором они считаются
+SALARY_PERCENTILES = (25, 50, 75)
+MIN_SALARY_SAMPLES = 3
+TOP_SKILLS = 10
+
+
+def normalize_city(location: Optional[str]) -> str:
+    city = normalize_value(location)
+    return CITY_ALIASES.get(city, city)
+
+
+def publication_week(published_at: Optional[str]) -> Optional[str]:
+    """Неделя публикации в формате ISO ("2025-W43")"""
+    if not published_at:
+        return None
+    try:
+        year, week, _ = datetime.fromisoformat(published_at[:19]).isocalendar()
+    except ValueError:
+        return None
+    return f"{year}-W{week:02d}"
+
+
+def _salary_midpoint(vacancy: Dict) -> Optional[float]:
+    low, high = vacancy_salary_rub(vacancy)
+    if low and high:
+        return (low + high) / 2
+    return low or high or None
+
+
+class MarketStats:
+    """Материализованные агрегаты рынка вакансий"""
+
+    def __init__(self):
+        self.corpus_version = ""
+        self.vacancy_ids = set()
+        # Ключ среза: (роль или None, город или None)
+        self.sizes: Counter = Counter()
+        self.skills: Dict[Tuple, Counter] = {}
+        self.weeks: Dict[Tuple, Counter] = {}
+        self.skill_weeks: Dict[str, Counter] = {}
+        # Зарплаты: ("skill", навык) / ("slice", роль, город) -> список сумм в рублях
+        self.salaries: Dict[Tuple, List[float]] = {}
+        self.percentiles: Dict[Tuple, Dict] = {}
+        self.cities: Dict[str, str] = {}
+
+    def copy(self) -> "MarketStats":
+        stats = MarketStats()
+        stats.corpus_version = self.corpus_version
+        stats.vacancy_ids = set(self.vacancy_ids)
+        stats.sizes = Counter(self.sizes)
+        stats.skills = {key: Counter(counter) for key, counter in self.skills.items()}
+        stats.weeks = {key: Counter(counter) for key, counter in self.weeks.items()}
+        stats.skill_weeks = {key: Counter(counter) for key, counter in self.skill_weeks.items()}
+        stats.salaries = {key: list(values) for key, values in self.salaries.items()}
+        stats.percentiles = dict(self.percentiles)
+        stats.cities = dict(self.cities)
+        return stats
+
+    def update(self, corpus) -> int:
+        """Добавляет в агрегаты вакансии корпуса, которых в них еще нет"""
+        names = corpus.skills.vocabulary.names
+        role_words = {skill_id for skill_id, name in enumerate(names) if is_role_word(name)}
+        touched = set()
+        added = 0
+        for position, vacancy in enumerate(corpus.vacancies):
+            key = vacancy_key(vacancy, position)
+            if key in self.vacancy_ids:
+                continue
+            self.vacancy_ids.add(key)
+            added += 1
+
+            role = cluster_key(vacancy.get("name"))
+            city = normalize_city(vacancy.get("location"))
+            if city:
+                self.cities.setdefault(city, vacancy.get("location").strip())
+            skills = [names[skill_id] for skill_id in corpus.skills.skill_sets[position] if skill_id not in role_words]
+            week = publication_week(vacancy.get("published_at"))
+
+            slice_keys = {(None, None), (role, None), (None, city or None), (role, city or None)}
+            for slice_key in slice_keys:
+                self.sizes[slice_key] += 1
+                self.skills.setdefault(slice_key, Counter()).update(skills)
+                if week:
+                    self.weeks.setdefault(slice_key, Counter())[week] += 1
+            if week:
+                for skill in skills:
+                    self.skill_weeks.setdefault(skill, Counter())[week] += 1
+
+            amount = _salary_midpoint(vacancy)
+            if amount:
+                salary_keys = [("slice",) + slice_key for slice_key in slice_keys]
+                for salary_key in salary_keys + [("skill", skill) for skill in skills]:
+                    self.salaries.setdefault(salary_key, []).append(amount)
+                    touched.add(salary_key)
+
+        # Перцентили пересчитываются только для срезов, куда попали новые зарплаты
+        for salary_key in touched:
+            values = np.asarray(self.salaries[salary_key], dtype=np.float64)
+            if len(values) < MIN_SALARY_SAMPLES:
+                self.percentiles.pop(salary_key, None)
+                continue
+            points = np.percentile(values, SALARY_PERCENTILES)
+            self.percentiles[salary_key] = {
+                "count": int(len(values)),
+                **{f"p{p}": int(round(v)) for p, v in zip(SALARY_PERCENTILES, points.tolist())},
+            }
+        self.corpus_version = corpus.version
+        return added
+
+    def resolve_city(self, city: Optional[str]) -> Optional[str]:
+        """Город из запроса -> ключ среза (по префиксу, как в фильтрах поиска)"""
+        if not city:
+            return None
+        city = normalize_city(city)
+        if city in self.cities or len(city) < MIN_PREFIX_LENGTH:
+            return city
+        for known in sorted(self.cities):
+            if known.startswith(city):
+                return known
+        return city
+
+    def top_skills(self, role: Optional[str] = None, city: Optional[str] = None,
+                   top: int = TOP_SKILLS) -> List[Dict]:
+        """Самые востребованные навыки среза с долей вакансий"""
+        slice_key = (role, self.resolve_city(city))
+        size = self.sizes.get(slice_key, 0)
+        counter = self.skills.get(slice_key)
+        if not size or not counter:
+            return []
+        return [{"skill": skill, "vacancies": count, "share": round(count / size, 3)}
+                for skill, count in sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:top]]
+
+    def salary(self, skill: Optional[str] = None, role: Optional[str] = None,
+               city: Optional[str] = None) -> Optional[Dict]:
+        """Перцентили зарплаты (в рублях) по навыку или по срезу роль/город"""
+        if skill:
+            return self.percentiles.get(("skill", skill))
+        return self.percentiles.get(("slice", role, self.resolve_city(city)))
+
+    def trend(self, role: Optional[str] = None, city: Optional[str] = None,
+              skill: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Число вакансий по неделям публикации"""
+        if skill:
+            counter = self.skill_weeks.get(skill, Counter())
+        else:
+            counter = self.weeks.get((role, self.resolve_city(city)), Counter())
+        return sorted(counter.items())
+
+    def summary(self, role: Optional[str] = None, city: Optional[str] = None,
+                skills: Iterable[str] = (), top: int = TOP_SKILLS) -> Dict:
+        """Сводка по срезу рынка для API и инструмента агента"""
+        city_key = self.resolve_city(city)
+        top_skills = self.top_skills(role, city, top)
+        skill_names = list(skills) or [row["skill"] for row in top_skills]
+        return {
+            "corpus_version": self.corpus_version,
+            "role": role,
+            "city": self.cities.get(city_key, city_key),
+            "vacancies": self.sizes.get((role, city_key), 0),
+            "top_skills": top_skills,
+            "salary": self.salary(role=role, city=city),
+            "skill_salaries": {skill: self.salary(skill=skill) for skill in skill_names if self.salary(skill=skill)},
+            "trend": self.trend(role, city),
+        }
+
+
+# Последние построенные агрегаты: при обновлении корпуса досчитываются только новые вакансии
+_LAST_STATS: Optional[MarketStats] = None
+_LAST_LOCK = threading.Lock()
+
+
+def build_market_stats(corpus) -> MarketStats:
+    """Агрегаты для версии корпуса (инкрементально от предыдущей версии, если это возможно)"""
+    global _LAST_STATS
+    with _LAST_LOCK:
+        previous = _LAST_STATS
+        if previous is not None and previous.corpus_version == corpus.version:
+            return previous
+        current_ids = {vacancy_key(v, p) for p, v in enumerate(corpus.vacancies)}
+        if previous is not None and previous.vacancy_ids <= current_ids:
+            stats = previous.copy()
+        else:
+            # Часть вакансий ушла из корпуса — пересчитываем с нуля
+            stats = MarketStats()
+        stats.update(corpus)
+        _LAST_STATS = stats
+        return stats
+
+
+if __name__ == "__main__":
+    import time
+    from corpus import get_vacancy_corpus
+
+    corpus = get_vacancy_corpus()
+    corpus.skills
+    start = time.perf_counter()
+    stats = build_market_stats(corpus)
+    print(f"Агрегаты: {len(stats.vacancy_ids)} вакансий, {len(stats.sizes)} срезов, "
+          f"{time.perf_counter() - start:.3f} с")
+    start = time.perf_counter()
+    repeats = 1000
+    for _ in range(repeats):
+        summary = stats.summary(role="frontend-разработчик", city="мск")
+    print(f"Сводка: {(time.perf_counter() - start) / repeats * 1e6:.0f} мкс")
+    print(summary)
@@ -0,0 +1,147 @@
+"""Метрики в формате Prometheus без внешних зависимостей.
+
+Гистограммы и счетчики с метками хранятся в памяти процесса и отдаются
+эндпоинтом /metrics в текстовом формате экспозиции Prometheus.
+"""
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Границы корзин латентности (секунды): от миллисекундных операций до генерации GigaChat
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+_INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Гистограмма с метками (накопительные корзины, сумма и количество)"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, _INF_LABEL)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Counter:
+    """Монотонный счетчик с метками"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """Текущее значение, которое вычисляется при каждом запросе /metrics"""
+
+    def __init__(self, name: str, help_text: str, getter):
+        self.name = name
+        self.help_text = help_text
+        self.getter = getter
+
+    def render(self) -> List[str]:
+        try:
+            value = float(self.getter())
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {value:g}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def get(self, name: str) -> Optional[object]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def histogram(name: str, help_text: str, label_names: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help_text, label_names, buckets))
+
+
+def counter(name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help_text, label_names))
+
+
+def gauge(name: str, help_text: str, getter) -> Gauge:
+    return REGISTRY.register(Gauge(name, help_text, getter))
+
+
+# Латентность этапов обработки запроса (по спанам трассировки)
+STAGE_LATENCY = histogram("career_stage_latency_seconds", "Latency of career query stages", ("stage",))
+STAGE_ERRORS = counter("career_stage_errors_total", "Failed career query stages", ("stage",))
@@ -0,0 +1,389 @@
+"""Движок учебных планов: требования ролей, индекс навык→курсы и упорядочивание курсов.
+
+Основа требований роли — статическая карта. Таблица, построенная по
+корпусу вакансий (role_skills.py), уточняет ее: упорядочивает навыки по
+спросу и добавляет несколько востребованных навыков, которых в карте нет.
+Индекс курсов строится один раз на версию корпуса курсов.
+
+План — взвешенное покрытие недостающих навыков курсами с минимальной
+суммарной длительностью, упорядоченное топологической сортировкой по
+пререквизитам и уровню курсов. Результат детерминирован и кэшируется по
+(роль, набор недостающих навыков).
+"""
+import heapq
+import re
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from corpus import get_vacancy_corpus
+from embeddings import encode_query, is_semantic
+from skill_taxonomy import EXTRA_SKILLS, normalize_skill
+
+
+# Требуемые навыки для целевых позиций (основа, которую уточняют данные вакансий)
+REQUIRED_SKILLS_MAP = {
+    "python-разработчик": ["Python", "Django", "FastAPI", "PostgreSQL", "Docker", "Git", "REST API", "Linux"],
+    "backend-разработчик": ["Python", "FastAPI", "Django", "PostgreSQL", "Redis", "Docker", "REST API", "SQL"],
+    "frontend-разработчик": ["JavaScript", "TypeScript", "React", "Node.js", "CSS", "HTML", "Webpack", "CI/CD"],
+    "qa инженер": ["Python", "Postman", "PostgreSQL", "Functional Testing", "Regression Testing", "Manual Testing",
+                   "Automation Testing", "Bug Tracking Systems"],
+    "data scientist": ["Python", "pandas", "Numpy", "scikit-learn", "PyTorch", "Machine Learning", "Deep Learning",
+                       "Data Analysis", "Statistics"],
+    "devops инженер": ["Linux", "Docker", "Kubernetes", "CI/CD", "Monitoring Tools", "Container Orchestration",
+                       "Infrastructure Automation"],
+    "system administrator": ["Linux", "Shell Scripting", "Networking", "Virtualization", "Security Practices",
+                             "Database Administration"],
+    "mobile-разработчик": ["Swift", "Objective-C", "Kotlin", "Java", "iOS SDK", "Android SDK", "Firebase",
+                           "Xamarin", "Flutter"],
+    "ml-инженер": ["Python", "PyTorch", "TensorFlow", "Machine Learning", "Deep Learning", "Data Processing",
+                   "Model Deployment"],
+    "business analyst": ["SQL", "Excel", "Data Analysis", "Requirements Gathering", "Stakeholder Management",
+                         "Product Documentation"]
+}
+
+# Сколько навыков из вакансий, которых нет в статической карте, добавляется к требованиям роли,
+# и в какой доле вакансий роли такой навык должен встречаться
+MAX_DERIVED_EXTRA_SKILLS = 3
+MIN_EXTRA_SKILL_SHARE = 0.2
+
+# Порядок уровней курсов: начальные курсы идут раньше продвинутых по тому же навыку
+LEVEL_RANKS = {"начальный": 0, "средний": 1, "продвинутый": 2}
+UNKNOWN_LEVEL_RANK = 1
+
+# Порог нечеткого совпадения навыка с навыками курсов и семантической близости курса
+FUZZY_SKILL_THRESHOLD = 0.7
+COURSE_SEMANTIC_THRESHOLD = 0.35
+
+# Перевод единиц длительности курса в часы (неделя и день — по учебной нагрузке)
+DURATION_UNIT_HOURS = (
+    ("мин", 1 / 60),
+    ("час", 1.0),
+    ("ч", 1.0),
+    ("hour", 1.0),
+    ("h", 1.0),
+    ("дн", 2.0),
+    ("day", 2.0),
+    ("нед", 8.0),
+    ("week", 8.0),
+    ("мес", 32.0),
+    ("month", 32.0),
+)
+_DURATION_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*([a-zа-яё]+)')
+# До скольких курсов-кандидатов покрытие ищется точно (перебор с отсечением), дальше — жадно
+EXACT_COVER_MAX_CANDIDATES = 24
+PLAN_CACHE_SIZE = 512
+
+
+def _as_list(value) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    return [item for item in (value or []) if item and item.strip()]
+
+
+def level_rank(level: Optional[str]) -> int:
+    """Ранг уровня курса ("Начальный уровень" -> 0)"""
+    level = (level or "").lower()
+    for prefix, rank in LEVEL_RANKS.items():
+        if level.startswith(prefix):
+            return rank
+    return UNKNOWN_LEVEL_RANK
+
+
+def parse_duration_hours(duration) -> Optional[float]:
+    """Длительность курса в часах ("18 часов", "2 недели", "90 минут"). None, если не указана"""
+    if isinstance(duration, (int, float)):
+        return float(duration) if duration > 0 else None
+    hours = 0.0
+    for amount, unit in _DURATION_RE.findall((duration or "").lower()):
+        for prefix, unit_hours in DURATION_UNIT_HOURS:
+            if unit.startswith(prefix):
+                hours += float(amount.replace(",", ".")) * unit_hours
+                break
+    return hours or None
+
+
+class CourseSkillIndex:
+    """Индекс курсов: какие навыки курс дает, какие требует, и навык -> курсы"""
+
+    def __init__(self, courses: List[Dict], course_embeddings=None):
+        self.courses = courses
+        self.embeddings = course_embeddings
+        self.provides: List[FrozenSet[str]] = []
+        self.requires: List[FrozenSet[str]] = []
+        self.levels: List[int] = []
+        self.hours: List[float] = []
+        self.by_skill: Dict[str, List[int]] = {}
+        self._resolved: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+        for position, course in enumerate(courses):
+            # Курсы-заглушки без названия в план не попадают
+            valid = bool((course.get("title") or "").strip())
+            provides = frozenset(normalize_skill(s) for s in _as_list(course.get("category"))) if valid else frozenset()
+            requires = frozenset(normalize_skill(s) for s in _as_list(course.get("skills"))) - provides
+            self.provides.append(provides)
+            self.requires.append(requires if valid else frozenset())
+            self.levels.append(level_rank(course.get("level")))
+            self.hours.append(parse_duration_hours(course.get("duration")))
+            for skill in sorted(provides):
+                self.by_skill.setdefault(skill, []).append(position)
+
+        # Курсам без длительности назначается медиана известных, чтобы они не считались бесплатными
+        known_hours = sorted(hours for hours in self.hours if hours)
+        self.default_hours = known_hours[len(known_hours) // 2] if known_hours else 1.0
+        self.hours = [hours or self.default_hours for hours in self.hours]
+
+    def courses_for(self, skill: str) -> List[int]:
+        """Курсы, развивающие навык: точное совпадение, затем нечеткое, затем семантическое (только с моделью)"""
+        skill = normalize_skill(skill)
+        positions = self.by_skill.get(skill)
+        if positions is not None:
+            return positions
+        cached = self._resolved.get(skill)
+        if cached is not None:
+            return cached
+
+        positions = []
+        for known_skill, known_positions in self.by_skill.items():
+            if SequenceMatcher(None, skill, known_skill).ratio() > FUZZY_SKILL_THRESHOLD:
+                positions.extend(known_positions)
+        if (not positions and self.embeddings is not None and len(self.embeddings) == len(self.courses)
+                and is_semantic()):
+            for position, similarity in self.embeddings.search(encode_query(skill), k=2):
+                if similarity >= COURSE_SEMANTIC_THRESHOLD and self.provides[position]:
+                    positions.append(position)
+        positions = sorted(set(positions))
+        with self._lock:
+            self._resolved[skill] = positions
+        return positions
+
+    def covers(self, position: int, skills: Iterable[str]) -> Set[str]:
+        """Какие из навыков покрывает курс (с учетом нечеткого сопоставления)"""
+        return {skill for skill in skills if position in self.courses_for(skill)}
+
+
+def required_skills_for(role: str) -> Tuple[List[str], str]:
+    """Требования роли и их версия: статическая карта, уточненная таблицей по вакансиям.
+
+    Навыки карты, востребованные в вакансиях роли, идут первыми в порядке
+    спроса, остальные — в порядке карты; за ними до MAX_DERIVED_EXTRA_SKILLS
+    навыков из вакансий, которых в карте нет (сравнение по каноническому
+    навыку, так что "функциональное тестирование" повторяет "Functional
+    Testing"), встречающихся хотя бы в MIN_EXTRA_SKILL_SHARE вакансий. Общие
+    направления ("тестирование") навыками не считаются. Для должностей вне
+    карты — требования по вакансиям целиком.
+    """
+    static = REQUIRED_SKILLS_MAP.get(role, [])
+    table = get_vacancy_corpus().role_skills
+    derived = table.skills_for(role)
+    if not derived:
+        return static, "static"
+    if not static:
+        # Должности нет в карте, но по ее вакансиям набралась статистика ("java developer")
+        return list(dict.fromkeys(normalize_skill(skill) for skill in derived)), table.version
+    demand = {}
+    for rank, skill in enumerate(derived):
+        demand.setdefault(normalize_skill(skill), rank)
+    known = {normalize_skill(skill) for skill in static} | set(EXTRA_SKILLS)
+    ordered = sorted(static, key=lambda skill: demand.get(normalize_skill(skill), len(demand)))
+    extra = []
+    for row in table.roles.get(role, []):
+        canonical = normalize_skill(row["skill"])
+        if canonical in known or row["share"] < MIN_EXTRA_SKILL_SHARE:
+            continue
+        known.add(canonical)
+        extra.append(canonical)
+    return ordered + extra[:MAX_DERIVED_EXTRA_SKILLS], table.version
+
+
+def missing_skills_for(user_skills: List[str], target_skills: List[str]) -> List[str]:
+    """Недостающие навыки в порядке требований роли (без повторов по каноническому навыку)"""
+    have = {normalize_skill(skill) for skill in user_skills if skill}
+    missing = []
+    seen = set()
+    for skill in target_skills:
+        canonical = normalize_skill(skill)
+        if canonical in have or canonical in seen:
+            continue
+        seen.add(canonical)
+        missing.append(skill)
+    return missing
+
+
+def _coverage_map(index: CourseSkillIndex, missing_skills: List[str]) -> Dict[int, FrozenSet[str]]:
+    coverage: Dict[int, Set[str]] = {}
+    for skill in missing_skills:
+        for position in index.courses_for(skill):
+            coverage.setdefault(position, set()).add(skill)
+    return {position: frozenset(skills) for position, skills in coverage.items()}
+
+
+def _greedy_cover(index: CourseSkillIndex, coverage: Dict[int, FrozenSet[str]],
+                  uncovered: Set[str]) -> List[int]:
+    """Жадное взвешенное покрытие: минимум часов на каждый новый навык"""
+    uncovered = set(uncovered)
+    candidates = dict(coverage)
+    selected: List[int] = []
+    while uncovered and candidates:
+        # Меньше часов на новый навык, затем более простой уровень, затем меньше пререквизитов, затем порядок в корпусе
+        best = min(candidates, key=lambda p: (index.hours[p] / (len(candidates[p] & uncovered) or 1e-9),
+                                              index.levels[p], len(index.requires[p]), p))
+        gained = candidates.pop(best) & uncovered
+        if not gained:
+            break
+        selected.append(best)
+        uncovered -= gained
+    return selected
+
+
+def _exact_cover(index: CourseSkillIndex, coverage: Dict[int, FrozenSet[str]], uncovered: Set[str],
+                 bound: float) -> Optional[List[int]]:
+    """Точное покрытие минимальной длительности перебором с отсечением по лучшему известному плану"""
+    by_skill: Dict[str, List[int]] = {}
+    for position in sorted(coverage, key=lambda p: (index.hours[p], p)):
+        for skill in coverage[position]:
+            by_skill.setdefault(skill, []).append(position)
+
+    best: List[Optional[List[int]]] = [None]
+    best_cost = [bound]
+
+    def search(remaining: FrozenSet[str], chosen: List[int], cost: float):
+        if cost >= best_cost[0]:
+            return
+        if not remaining:
+            best[0], best_cost[0] = list(chosen), cost
+            return
+        # Ветвимся по навыку с наименьшим числом курсов
+        skill = min(remaining, key=lambda s: (len(by_skill[s]), s))
+        for position in by_skill[skill]:
+            chosen.append(position)
+            search(remaining - coverage[position], chosen, cost + index.hours[position])
+            chosen.pop()
+
+    search(frozenset(uncovered), [], 0.0)
+    return best[0]
+
+
+def select_courses(index: CourseSkillIndex, missing_skills: List[str]) -> List[int]:
+    """Подбирает курсы, покрывающие недостающие навыки за минимальное суммарное время.
+
+    Для небольшого числа кандидатов покрытие точное, иначе — жадное
+    (не хуже ln(n) от оптимума). Жадный план задает верхнюю границу перебора.
+    """
+    coverage = _coverage_map(index, missing_skills)
+    uncovered = {skill for skill in missing_skills if index.courses_for(skill)}
+    selected = _greedy_cover(index, coverage, uncovered)
+    if len(coverage) <= EXACT_COVER_MAX_CANDIDATES:
+        greedy_cost = sum(index.hours[position] for position in selected)
+        exact = _exact_cover(index, coverage, uncovered, greedy_cost)
+        if exact is not None:
+            selected = exact
+    return selected
+
+
+def order_courses(index: CourseSkillIndex, positions: List[int]) -> List[int]:
+    """Топологическая сортировка курсов по пререквизитам и уровню.
+
+    Курс A идет раньше курса B, если A дает навык, который требует B, или если
+    они развивают один навык и A проще. Циклы разрываются в пользу более
+    простого курса, поэтому порядок всегда полный и детерминированный.
+    """
+    successors: Dict[int, List[int]] = {p: [] for p in positions}
+    indegree: Dict[int, int] = {p: 0 for p in positions}
+    for a in positions:
+        for b in positions:
+            if a == b:
+                continue
+            needs = index.provides[a] & index.requires[b]
+            easier = index.provides[a] & index.provides[b] and index.levels[a] < index.levels[b]
+            if needs or easier:
+                successors[a].append(b)
+                indegree[b] += 1
+
+    ready = [(index.levels[p], p) for p in positions if indegree[p] == 0]
+    heapq.heapify(ready)
+    ordered: List[int] = []
+    remaining = set(positions)
+    while remaining:
+        if not ready:
+            # Цикл зависимостей: берем самый простой из оставшихся курсов
+            p = min(remaining, key=lambda q: (index.levels[q], q))
+            indegree[p] = 0
+            heapq.heappush(ready, (index.levels[p], p))
+        _, p = heapq.heappop(ready)
+        if p not in remaining:
+            continue
+        remaining.discard(p)
+        ordered.append(p)
+        for q in successors[p]:
+            if q in remaining:
+                indegree[q] -= 1
+                if indegree[q] == 0:
+                    heapq.heappush(ready, (index.levels[q], q))
+    return ordered
+
+
+class PlanCache:
+    """LRU-кэш планов по (версия корпуса курсов, роль, набор недостающих навыков)"""
+
+    def __init__(self, max_entries: int = PLAN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            plan = self._entries.get(key)
+            if plan is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return plan
+
+    def put(self, key: Tuple, plan: Dict):
+        with self._lock:
+            self._entries[key] = plan
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_PLAN_CACHE = PlanCache()
+
+
+def build_learning_plan(user_skills: List[str], target_position: str, course_corpus) -> Dict:
+    """Строит учебный план: недостающие навыки, курсы по порядку прохождения и непокрытые навыки.
+
+    Пользователи с одинаковым разрывом в навыках для одной роли получают
+    план из кэша.
+    """
+    role = target_position.lower().strip()
+    target_skills, requirements_version = required_skills_for(role)
+    missing = missing_skills_for(user_skills, target_skills)
+    key = (course_corpus.version, requirements_version, role, frozenset(normalize_skill(skill) for skill in missing))
+    plan = _PLAN_CACHE.get(key)
+    if plan is not None:
+        return plan
+
+    index = course_corpus.skill_index
+    ordered = order_courses(index, select_courses(index, missing))
+    covered = set()
+    for position in ordered:
+        covered |= index.covers(position, missing)
+    plan = {
+        "target_skills": target_skills,
+        "missing_skills": missing,
+        "courses": [index.courses[position] for position in ordered],
+        "total_hours": sum(index.hours[position] for position in ordered),
+        "uncovered_skills": [skill for skill in missing if skill not in covered],
+    }
+    _PLAN_CACHE.put(key, plan)
+    return plan
@@ -0,0 +1,145 @@
+"""Профилирование отдельных запросов по требованию.
+
+Администратор включает профилирование для следующих N запросов или для
+запросов конкретного tg_id (POST /admin/profiling), либо для одного
+запроса заголовком X-Profile: 1. Такой запрос выполняется под cProfile,
+результат сохраняется в PROFILE_DIR: .prof (формат pstats — открывается
+snakeviz, gprof2dot, `python -m pstats`) и .txt с топом функций по
+суммарному времени. Пока профилирование не включено, запрос проверяет
+одно поле и один заголовок — накладных расходов нет.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(__file__).parent / 'profiles')
+# Сколько строк статистики попадает в текстовую сводку
+PROFILE_SUMMARY_LINES = 40
+# Сколько последних профилей хранится в каталоге
+MAX_PROFILES = 200
+
+_PROFILE_NAME_RE = re.compile(r'^[\w.-]+\.(?:prof|txt)$')
+
+
+class ProfilingController:
+    """Какие запросы профилировать: счетчик следующих запросов и список tg_id"""
+
+    def __init__(self, directory: Path = PROFILE_DIR):
+        self.directory = Path(directory)
+        self.remaining = 0
+        self.users: Dict[str, int] = {}
+        # Быстрая проверка на горячем пути: False, пока ничего не включено
+        self.armed = False
+        self._lock = threading.Lock()
+        # cProfile профилирует поток; одновременно выполняется только один профиль
+        self._busy = threading.Lock()
+
+    def arm(self, requests: int = 0, tg_id: Optional[str] = None) -> Dict:
+        """Профилировать следующие requests запросов (всех или только tg_id)"""
+        with self._lock:
+            if tg_id:
+                self.users[str(tg_id)] = self.users.get(str(tg_id), 0) + max(requests, 1)
+            else:
+                self.remaining += max(requests, 0)
+            self.armed = bool(self.remaining or self.users)
+            return self.state()
+
+    def disarm(self) -> Dict:
+        with self._lock:
+            self.remaining = 0
+            self.users.clear()
+            self.armed = False
+            return self.state()
+
+    def state(self) -> Dict:
+        return {"remaining": self.remaining, "users": dict(self.users)}
+
+    def claim(self, tg_id: str, forced: bool = False) -> bool:
+        """Решает, профилировать ли запрос, и списывает его со счетчика"""
+        if not self.armed and not forced:
+            return False
+        with self._lock:
+            tg_id = str(tg_id)
+            if tg_id in self.users:
+                self.users[tg_id] -= 1
+                if self.users[tg_id] <= 0:
+                    del self.users[tg_id]
+            elif self.remaining > 0:
+                self.remaining -= 1
+            elif not forced:
+                return False
+            self.armed = bool(self.remaining or self.users)
+            return True
+
+    @contextmanager
+    def profile(self, label: str, tg_id: str, trace_id: str = ""):
+        """Выполняет блок под cProfile и сохраняет результат"""
+        if not self._busy.acquire(blocking=False):
+            # Уже идет другой профиль в этом процессе — запрос выполняется без профилирования
+            yield None
+            return
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            profiler.enable()
+            try:
+                yield profiler
+            finally:
+                profiler.disable()
+            self._save(profiler, label, tg_id, trace_id, time.perf_counter() - started)
+        finally:
+            self._busy.release()
+
+    def _save(self, profiler: cProfile.Profile, label: str, tg_id: str, trace_id: str, elapsed: float) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        parts = [stamp, label, str(tg_id)] + ([trace_id[:16]] if trace_id else [])
+        base = self.directory / "_".join(parts)
+        profiler.dump_stats(str(base.with_suffix(".prof")))
+
+        summary = io.StringIO()
+        summary.write(f"{label} tg_id={tg_id} trace_id={trace_id or '-'} время={elapsed:.3f} с\n\n")
+        pstats.Stats(profiler, stream=summary).strip_dirs().sort_stats("cumulative").print_stats(
+            PROFILE_SUMMARY_LINES)
+        base.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+        self._prune()
+        return base.with_suffix(".prof")
+
+    def _prune(self):
+        profiles = sorted(self.directory.glob("*.prof"))
+        for old in profiles[:-MAX_PROFILES]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".txt").unlink(missing_ok=True)
+
+    def list_profiles(self) -> List[Dict]:
+        if not self.directory.exists():
+            return []
+        result = []
+        for path in sorted(self.directory.glob("*.prof"), reverse=True):
+            stat = path.stat()
+            result.append({
+                "name": path.name,
+                "summary": path.with_suffix(".txt").name,
+                "size": stat.st_size,
+                "created": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+            })
+        return result
+
+    def resolve(self, name: str) -> Optional[Path]:
+        """Путь к файлу профиля по имени (только файлы каталога профилей)"""
+        if not _PROFILE_NAME_RE.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+
+profiling = ProfilingController()
@@ -0,0 +1,146 @@
+"""Сборка запроса к модели с бюджетом токенов.
+
+Профиль пользователя попадает в запрос один раз, в компактной канонической
+форме; строки профиля, которые бот дублирует в тексте вопроса, удаляются.
+История диалога добавляется от новых реплик к старым, пока укладывается в
+бюджет. Число токенов оценивается локально, без обращения к API модели.
+"""
+import math
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from skill_taxonomy import normalize_skill
+
+
+# Бюджет токенов на весь запрос (системный промпт, профиль, история и вопрос)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+# Сколько последних реплик истории рассматривается и до скольких символов обрезается ответ
+HISTORY_MAX_TURNS = 6
+HISTORY_RESPONSE_CHARS = 600
+# Средняя длина токена в символах для оценки (кириллица токенизируется мельче латиницы)
+CHARS_PER_TOKEN = 3.5
+
+# Поля профиля в порядке вывода и их короткие подписи
+PROFILE_FIELDS = (
+    ("name", "имя"),
+    ("age", "возраст"),
+    ("education", "образование"),
+    ("skills", "навыки"),
+    ("experience", "опыт"),
+    ("target_position", "цель"),
+    ("target_role", "роль"),
+    ("interests", "интересы"),
+)
+# Строки, которыми бот повторяет профиль в тексте вопроса
+_PROFILE_ECHO_RE = re.compile(
+    r'^\s*(?:Пользователь [^\n]*?\d+ (?:лет|год|года)\.?'
+    r'|(?:Образование|Навыки|Опыт работы|Целевая позиция|Интересы):[^\n]*)\s*$',
+    re.MULTILINE,
+)
+_QUESTION_PREFIX_RE = re.compile(r'^\s*Вопрос:\s*', re.MULTILINE)
+_WORD_RE = re.compile(r'\w+|[^\w\s]')
+
+
+def estimate_tokens(text: str) -> int:
+    """Оценка числа токенов текста: слова по длине, знаки препинания по одному"""
+    if not text:
+        return 0
+    return sum(math.ceil(len(piece) / CHARS_PER_TOKEN) for piece in _WORD_RE.findall(text))
+
+
+def profile_skills(profile: Dict) -> List[str]:
+    """Навыки профиля без повторов (skills и known_technologies сливаются по каноническому имени)"""
+    skills = []
+    seen = set()
+    for field in ("skills", "known_technologies"):
+        values = profile.get(field) or []
+        if isinstance(values, str):
+            values = [part.strip() for part in values.split(",")]
+        for skill in values:
+            canonical = normalize_skill(skill) if skill else ""
+            if canonical and canonical not in seen:
+                seen.add(canonical)
+                skills.append(skill.strip())
+    return skills
+
+
+def compact_profile(profile: Optional[Dict]) -> str:
+    """Профиль одной строкой: только заполненные поля, навыки без повторов"""
+    if not profile:
+        return ""
+    parts = []
+    for field, label in PROFILE_FIELDS:
+        if field == "skills":
+            value = ", ".join(profile_skills(profile))
+        else:
+            value = profile.get(field)
+        if value in (None, "", [], "Не определен"):
+            continue
+        if field == "target_role" and str(value).lower() == str(profile.get("target_position") or "").lower():
+            continue
+        parts.append(f"{label}: {value}")
+    return "Профиль пользователя: " + "; ".join(parts) if parts else ""
+
+
+def strip_profile_echo(question: str) -> str:
+    """Убирает из вопроса строки, повторяющие профиль, и префикс "Вопрос:" """
+    question = _PROFILE_ECHO_RE.sub("", question)
+    question = _QUESTION_PREFIX_RE.sub("", question)
+    return re.sub(r'\n{3,}', "\n\n", question).strip()
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+class PromptPlan:
+    """Собранный запрос: сообщения (роль, текст) и учет токенов по частям"""
+
+    def __init__(self, messages: List[Tuple[str, str]], tokens: Dict[str, int], dropped_turns: int):
+        self.messages = messages
+        self.tokens = tokens
+        self.dropped_turns = dropped_turns
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+    def report(self) -> str:
+        parts = ", ".join(f"{name}={count}" for name, count in self.tokens.items())
+        return f"токены запроса: {parts}, всего={self.total_tokens}, отброшено реплик истории: {self.dropped_turns}"
+
+
+def build_prompt(question: str, profile: Optional[Dict] = None, history: Optional[List[Dict]] = None,
+                 system_prompt: str = "", budget: int = PROMPT_TOKEN_BUDGET) -> PromptPlan:
+    """Собирает сообщения для агента в пределах бюджета токенов.
+
+    Вопрос и профиль включаются всегда; история — сколько поместится,
+    начиная с последних реплик.
+    """
+    question = strip_profile_echo(question) or question
+    profile_text = compact_profile(profile)
+    current = f"{question}\n\n{profile_text}" if profile_text else question
+
+    tokens = {
+        "system": estimate_tokens(system_prompt),
+        "profile": estimate_tokens(profile_text),
+        "question": estimate_tokens(question),
+        "history": 0,
+    }
+    remaining = budget - tokens["system"] - tokens["profile"] - tokens["question"]
+
+    history = list(history or [])
+    kept: List[Tuple[str, str]] = []
+    for turn in reversed(history[-HISTORY_MAX_TURNS:]):
+        pair = [("human", turn.get("query") or ""),
+                ("ai", _clip(turn.get("response") or "", HISTORY_RESPONSE_CHARS))]
+        cost = sum(estimate_tokens(text) for _, text in pair)
+        if cost > remaining:
+            # Более старые реплики без этой теряют связность — дальше не добавляем
+            break
+        remaining -= cost
+        tokens["history"] += cost
+        kept = pair + kept
+
+    return PromptPlan(kept + [("human", current)], tokens, len(history) - len(kept) // 2)
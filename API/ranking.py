@@ -0,0 +1,99 @@
+"""Потоковый отбор top-k и кэш ранжирований для постраничной выдачи"""
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class TopK:
+    """Ограниченная куча: хранит k лучших (оценка, позиция) за O(n log k).
+
+    При равных оценках выше остается элемент с меньшей позицией, как при
+    устойчивой сортировке всего списка.
+    """
+
+    __slots__ = ("k", "_heap", "seen")
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[Tuple[float, int]] = []
+        self.seen = 0
+
+    def push(self, score: float, position: int):
+        self.seen += 1
+        item = (score, -position)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def result(self) -> List[Tuple[float, int]]:
+        """Отобранные элементы по убыванию оценки"""
+        return [(score, -neg_position) for score, neg_position in sorted(self._heap, reverse=True)]
+
+
+def top_k(scored: Iterable[Tuple[float, int]], k: int) -> List[Tuple[float, int]]:
+    """Возвращает k лучших пар (оценка, позиция) по убыванию оценки"""
+    selector = TopK(k)
+    for score, position in scored:
+        selector.push(score, position)
+    return selector.result()
+
+
+class Ranking:
+    """Закэшированное ранжирование: лучшие позиции и общее число совпадений"""
+
+    __slots__ = ("items", "total")
+
+    def __init__(self, items: List[Tuple[float, int]], total: int):
+        self.items = items
+        self.total = total
+
+    @property
+    def complete(self) -> bool:
+        """Все совпадения попали в ранжирование (дальше страниц нет)"""
+        return len(self.items) >= self.total
+
+    def page(self, offset: int, limit: int) -> List[Tuple[float, int]]:
+        return self.items[offset:offset + limit]
+
+
+class RankingCache:
+    """LRU-кэш ранжирований по ключу запроса (включая версию корпуса)"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Ranking]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, depth: int) -> Optional[Ranking]:
+        """Возвращает ранжирование, если в нем хватает позиций для запрошенной глубины"""
+        with self._lock:
+            ranking = self._entries.get(key)
+            if ranking is None or (len(ranking.items) < depth and not ranking.complete):
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return ranking
+
+    def put(self, key: Hashable, ranking: Ranking):
+        with self._lock:
+            self._entries[key] = ranking
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
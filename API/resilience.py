@@ -0,0 +1,285 @@
+"""Устойчивость к деградации GigaChat.
+
+- Дедлайн запроса: API выставляет его из заголовка X-Request-Timeout (не
+  больше REQUEST_TIMEOUT), и каждый вызов модели проверяет остаток. Сам
+  сетевой вызов ограничен GIGACHAT_CALL_TIMEOUT (таймаут клиента GigaChat).
+- Предохранитель (circuit breaker): после CIRCUIT_FAILURE_THRESHOLD ошибок
+  подряд вызовы модели сразу отклоняются на CIRCUIT_RESET_TIMEOUT секунд,
+  затем пропускается один пробный вызов.
+- Адаптивный предел параллельности (AIMD): предел растет на 1/limit после
+  каждого быстрого успешного вызова и умножается на AIMD_BACKOFF после
+  ошибки или вызова дольше GIGACHAT_LATENCY_TARGET.
+
+Проверки выполняются в обработчике колбэков перед каждым вызовом модели
+внутри графа агента. Если вызов отклонен, run_agent отвечает без модели —
+результатом инструмента, выбранного по тексту вопроса (fallback_answer).
+Состояние экспортируется в /metrics и /stats.
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from metrics import counter, gauge
+
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "60"))
+GIGACHAT_CALL_TIMEOUT = float(os.getenv("GIGACHAT_CALL_TIMEOUT", "30"))
+# Вызов модели не начинается, если до дедлайна осталось меньше этого
+MIN_CALL_BUDGET = 1.0
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+
+GIGACHAT_LATENCY_TARGET = float(os.getenv("GIGACHAT_LATENCY_TARGET", "10"))
+AIMD_MIN_LIMIT = int(os.getenv("AIMD_MIN_LIMIT", "1"))
+AIMD_MAX_LIMIT = int(os.getenv("AIMD_MAX_LIMIT", "32"))
+AIMD_INITIAL_LIMIT = int(os.getenv("AIMD_INITIAL_LIMIT", "8"))
+AIMD_BACKOFF = 0.7
+
+REJECTIONS = counter("career_gigachat_rejections_total", "Вызовы GigaChat, отклоненные до отправки", ["reason"])
+FALLBACKS = counter("career_agent_fallbacks_total", "Ответы без модели (по результату инструмента)", ["reason"])
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+
+
+class UpstreamUnavailable(Exception):
+    """Вызов модели отклонен до отправки; reason — причина для метрик"""
+
+    reason = "unavailable"
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    reason = "deadline"
+
+
+class CircuitOpen(UpstreamUnavailable):
+    reason = "circuit_open"
+
+
+class Overloaded(UpstreamUnavailable):
+    reason = "overloaded"
+
+
+@contextmanager
+def deadline(seconds: Optional[float] = None):
+    """Дедлайн обработки запроса: через seconds секунд (не больше REQUEST_TIMEOUT)"""
+    budget = min(seconds, REQUEST_TIMEOUT) if seconds and seconds > 0 else REQUEST_TIMEOUT
+    token = _deadline.set(time.monotonic() + budget)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    return _deadline.get()
+
+
+def remaining(at: Optional[float] = None) -> Optional[float]:
+    """Секунд до дедлайна (None — дедлайн не задан)"""
+    at = at if at is not None else current_deadline()
+    return at - time.monotonic() if at is not None else None
+
+
+class CircuitBreaker:
+    """Предохранитель: closed -> open после серии ошибок -> half_open (один пробный вызов)"""
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def rejecting(self) -> bool:
+        """Вызов сейчас был бы отклонен (без изменения состояния)"""
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at < self.reset_timeout
+        return self.state == self.HALF_OPEN and self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Разрешает вызов; в half_open пропускает только один пробный"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("GigaChat снова отвечает, предохранитель закрыт")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.trips += 1
+                    logger.warning("Предохранитель GigaChat открыт на %.0f с после %d ошибок",
+                                   self.reset_timeout, self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "trips": self.trips}
+
+
+class AdaptiveLimiter:
+    """Предел одновременных вызовов, подстраиваемый по латентности (AIMD)"""
+
+    def __init__(self, initial: int = AIMD_INITIAL_LIMIT, minimum: int = AIMD_MIN_LIMIT,
+                 maximum: int = AIMD_MAX_LIMIT, latency_target: float = GIGACHAT_LATENCY_TARGET):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self._last_backoff = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Ждет свободного места не дольше timeout секунд"""
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.in_flight < int(self.limit), timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def cancel(self):
+        """Освобождает место без вызова (предел не меняется)"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def release(self, latency: float, ok: bool):
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if ok and latency <= self.latency_target:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif now - latency >= self._last_backoff:
+                # Вызовы, начатые до предыдущего снижения, его уже учли: одно снижение на круг
+                self.limit = max(self.minimum, self.limit * AIMD_BACKOFF)
+                self._last_backoff = now
+            self._condition.notify_all()
+
+    def stats(self) -> Dict:
+        return {"limit": int(self.limit), "in_flight": self.in_flight}
+
+
+breaker = CircuitBreaker()
+limiter = AdaptiveLimiter()
+
+_CIRCUIT_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+gauge("career_gigachat_circuit_state", "Предохранитель GigaChat: 0 closed, 1 half_open, 2 open",
+      lambda: _CIRCUIT_STATES[breaker.state])
+gauge("career_gigachat_concurrency_limit", "Текущий предел одновременных вызовов GigaChat", lambda: int(limiter.limit))
+gauge("career_gigachat_in_flight", "Выполняющиеся вызовы GigaChat", lambda: limiter.in_flight)
+
+
+def stats() -> Dict:
+    return {"circuit": breaker.stats(), "concurrency": limiter.stats()}
+
+
+class ModelGuard(BaseCallbackHandler):
+    """Проверяет дедлайн, предохранитель и предел параллельности перед каждым вызовом модели.
+
+    Исключение из on_chat_model_start прерывает вызов (raise_error), поэтому
+    обработчик должен стоять в списке колбэков первым.
+    """
+
+    raise_error = True
+
+    def __init__(self, deadline_at: Optional[float] = None):
+        self.deadline_at = deadline_at if deadline_at is not None else current_deadline()
+        self._started: Dict[UUID, float] = {}
+
+    def _admit(self, run_id: UUID):
+        left = remaining(self.deadline_at)
+        if left is not None and left < MIN_CALL_BUDGET:
+            REJECTIONS.inc(DeadlineExceeded.reason)
+            raise DeadlineExceeded(f"до дедлайна осталось {max(left, 0):.1f} с")
+        if breaker.rejecting():
+            REJECTIONS.inc(CircuitOpen.reason)
+            raise CircuitOpen("GigaChat недоступен, предохранитель открыт")
+        if not limiter.acquire(timeout=left if left is not None else GIGACHAT_CALL_TIMEOUT):
+            REJECTIONS.inc(Overloaded.reason)
+            raise Overloaded(f"заняты все {int(limiter.limit)} мест для вызовов GigaChat")
+        # Место занимается до запроса к предохранителю, чтобы пробный вызов half_open не пропал в очереди
+        if not breaker.allow():
+            limiter.cancel()
+            REJECTIONS.inc(CircuitOpen.reason)
+            raise CircuitOpen("GigaChat недоступен, предохранитель открыт")
+        self._started[run_id] = time.monotonic()
+
+    def _finish(self, run_id: UUID, ok: bool):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        limiter.release(time.monotonic() - started, ok)
+        if ok:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._admit(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._admit(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, ok=True)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, ok=False)
+
+
+def fallback_answer(question: str, profile: Optional[Dict], reason: str) -> str:
+    """Ответ без модели: инструмент выбирается по тексту вопроса, аргументы — из профиля"""
+    from prompt_builder import profile_skills, strip_profile_echo
+    from tools import create_learning_plan, find_matching_vacancies, get_market_overview, provide_career_advice
+
+    FALLBACKS.inc(reason)
+    profile = profile or {}
+    text = strip_profile_echo(question).lower()
+    skills = profile_skills(profile)
+    target = profile.get("target_position") or profile.get("target_role")
+
+    if "find_matching_vacancies" in text or "ваканс" in text:
+        result = find_matching_vacancies.invoke({"user_skills": skills, "experience_level": profile.get("experience")})
+    elif target and ("create_learning_plan" in text or "план" in text or "обуч" in text or "курс" in text):
+        result = create_learning_plan.invoke({"skills": skills, "target_position": target})
+    elif "get_market_overview" in text or any(word in text for word in ("рынок", "рынк", "востребован", "зарплат",
+                                                                        "платят")):
+        result = get_market_overview.invoke({"target_position": target, "skills": skills})
+    else:
+        result = provide_career_advice.invoke({"question": strip_profile_echo(question)})
+    return ("⚠️ Нейросеть сейчас не успевает ответить, поэтому отвечаю по базе вакансий, курсов и советов "
+            "без подробного разбора.\n\n" + result)
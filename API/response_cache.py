@@ -0,0 +1,237 @@
+"""Кэш ответов агента.
+
+Ключ — нормализованный вопрос и подпись профиля: канонические навыки,
+корзина опыта и целевая роль. Для кэшируемого вопроса модель получает
+только эту часть профиля (shared_profile) и не получает историю, поэтому
+ответ одинаково подходит всем пользователям с той же подписью. Имя,
+возраст и образование в кэшируемый текст не попадают: обращение по имени
+добавляется к ответу после кэша (personalize).
+
+Для почти совпадающих вопросов есть поиск по эмбеддингам среди ответов с
+той же подписью профиля. Он работает только с моделью эмбеддингов
+(хэширующий энкодер путает "frontend" и "backend") и требует, чтобы в
+вопросах совпадали числа, навыки и слова ролей. Записи живут
+RESPONSE_CACHE_TTL секунд и только в пределах текущей версии данных
+(вакансии, курсы, база советов). Хранилище — SQLite.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from advice import get_advice_base
+from corpus import get_course_corpus, get_vacancy_corpus
+from embeddings import encode_query, is_semantic
+from prompt_builder import compact_profile, profile_skills, strip_profile_echo
+from roles import GENERIC_TOKENS, ROLE_INDEX, normalize_tokens, resolve_role
+from skill_taxonomy import extract_skills, normalize_skill
+
+
+RESPONSE_CACHE_PATH = Path(os.getenv("RESPONSE_CACHE_PATH") or Path(__file__).parent / 'cache' / 'responses.sqlite3')
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600)))
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1") != "0"
+# Поиск почти совпадающих вопросов по эмбеддингам (RESPONSE_CACHE_SEMANTIC=0 отключает;
+# с хэширующим энкодером не используется)
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "1") != "0"
+SEMANTIC_THRESHOLD = 0.97
+# Сколько последних записей с той же подписью профиля сравнивается по эмбеддингам
+SEMANTIC_CANDIDATES = 200
+
+# Вопросы, смысл которых зависит от предыдущих реплик, не кэшируются
+_FOLLOW_UP_RE = re.compile(r'(?<!\w)(?:еще|ещё|дальше|следующ\w*|подробнее|предыдущ\w*|это\w*|там|выше)(?!\w)')
+_NORMALIZE_RE = re.compile(r'[^\w\s]+')
+_NUMBER_RE = re.compile(r'\d+')
+# Слова из названий ролей ("frontend", "python", "qa"), которые отличают один вопрос от другого
+_ROLE_WORDS = {token for tokens in ROLE_INDEX.exact for token in tokens} - GENERIC_TOKENS
+# Ответы с ошибками не кэшируются
+_ERROR_PREFIXES = ("Произошла ошибка", "Извините, произошла ошибка")
+
+
+def normalize_prompt(question: str) -> str:
+    """Вопрос без строк профиля, пунктуации и различий в регистре и пробелах"""
+    text = strip_profile_echo(question).lower().replace("ё", "е")
+    return " ".join(_NORMALIZE_RE.sub(" ", text).split())
+
+
+# Корзина опыта -> как она описывается модели
+EXPERIENCE_LABELS = {"none": "нет опыта", "intern": "стажировка или практика", "some": "есть опыт работы"}
+
+
+def experience_bucket(experience: Optional[str]) -> str:
+    text = (experience or "").lower()
+    if not text or text in ("не указан", "не определен"):
+        return "unknown"
+    if any(phrase in text for phrase in ("нет опыта", "без опыта", "опыта нет", "не работал")):
+        return "none"
+    if any(word in text for word in ("стажир", "интерн", "практик")):
+        return "intern"
+    return "some"
+
+
+def shared_profile(profile: Optional[Dict]) -> Dict:
+    """Общая часть профиля для кэшируемого ответа: канонические навыки, корзина опыта и роль"""
+    profile = profile or {}
+    target = profile.get("target_position") or profile.get("target_role") or ""
+    return {
+        "skills": sorted({normalize_skill(skill) for skill in profile_skills(profile)}),
+        "experience": EXPERIENCE_LABELS.get(experience_bucket(profile.get("experience"))),
+        "target_position": profile.get("target_role") or resolve_role(target) or target.lower().strip() or None,
+    }
+
+
+def profile_signature(profile: Optional[Dict]) -> str:
+    """Подпись профиля: строка общей части профиля, которую видит модель при кэшируемом вопросе"""
+    return hashlib.sha1(compact_profile(shared_profile(profile)).encode("utf-8")).hexdigest()[:16]
+
+
+def personalize(answer: str, profile: Optional[Dict]) -> str:
+    """Обращение по имени к ответу из кэша или для кэша (само в кэш не попадает)"""
+    name = str((profile or {}).get("name") or "").strip()
+    return f"{name}, вот ответ с учетом твоего профиля.\n\n{answer}" if name else answer
+
+
+def prompt_facts(prompt: str) -> Tuple:
+    """Числа, навыки и слова ролей вопроса: у вопросов с одним ответом они должны совпадать"""
+    return (tuple(sorted(_NUMBER_RE.findall(prompt))), tuple(extract_skills(prompt)),
+            tuple(sorted(set(normalize_tokens(prompt)) & _ROLE_WORDS)))
+
+
+def data_version() -> str:
+    """Версия данных, от которых зависят ответы: при обновлении корпусов кэш сбрасывается"""
+    return ":".join([get_vacancy_corpus().version, get_course_corpus().version, get_advice_base().version])
+
+
+def is_cacheable(question: str, history=None) -> bool:
+    """Вопрос кэшируется, если не ссылается на предыдущие реплики диалога"""
+    if not history:
+        return True
+    return _FOLLOW_UP_RE.search(question.lower()) is None
+
+
+class ResponseCache:
+    """Кэш ответов в SQLite со статистикой попаданий"""
+
+    def __init__(self, path: Path = RESPONSE_CACHE_PATH, ttl: int = RESPONSE_CACHE_TTL,
+                 semantic: bool = RESPONSE_CACHE_SEMANTIC):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.semantic = semantic
+        self._lock = threading.Lock()
+        self._conn = None
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        """Поиск по эмбеддингам включен и загружена модель эмбеддингов (не хэширующий энкодер)"""
+        return self.semantic and is_semantic()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    profile_signature TEXT NOT NULL,
+                    data_version TEXT NOT NULL,
+                    prompt TEXT NOT NULL,
+                    embedding BLOB,
+                    response TEXT NOT NULL,
+                    latency REAL NOT NULL,
+                    created_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_profile ON responses (profile_signature, data_version)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(signature: str, prompt: str) -> str:
+        return hashlib.sha1(f"{signature}|{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, question: str, profile: Optional[Dict] = None) -> Optional[Tuple[str, str]]:
+        """Возвращает (ответ, тип попадания "exact"/"semantic") или None"""
+        prompt = normalize_prompt(question)
+        signature = profile_signature(profile)
+        version = data_version()
+        oldest = time.time() - self.ttl
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, latency, key FROM responses WHERE key = ? AND data_version = ? AND created_at >= ?",
+                (self._key(signature, prompt), version, oldest)).fetchone()
+            kind = "exact"
+            if row is None and self.semantic_enabled:
+                row = self._nearest(conn, prompt, signature, version, oldest)
+                kind = "semantic"
+            if row is None:
+                self.misses += 1
+                return None
+            response, latency, key = row
+            conn.execute("UPDATE responses SET hits = hits + 1 WHERE key = ?", (key,))
+            conn.commit()
+            self.hits += 1
+            self.semantic_hits += kind == "semantic"
+            self.saved_seconds += latency
+        return response, kind
+
+    def _nearest(self, conn, prompt: str, signature: str, version: str, oldest: float):
+        rows = conn.execute(
+            "SELECT response, latency, key, embedding, prompt FROM responses "
+            "WHERE profile_signature = ? AND data_version = ? AND created_at >= ? AND embedding IS NOT NULL "
+            "ORDER BY created_at DESC LIMIT ?",
+            (signature, version, oldest, SEMANTIC_CANDIDATES)).fetchall()
+        if not rows:
+            return None
+        matrix = np.stack([np.frombuffer(row[3], dtype=np.float16) for row in rows]).astype(np.float32)
+        similarities = matrix @ encode_query(prompt).astype(np.float32)
+        facts = prompt_facts(prompt)
+        # Близкие по смыслу вопросы с другими числами или ролью ("от 100000" и "от 300000") — разные вопросы
+        for best in np.argsort(-similarities, kind="stable").tolist():
+            if similarities[best] < SEMANTIC_THRESHOLD:
+                break
+            if prompt_facts(rows[best][4]) == facts:
+                return rows[best][:3]
+        return None
+
+    def put(self, question: str, profile: Optional[Dict], response: str, latency: float):
+        if not response or response.startswith(_ERROR_PREFIXES):
+            return
+        prompt = normalize_prompt(question)
+        signature = profile_signature(profile)
+        embedding = encode_query(prompt).astype(np.float16).tobytes() if self.semantic_enabled else None
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, profile_signature, data_version, prompt, embedding, response, latency, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(signature, prompt), signature, data_version(), prompt, embedding, response, latency,
+                 time.time()))
+            # Устаревшие записи удаляются при записи, чтобы файл не рос бесконечно
+            conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            conn.commit()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "saved_seconds": round(self.saved_seconds, 1),
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,212 @@
+"""Требования ролей по корпусу вакансий (офлайн-агрегация).
+
+Вакансии группируются по нормализованному названию (название, совпадающее
+с ролью или ее синонимом, дает группу роли; нечеткое распознавание здесь не
+используется), для каждой группы считается доля вакансий с каждым навыком
+и TF-IDF навыка относительно остальных групп. Слова из названий ролей
+("backend", "devops") в требования не попадают — это не навыки. Подсчет
+векторизован: пары (группа, навык) кодируются одним целым и считаются
+через numpy.unique.
+
+Таблица публикуется в jsons/role_skills.json вместе с накопленными
+счетчиками и обработанными вакансиями, поэтому при обновлении корпуса
+досчитываются только новые вакансии. Удаленные из выдачи вакансии
+выпадают из счетчиков при полной пересборке (python role_skills.py --full).
+"""
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from roles import GENERIC_TOKENS, ROLE_INDEX, normalize_tokens
+from skill_taxonomy import is_known_skill
+
+
+logger = logging.getLogger(__name__)
+
+ROLE_SKILLS_PATH = Path(__file__).parent / 'jsons' / 'role_skills.json'
+
+# Минимум вакансий в группе, чтобы публиковать ее требования
+MIN_CLUSTER_VACANCIES = 5
+# Навык попадает в требования роли, если встречается хотя бы в такой доле вакансий группы
+MIN_SKILL_SHARE = 0.1
+MAX_ROLE_SKILLS = 10
+# Версия правил группировки: таблица, собранная по другим правилам, пересчитывается с нуля
+CLUSTERING_VERSION = 2
+
+# Слова из названий ролей и их синонимов ("backend", "frontend", "devops")
+ROLE_WORDS = {token for tokens in ROLE_INDEX.exact for token in tokens} | GENERIC_TOKENS
+
+_BRACKETS_RE = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+
+
+def cluster_key(title: str) -> str:
+    """Группа вакансии: роль, если название совпадает с ней или ее синонимом, иначе нормализованное название.
+
+    Уточнения в скобках отбрасываются. Нечеткое совпадение не используется:
+    "Java разработчик" не должен попасть в группу ближайшей по написанию роли.
+    """
+    title = _BRACKETS_RE.sub(" ", title or "")
+    return ROLE_INDEX.exact_match(title) or " ".join(normalize_tokens(title))
+
+
+def is_role_word(skill: str) -> bool:
+    """Навык из вакансии на самом деле слово из названия роли ("backend"), а не навык"""
+    tokens = normalize_tokens(skill)
+    return bool(tokens) and all(token in ROLE_WORDS for token in tokens) and not is_known_skill(skill)
+
+
+def vacancy_key(vacancy: Dict, position: int) -> str:
+    return str(vacancy.get("id") or vacancy.get("url") or f"#{position}")
+
+
+class RoleSkillsTable:
+    """Счетчики навыков по группам вакансий и производная таблица требований ролей"""
+
+    def __init__(self, corpus_version: str = "", vacancy_ids=None,
+                 cluster_sizes: Optional[Dict[str, int]] = None,
+                 skill_counts: Optional[Dict[str, Dict[str, int]]] = None,
+                 clustering: int = CLUSTERING_VERSION):
+        self.corpus_version = corpus_version
+        self.clustering = clustering
+        self.vacancy_ids = set(vacancy_ids or ())
+        self.cluster_sizes: Dict[str, int] = dict(cluster_sizes or {})
+        self.skill_counts: Dict[str, Dict[str, int]] = {k: dict(v) for k, v in (skill_counts or {}).items()}
+        self.roles: Dict[str, List[Dict]] = {}
+        self.version = ""
+        self._publish()
+
+    def update(self, corpus) -> int:
+        """Досчитывает вакансии корпуса, которых еще нет в таблице. Возвращает их число"""
+        skills = corpus.skills
+        new_positions = []
+        for position, vacancy in enumerate(corpus.vacancies):
+            key = vacancy_key(vacancy, position)
+            if key not in self.vacancy_ids:
+                self.vacancy_ids.add(key)
+                new_positions.append(position)
+
+        if new_positions:
+            clusters: Dict[str, int] = {}
+            cluster_of = np.fromiter(
+                (clusters.setdefault(cluster_key(corpus.vacancies[p].get("name")), len(clusters))
+                 for p in new_positions), dtype=np.int64, count=len(new_positions))
+            names = list(clusters)
+            sizes = np.bincount(cluster_of, minlength=len(names))
+
+            # Пары (группа, навык) одним целым: группа * размер словаря + навык
+            vocabulary_size = max(len(skills.vocabulary), 1)
+            lengths = np.fromiter((len(skills.skill_sets[p]) for p in new_positions),
+                                  dtype=np.int64, count=len(new_positions))
+            skill_ids = np.fromiter((skill_id for p in new_positions for skill_id in skills.skill_sets[p]),
+                                    dtype=np.int64, count=int(lengths.sum()))
+            pairs = np.repeat(cluster_of, lengths) * vocabulary_size + skill_ids
+            keys, counts = np.unique(pairs, return_counts=True)
+
+            for index, size in enumerate(sizes.tolist()):
+                self.cluster_sizes[names[index]] = self.cluster_sizes.get(names[index], 0) + size
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                cluster, skill_id = divmod(key, vocabulary_size)
+                cluster_counts = self.skill_counts.setdefault(names[cluster], {})
+                skill = skills.vocabulary.names[skill_id]
+                cluster_counts[skill] = cluster_counts.get(skill, 0) + count
+
+        self.corpus_version = corpus.version
+        self._publish()
+        return len(new_positions)
+
+    def _publish(self):
+        """Пересчитывает требования ролей: доля вакансий с навыком и TF-IDF между группами"""
+        clusters = [name for name, size in sorted(self.cluster_sizes.items())
+                    if name and size >= MIN_CLUSTER_VACANCIES]
+        cluster_frequency: Dict[str, int] = {}
+        for name in clusters:
+            for skill in self.skill_counts.get(name, {}):
+                cluster_frequency[skill] = cluster_frequency.get(skill, 0) + 1
+
+        roles = {}
+        for name in clusters:
+            size = self.cluster_sizes[name]
+            rows = []
+            for skill, count in self.skill_counts.get(name, {}).items():
+                share = count / size
+                if share < MIN_SKILL_SHARE or is_role_word(skill):
+                    continue
+                idf = float(np.log(1 + len(clusters) / cluster_frequency[skill]))
+                rows.append({"skill": skill, "share": round(share, 3), "score": round(share * idf, 4)})
+            rows.sort(key=lambda row: (-row["score"], row["skill"]))
+            if rows:
+                roles[name] = rows[:MAX_ROLE_SKILLS]
+        self.roles = roles
+        payload = json.dumps(roles, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        self.version = hashlib.sha1(payload).hexdigest()[:12]
+
+    def skills_for(self, role: str) -> List[str]:
+        return [row["skill"] for row in self.roles.get(role, [])]
+
+    def save(self, path: Path = ROLE_SKILLS_PATH):
+        data = {
+            "version": self.version,
+            "clustering": self.clustering,
+            "corpus_version": self.corpus_version,
+            "roles": self.roles,
+            "cluster_sizes": self.cluster_sizes,
+            "skill_counts": self.skill_counts,
+            "vacancy_ids": sorted(self.vacancy_ids),
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    @classmethod
+    def load(cls, path: Path = ROLE_SKILLS_PATH) -> "RoleSkillsTable":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get("corpus_version", ""), data.get("vacancy_ids"),
+                   data.get("cluster_sizes"), data.get("skill_counts"), data.get("clustering", 1))
+
+
+def load_or_build_role_skills(corpus, path: Path = ROLE_SKILLS_PATH) -> RoleSkillsTable:
+    """Таблица требований ролей для корпуса: из артефакта, с досчетом новых вакансий при необходимости"""
+    table = None
+    if path.exists():
+        try:
+            table = RoleSkillsTable.load(path)
+        except Exception as e:
+            logger.warning("Не удалось прочитать таблицу требований ролей %s: %s", path, e)
+    if table is None or table.clustering != CLUSTERING_VERSION:
+        table = RoleSkillsTable()
+    if table.corpus_version != corpus.version:
+        # Корпус обновился — досчитываем в памяти (публикация: python role_skills.py)
+        table.update(corpus)
+    return table
+
+
+def build_role_skills(corpus, path: Path = ROLE_SKILLS_PATH, full: bool = False) -> Tuple[RoleSkillsTable, int]:
+    """Офлайн-задача: обновляет и сохраняет таблицу. full=True пересчитывает с нуля"""
+    table = RoleSkillsTable() if full or not path.exists() else RoleSkillsTable.load(path)
+    if table.clustering != CLUSTERING_VERSION:
+        table = RoleSkillsTable()
+    added = table.update(corpus)
+    table.save(path)
+    return table, added
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from corpus import get_vacancy_corpus
+
+    corpus = get_vacancy_corpus()
+    corpus.skills
+    start = time.perf_counter()
+    table, added = build_role_skills(corpus, full="--full" in sys.argv)
+    elapsed = time.perf_counter() - start
+    print(f"Вакансий обработано: {added} (всего в таблице {len(table.vacancy_ids)}), "
+          f"групп: {len(table.cluster_sizes)}, ролей опубликовано: {len(table.roles)}, {elapsed:.2f} с")
+    print(f"Версия таблицы: {table.version} -> {ROLE_SKILLS_PATH}")
+    for role, rows in table.roles.items():
+        print(f"  {role} ({table.cluster_sizes[role]}): {', '.join(row['skill'] for row in rows)}")
@@ -0,0 +1,221 @@
+"""Распознавание целевой должности пользователя.
+
+Свободный текст из профиля ("backend разработчик", "DevOps-инженер",
+"Junior Python developer") приводится к одной из ролей карты требований
+учебных планов. Индекс строится один раз при импорте: нормализованные
+токены (с транслитерацией и синонимами) для точного совпадения и
+триграммы токенов для нечеткого. Нечеткое совпадение учитывает только
+значимые токены: общие слова вроде "разработчик" или "engineer" роль не
+определяют, и "Java разработчик" остается без роли, а не попадает в
+ближайшую по написанию. Результаты кэшируются по тексту и по пользователю.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from planner import REQUIRED_SKILLS_MAP
+
+
+# Дополнительные названия ролей, которые встречаются в ответах пользователей
+ROLE_ALIASES = {
+    "python-разработчик": ["python developer", "питон разработчик", "python программист", "python engineer"],
+    "backend-разработчик": ["backend developer", "бэкенд разработчик", "серверный разработчик", "backend"],
+    "frontend-разработчик": ["frontend developer", "фронтенд разработчик", "веб разработчик", "верстальщик",
+                             "frontend"],
+    "qa инженер": ["тестировщик", "qa engineer", "qa", "инженер по тестированию", "автотестировщик"],
+    "data scientist": ["дата сайентист", "специалист по данным", "аналитик данных", "data analyst"],
+    "devops инженер": ["devops", "devops engineer", "sre"],
+    "system administrator": ["системный администратор", "сисадмин", "sysadmin", "администратор linux"],
+    "mobile-разработчик": ["мобильный разработчик", "android разработчик", "ios разработчик",
+                           "mobile developer", "flutter разработчик"],
+    "ml-инженер": ["ml engineer", "machine learning engineer", "инженер машинного обучения", "ml разработчик"],
+    "business analyst": ["бизнес аналитик", "бизнес-аналитик", "системный аналитик"],
+}
+
+# Синонимы токенов: разные написания одного слова приводятся к одному токену
+TOKEN_SYNONYMS = {
+    "разработчик": "developer", "разработчица": "developer", "программист": "developer", "dev": "developer",
+    "инженер": "engineer",
+    "бэкенд": "backend", "бекенд": "backend", "бэкэнд": "backend",
+    "фронтенд": "frontend", "фронтэнд": "frontend",
+    "питон": "python", "пайтон": "python",
+    "администратор": "administrator", "админ": "administrator", "admin": "administrator",
+    "аналитик": "analyst",
+    "тестировщик": "qa", "тестировщица": "qa", "tester": "qa",
+    "девопс": "devops",
+    "мобильный": "mobile",
+    "сайентист": "scientist", "саентист": "scientist",
+}
+
+# Уровни и прочие слова, не влияющие на роль
+STOP_TOKENS = {
+    "junior", "middle", "senior", "lead", "intern", "trainee", "стажер", "младший", "старший", "ведущий",
+    "главный", "джуниор", "мидл", "сеньор", "тимлид", "в", "на", "по", "и", "of",
+}
+
+# Общие названия профессии (после синонимов): есть почти в каждой роли, поэтому роль по ним не выбирается
+GENERIC_TOKENS = {"developer", "engineer", "specialist", "специалист", "po"}
+
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z", "и": "i", "й": "i",
+    "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "", "э": "e",
+    "ю": "yu", "я": "ya",
+})
+_TOKEN_RE = re.compile(r'[a-zа-я0-9+#]+')
+
+# Минимальное сходство триграмм, при котором токены считаются одним словом с опечаткой
+TRIGRAM_THRESHOLD = 0.6
+# Короткие токены ("qa", "ml", "1s") совпадают только точно
+MIN_FUZZY_TOKEN_LENGTH = 4
+# Минимальная доля общих значимых токенов запроса и названия роли (коэффициент Жаккара)
+ROLE_MATCH_THRESHOLD = 0.5
+
+
+def normalize_tokens(text: str) -> Tuple[str, ...]:
+    """Нормализованные токены названия должности: синонимы, транслитерация, без уровней"""
+    tokens = []
+    for token in _TOKEN_RE.findall((text or "").lower().replace("ё", "е")):
+        if token in STOP_TOKENS:
+            continue
+        token = TOKEN_SYNONYMS.get(token, token).translate(_TRANSLIT)
+        if token and token not in tokens:
+            tokens.append(token)
+    return tuple(tokens)
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def significant_tokens(tokens: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Токены, которые отличают одну роль от другой (без общих названий профессии)"""
+    return tuple(token for token in tokens if token not in GENERIC_TOKENS)
+
+
+class RoleIndex:
+    """Индекс названий ролей: точное совпадение по токенам и нечеткое по значимым токенам"""
+
+    def __init__(self, roles: Dict[str, List[str]]):
+        self.exact: Dict[Tuple[str, ...], str] = {}
+        self.key_roles: List[str] = []
+        self.key_tokens: List[Set[str]] = []
+        # Значимый токен -> ключи, в которых он есть; триграмма -> токены (для опечаток)
+        self.token_keys: Dict[str, List[int]] = {}
+        self.token_trigrams: Dict[str, Set[str]] = {}
+        self.postings: Dict[str, List[str]] = {}
+        for role, aliases in roles.items():
+            for name in [role] + list(aliases):
+                tokens = normalize_tokens(name)
+                if not tokens:
+                    continue
+                self.exact.setdefault(tuple(sorted(tokens)), role)
+                significant = significant_tokens(tokens)
+                if not significant:
+                    continue
+                position = len(self.key_roles)
+                self.key_roles.append(role)
+                self.key_tokens.append(set(significant))
+                for token in significant:
+                    self.token_keys.setdefault(token, []).append(position)
+                    if token not in self.token_trigrams and len(token) >= MIN_FUZZY_TOKEN_LENGTH:
+                        self.token_trigrams[token] = _trigrams(token)
+                        for trigram in self.token_trigrams[token]:
+                            self.postings.setdefault(trigram, []).append(token)
+
+    def exact_match(self, text: str) -> Optional[str]:
+        """Роль, название или синоним которой совпадает с text с точностью до порядка слов и уровня"""
+        tokens = normalize_tokens(text)
+        return self.exact.get(tuple(sorted(tokens))) if tokens else None
+
+    def _similar_tokens(self, token: str) -> Set[str]:
+        """Токены словаря ролей, совпадающие с token точно или с опечаткой"""
+        similar = {token} if token in self.token_keys else set()
+        if len(token) < MIN_FUZZY_TOKEN_LENGTH:
+            return similar
+        trigrams = _trigrams(token)
+        shared: Dict[str, int] = {}
+        for trigram in trigrams:
+            for candidate in self.postings.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        for candidate, count in shared.items():
+            if count / (len(trigrams) + len(self.token_trigrams[candidate]) - count) >= TRIGRAM_THRESHOLD:
+                similar.add(candidate)
+        return similar
+
+    def resolve(self, text: str) -> Optional[str]:
+        """Каноническая роль для произвольного названия должности или None"""
+        tokens = normalize_tokens(text)
+        if not tokens:
+            return None
+        role = self.exact.get(tuple(sorted(tokens)))
+        if role is not None:
+            return role
+
+        # Нечеткий поиск: все значимые токены названия роли должны найтись в запросе (точно
+        # или с опечаткой), из таких ключей выбирается лучший по коэффициенту Жаккара
+        significant = significant_tokens(tokens)
+        matched: Dict[int, Set[str]] = {}
+        for token in significant:
+            for similar in self._similar_tokens(token):
+                for position in self.token_keys[similar]:
+                    matched.setdefault(position, set()).add(similar)
+        best_role, best_score = None, ROLE_MATCH_THRESHOLD
+        for position in sorted(matched):
+            common = len(matched[position])
+            if common < len(self.key_tokens[position]):
+                continue
+            score = common / (len(significant) + len(self.key_tokens[position]) - common)
+            if score > best_score or (best_role is None and score == best_score):
+                best_role, best_score = self.key_roles[position], score
+        return best_role
+
+
+ROLE_INDEX = RoleIndex({role: ROLE_ALIASES.get(role, []) for role in REQUIRED_SKILLS_MAP})
+
+
+@lru_cache(maxsize=4096)
+def resolve_role(target_position: str) -> Optional[str]:
+    """Каноническая роль для названия должности (результат кэшируется)"""
+    return ROLE_INDEX.resolve(target_position)
+
+
+# Кэш ролей пользователей: tg_id -> (исходная должность, роль)
+_USER_ROLES: Dict[str, Tuple[str, Optional[str]]] = {}
+_USER_ROLES_LOCK = threading.Lock()
+
+
+def resolve_user_role(user_id, target_position: Optional[str]) -> Optional[str]:
+    """Роль пользователя: распознается один раз и пересчитывается только при смене должности"""
+    if not target_position:
+        return None
+    key = str(user_id)
+    cached = _USER_ROLES.get(key)
+    if cached is not None and cached[0] == target_position:
+        return cached[1]
+    role = resolve_role(target_position)
+    with _USER_ROLES_LOCK:
+        _USER_ROLES[key] = (target_position, role)
+    return role
+
+
+if __name__ == "__main__":
+    import time
+
+    samples = ["backend разработчик", "DevOps-инженер", "Junior Python developer", "фронтенд-разработчик",
+               "Тестировщик ПО", "Data Scientist", "дата саентист", "системный админ", "андроид разработчик",
+               "ML engineer", "бизнес-аналитик", "повар", "разработчик", "Java разработчик", "Go developer",
+               "C++ программист", "1С программист", "Data Engineer", "Python backend developer",
+               "бекендер", "девопс-инжинер"]
+    for sample in samples:
+        print(f"{sample!r:30} -> {ROLE_INDEX.resolve(sample)}")
+
+    repeats = 2000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sample in samples:
+            ROLE_INDEX.resolve(sample)
+    elapsed = (time.perf_counter() - start) / (repeats * len(samples))
+    print(f"Без кэша: {elapsed * 1e6:.1f} мкс на запрос")
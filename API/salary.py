@@ -0,0 +1,77 @@
+"""Нормализация зарплат: структурированные поля и пересчет в рубли по статической таблице курсов"""
+import re
+from typing import Dict, Optional, Tuple
+
+
+# Ориентировочные курсы валют HH.ru к рублю. Таблица локальная, чтобы сбор и
+# поиск не зависели от внешних сервисов; обновляется вручную
+RUB_RATES = {
+    "RUR": 1.0,
+    "RUB": 1.0,
+    "USD": 90.0,
+    "EUR": 98.0,
+    "KZT": 0.18,
+    "BYR": 28.0,
+    "BYN": 28.0,
+    "UZS": 0.0072,
+    "KGS": 1.03,
+    "AZN": 53.0,
+    "GEL": 33.0,
+}
+
+_SALARY_RE = re.compile(r'(?:(от|до)\s*)?([\d\s]+\d)(?:\s*-\s*([\d\s]+\d))?\s*([A-Za-zА-Яа-я]{3})?')
+
+
+def to_rub(amount: Optional[float], currency: Optional[str]) -> Optional[float]:
+    """Пересчитывает сумму в рубли. None, если сумма или курс неизвестны"""
+    if amount is None:
+        return None
+    rate = RUB_RATES.get((currency or "RUR").upper())
+    if rate is None:
+        return None
+    return round(amount * rate)
+
+
+def structured_salary(salary: Optional[Dict]) -> Dict:
+    """Структурированные поля зарплаты из объекта salary HH.ru"""
+    salary = salary or {}
+    salary_from = salary.get('from')
+    salary_to = salary.get('to')
+    currency = salary.get('currency') if (salary_from or salary_to) else None
+    return {
+        "salary_from": salary_from,
+        "salary_to": salary_to,
+        "currency": currency,
+        "gross": salary.get('gross'),
+        "salary_rub_from": to_rub(salary_from, currency),
+        "salary_rub_to": to_rub(salary_to, currency),
+    }
+
+
+def parse_salary_range(salary: Optional[str]) -> Tuple[Optional[float], Optional[float], Optional[str]]:
+    """Разбирает строку зарплаты ("от 80 000 RUR", "100 000 - 150 000 RUR") в (min, max, валюта)"""
+    if not salary or not isinstance(salary, str):
+        return None, None, None
+    match = _SALARY_RE.search(salary)
+    if not match:
+        return None, None, None
+    prefix, first, second, currency = match.groups()
+    first_value = float(first.replace(" ", ""))
+    currency = (currency or "RUR").upper()
+    if second:
+        return first_value, float(second.replace(" ", "")), currency
+    if prefix == "до":
+        return None, first_value, currency
+    return first_value, None, currency
+
+
+def vacancy_salary_rub(vacancy: Dict) -> Tuple[Optional[float], Optional[float]]:
+    """Диапазон зарплаты вакансии в рублях.
+
+    Берет поля salary_rub_from/salary_rub_to, которые пишет сборщик, а для
+    старых файлов без них — разбирает строку salary.
+    """
+    if "salary_rub_from" in vacancy or "salary_rub_to" in vacancy:
+        return vacancy.get("salary_rub_from"), vacancy.get("salary_rub_to")
+    low, high, currency = parse_salary_range(vacancy.get("salary"))
+    return to_rub(low, currency), to_rub(high, currency)
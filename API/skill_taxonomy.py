@@ -0,0 +1,254 @@
+"""Общая таксономия навыков: синонимы, навыки и категории курсов.
+
+Все формы навыков компилируются в одно регулярное выражение с границами
+слов, поэтому извлечение навыков — один проход по тексту вместо десятков
+проверок подстрок. Используется и API, и сборщиками данных.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Синонимы навыков для нормализации
+SKILLS_SYNONYMS = {
+    "python": ["python", "python3", "питон"],
+    "javascript": ["javascript", "js", "ecmascript"],
+    "java": ["java", "джава", "джаву"],
+    "sql": ["sql", "mysql", "postgresql", "базы данных"],
+    "html": ["html", "html5"],
+    "css": ["css", "css3"],
+    "react": ["react", "react.js", "reactjs"],
+    "vue": ["vue", "vue.js", "vuejs"],
+    "angular": ["angular", "angular.js", "angularjs"],
+    "node": ["node", "node.js", "nodejs"],
+    "docker": ["docker", "докер"],
+    "kubernetes": ["kubernetes", "k8s"],
+    "aws": ["aws", "amazon web services"],
+    "git": ["git", "гит"],
+    "linux": ["linux", "unix"],
+    "machine learning": ["machine learning", "ml", "машинное обучение"],
+    "data science": ["data science", "data analysis", "анализ данных"],
+    "data analysis": ["data analysis", "анализ данных", "data analytics"],
+    "business intelligence": ["business intelligence", "bi", "бизнес-аналитика"],
+    "go": ["go", "golang", "go-разработчик", "go-разработка", "go developer"],
+    "typescript": ["typescript", "ts"],
+    "django": ["django", "django framework"],
+    "rest api": ["rest api", "rest", "restful api", "rest-api"],
+    "ci/cd": ["ci/cd", "ci cd"],
+    # Виды тестирования: в вакансиях чаще по-русски, в требованиях ролей — по-английски
+    "manual testing": ["manual testing", "ручное тестирование"],
+    "functional testing": ["functional testing", "функциональное тестирование"],
+    "regression testing": ["regression testing", "регрессионное тестирование"],
+    "automation testing": ["automation testing", "автоматизированное тестирование", "автотестирование"],
+}
+
+# Короткие формы, которые в свободном тексте чаще обычные слова ("let's go", "the rest"):
+# они нормализуют название навыка целиком (поле навыков анкеты), но не ищутся в тексте
+WHOLE_NAME_ONLY = {"go", "ts", "rest"}
+
+# Навыки и направления, которые извлекаются из текста как есть
+EXTRA_SKILLS = [
+    "computer vision",
+    "программирование", "разработка", "тестирование", "автоматизация",
+]
+
+# Навыки, которые ищутся в описаниях курсов Stepik
+COURSE_SKILLS = [
+    'python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
+    'html', 'css', 'sass', 'less', 'typescript',
+    'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring',
+    'sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'elasticsearch',
+    'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'jenkins', 'git',
+    'machine learning', 'deep learning', 'tensorflow', 'pytorch', 'pandas', 'numpy',
+    'linux', 'bash', 'nginx', 'apache',
+    'rest api', 'graphql', 'microservices', 'ci/cd',
+    'agile', 'scrum', 'kanban', 'jira'
+]
+
+# Категории курсов и ключевые слова (порядок задает приоритет категории).
+# Слова ищутся целиком, поэтому множественное число и русские падежи перечислены явно
+# (русские формы от 4 букв допускают окончание до 2 букв, см. _RU_SUFFIX)
+COURSE_CATEGORIES = {
+    'Python': ['python', 'django', 'flask', 'fastapi'],
+    'JavaScript': ['javascript', 'js', 'node', 'react', 'vue', 'angular'],
+    'Java': ['java', 'spring'],
+    'Web Development': ['web', 'fullstack', 'full-stack', 'html', 'css', 'веб'],
+    'Frontend': ['frontend', 'front-end'],
+    'Backend': ['backend', 'back-end'],
+    'Data Science': ['data science', 'data scientist', 'data scientists', 'ml', 'machine learning'],
+    'AI': ['ai', 'artificial intelligence', 'нейросеть', 'нейросети', 'нейросетей', 'нейросетями'],
+    'DevOps': ['devops', 'docker', 'kubernetes', 'aws', 'cloud'],
+    'Mobile': ['mobile', 'android', 'ios', 'react native', 'flutter'],
+    'Cybersecurity': ['cybersecurity', 'security', 'безопасность', 'безопасности', 'hacking', 'hacker', 'hackers'],
+    'Database': ['database', 'databases', 'sql', 'postgresql', 'mysql', 'mongodb',
+                 'базы данных', 'баз данных', 'базам данных', 'базами данных', 'базах данных'],
+    'Game Development': ['game', 'games', 'gamedev', 'геймдев', 'игр', 'игры', 'unity', 'unreal'],
+    'Design': ['design', 'designer', 'дизайн', 'ui', 'ux', 'figma'],
+    'Management': ['project management', 'project manager', 'agile', 'scrum'],
+    'QA': ['qa', 'testing', 'test', 'tests', 'tester', 'testers', 'тестирование', 'тестирования',
+           'тестированию', 'тестировщик']
+}
+
+# Сколько букв окончания допускается после русской формы ("питоне", "докером").
+# Только для русских слов не короче _RU_SUFFIX_MIN_WORD, иначе "гит" находится в "гитаре"
+_RU_SUFFIX = 2
+_RU_SUFFIX_MIN_WORD = 4
+_RU_END_RE = re.compile(r'[а-яё]{%d,}$' % _RU_SUFFIX_MIN_WORD)
+
+
+def _compile_trie(surfaces: Iterable[str]) -> "re.Pattern":
+    """Компилирует формы в регулярку-префиксное дерево.
+
+    Общие префиксы разбираются один раз, поэтому стоимость поиска почти не
+    растет с размером словаря (в отличие от перебора подстрок или плоской
+    альтернации). Русские формы от _RU_SUFFIX_MIN_WORD букв допускают
+    короткое окончание.
+    """
+    trie: Dict[str, dict] = {}
+    for surface in surfaces:
+        node = trie
+        for char in surface:
+            node = node.setdefault(char, {})
+        node[''] = _RU_END_RE.search(surface) is not None
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+        if '' in node:
+            ending = f'[а-яё]{{0,{_RU_SUFFIX}}}' if node[''] else ''
+            if not branches:
+                return ending
+            return '(?:' + '|'.join(branches + [ending]) + ')'
+        return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+    first_chars = ''.join(sorted({re.escape(surface[0]) for surface in surfaces}))
+    # Быстрая проверка первого символа отсекает большинство позиций до разбора дерева
+    return re.compile(r'(?<!\w)(?=[' + first_chars + r'])' + build(trie) + r'(?!\w)')
+
+
+class SkillMatcher:
+    """Скомпилированный словарь навыков: одна регулярка на все формы.
+
+    Каждая форма отображается в один или несколько канонических навыков.
+    Результаты возвращаются в порядке определения канонических навыков.
+    Формы из whole_only распознаются только как название навыка целиком
+    (normalize, knows), но не ищутся в тексте (find).
+    """
+
+    def __init__(self, forms: Dict[str, Iterable[str]], whole_only: Iterable[str] = ()):
+        self._canonical_order: Dict[str, int] = {}
+        self._forms: Dict[str, Tuple[str, ...]] = {}
+        mapping: Dict[str, List[str]] = {}
+        for canonical, surfaces in forms.items():
+            self._canonical_order.setdefault(canonical, len(self._canonical_order))
+            for surface in surfaces:
+                targets = mapping.setdefault(surface.lower(), [])
+                if canonical not in targets:
+                    targets.append(canonical)
+        self._forms = {surface: tuple(targets) for surface, targets in mapping.items()}
+
+        whole_only = {surface.lower() for surface in whole_only}
+        searchable = [surface for surface in self._forms if surface not in whole_only]
+        self._pattern = _compile_trie(searchable) if searchable else None
+
+    def _lookup(self, matched: str) -> Tuple[str, ...]:
+        for cut in range(_RU_SUFFIX + 1):
+            surface = matched[:len(matched) - cut] if cut else matched
+            targets = self._forms.get(surface)
+            if targets and (not cut or _RU_END_RE.search(surface)):
+                return targets
+        return ()
+
+    def find(self, text: str) -> List[str]:
+        """Все канонические навыки, встретившиеся в тексте (без повторов)"""
+        if not text or self._pattern is None:
+            return []
+        found = set()
+        for match in self._pattern.finditer(text.lower()):
+            found.update(self._lookup(match.group(0)))
+        return sorted(found, key=self._canonical_order.__getitem__)
+
+    def first(self, text: str) -> Optional[str]:
+        """Канонический навык с наивысшим приоритетом, встретившийся в тексте"""
+        found = self.find(text)
+        return found[0] if found else None
+
+    def knows(self, skill: str) -> bool:
+        """Есть ли название навыка целиком в словаре"""
+        return skill.lower().strip() in self._forms
+
+    def normalize(self, skill: str) -> str:
+        """Приводит название навыка целиком к каноническому, иначе возвращает его в нижнем регистре"""
+        skill = skill.lower().strip()
+        targets = self._forms.get(skill)
+        return targets[0] if targets else skill
+
+
+def _extraction_forms() -> Dict[str, List[str]]:
+    forms = {canonical: list(synonyms) for canonical, synonyms in SKILLS_SYNONYMS.items()}
+    for skill in EXTRA_SKILLS:
+        forms.setdefault(skill, [skill])
+    return forms
+
+
+# Навыки из свободного текста пользователя (API)
+skill_matcher = SkillMatcher(_extraction_forms(), whole_only=WHOLE_NAME_ONLY)
+# Навыки и категории курсов (сборщик Stepik)
+course_skill_matcher = SkillMatcher({skill.title(): [skill] for skill in COURSE_SKILLS})
+course_category_matcher = SkillMatcher(COURSE_CATEGORIES)
+
+
+def extract_skills(text: str) -> List[str]:
+    """Извлекает нормализованные навыки из текста за один проход"""
+    return skill_matcher.find(text)
+
+
+def normalize_skill(skill: str) -> str:
+    """Нормализует название навыка"""
+    return skill_matcher.normalize(skill)
+
+
+def is_known_skill(skill: str) -> bool:
+    """Есть ли навык в таксономии (как каноническое название или синоним)"""
+    return skill_matcher.knows(skill)
+
+
+if __name__ == "__main__":
+    # Бенчмарк: прежний перебор подстрок против скомпилированного словаря на описаниях вакансий
+    import sys
+    import time
+    from pathlib import Path
+
+    sys.path.append(str(Path(__file__).parent))
+    from corpus import get_vacancy_corpus
+
+    def legacy_extract(text: str) -> List[str]:
+        text_lower = text.lower()
+        found = set()
+        for canonical, synonyms in SKILLS_SYNONYMS.items():
+            if any(synonym in text_lower for synonym in synonyms):
+                found.add(canonical)
+        for skill in EXTRA_SKILLS:
+            if skill in text_lower:
+                found.add(skill)
+        return list(found)
+
+    def legacy_course_skills(text: str) -> List[str]:
+        text_lower = text.lower()
+        return [skill.title() for skill in COURSE_SKILLS if skill in text_lower]
+
+    texts = [v.get("description") or "" for v in get_vacancy_corpus().vacancies]
+    megabytes = sum(len(t.encode("utf-8")) for t in texts) / 1024 / 1024
+    print(f"Корпус: {len(texts)} описаний, {megabytes:.2f} МБ")
+
+    for name, function in (
+        ("перебор синонимов", legacy_extract),
+        ("скомпилированный словарь", extract_skills),
+        ("навыки курсов: перебор", legacy_course_skills),
+        ("навыки курсов: словарь", course_skill_matcher.find),
+    ):
+        start = time.perf_counter()
+        repeats = 5
+        for _ in range(repeats):
+            for text in texts:
+                function(text)
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"  {name:30s} {len(texts) / elapsed:10.0f} текстов/с  {megabytes / elapsed:7.2f} МБ/с")
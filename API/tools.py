@@ -1,13 +1,26 @@
+import logging
 from typing import Dict, List, Optional, Any
 from pydantic import BaseModel, Field
-from langchain.tools.base import tool
+from langchain_core.tools import tool
 # from langchain.callbacks.manager import CallbackManagerForToolRun
 
-import json
-import re
 from pathlib import Path
 from difflib import SequenceMatcher
 
+import numpy as np
+
+from advice import get_advice_base
+from corpus import get_vacancy_corpus, get_course_corpus
+from embeddings import encode_query, is_semantic
+from facets import parse_salary_amount
+from planner import build_learning_plan
+from role_skills import cluster_key
+from roles import resolve_role
+from ranking import Ranking, RankingCache, TopK
+import skill_taxonomy
+
+logger = logging.getLogger(__name__)
+
 
 # Модели данных для профиля пользователя
 class UserProfile(BaseModel):
@@ -46,62 +59,29 @@ def load_vacancies_data(path: str | Path = None) -> List[Dict]:
     Возвращает всегда список словарей вакансий. Поддерживает два формата файла:
     - Список вакансий (корневой элемент — массив)
     - Словарь {"vacancies": [...]}
+    Файл читается один раз и перечитывается только при изменении.
     """
-    if path is None:
-        path = Path(__file__).parent / 'jsons' / 'processed_vacancies.json'
-    else:
-        path = Path(path)
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Если файл содержит объект с ключом 'vacancies', вернём его
-            if isinstance(data, dict) and 'vacancies' in data:
-                return data.get('vacancies') or []
-            # Если массив — вернём как есть
-            if isinstance(data, list):
-                return data
-            # Неподдерживаемый формат — вернём пустой список
-            return []
-    except FileNotFoundError:
-        return []
-
-
-def load_courses_data(path: str | Path = None) -> Dict:
+    return get_vacancy_corpus(path).vacancies
+
+
+def load_courses_data(path: str | Path = None) -> List[Dict]:
     """Загрузка данных о курсах из JSON файла"""
-    print("Вызвана функция: load_courses_data")
-    if path is None:
-        path = Path(__file__).parent / 'jsons' / 'courses.json'
-    else:
-        path = Path(path)
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"courses": []}
-
-
-# Синонимы навыков для нормализации
-SKILLS_SYNONYMS = {
-    "python": ["python", "python3", "питон"],
-    "javascript": ["javascript", "js", "ecmascript"],
-    "java": ["джава", "джаву"],
-    "sql": ["sql", "mysql", "postgresql", "базы данных"],
-    "html": ["html", "html5"],
-    "css": ["css", "css3"],
-    "react": ["react", "react.js", "reactjs"],
-    "vue": ["vue", "vue.js", "vuejs"],
-    "angular": ["angular", "angular.js", "angularjs"],
-    "node": ["node", "node.js", "nodejs"],
-    "docker": ["docker", "докер"],
-    "kubernetes": ["kubernetes", "k8s"],
-    "aws": ["aws", "amazon web services"],
-    "git": ["git", "гит"],
-    "linux": ["linux", "unix"],
-    "machine learning": ["machine learning", "ml", "машинное обучение"],
-    "data science": ["data science", "data analysis", "анализ данных"],
-    "data analysis": ["data analysis", "анализ данных", "data analytics"],
-    "business intelligence": ["business intelligence", "bi", "бизнес-аналитика"],
-}
+    return get_course_corpus(path).courses
+
+
+# Вес семантической близости в гибридной оценке вакансии (остальное — совпадение навыков).
+# Учитывается только с моделью эмбеддингов, с хэширующим энкодером оценка — совпадение навыков
+SEMANTIC_WEIGHT = 0.3
+# Вес полнотекстовой оценки по запросу пользователя (нормированной к лучшей вакансии)
+QUERY_WEIGHT = 0.4
+# Размер страницы выдачи вакансий и глубина кэшируемого ранжирования
+VACANCIES_PAGE_SIZE = 5
+MAX_VACANCIES_PAGE_SIZE = 20
+RANKING_DEPTH = 50
+_RANKING_CACHE = RankingCache(max_entries=256)
+# Сколько статей базы советов искать и какие из них предлагать как смежные темы
+ADVICE_TOP_K = 3
+ADVICE_RELATED_RATIO = 0.4
 
 
 # Функция №1: Анализ профиля пользователя
@@ -142,32 +122,7 @@ SKILLS_SYNONYMS = {
 
 def extract_skills_from_text(text: str) -> List[str]:
     """Извлекает навыки из текста"""
-    text_lower = text.lower()
-    found_skills = set()
-
-    # Поиск навыков по синонимам
-    for normalized_skill, synonyms in SKILLS_SYNONYMS.items():
-        for synonym in synonyms:
-            if synonym in text_lower:
-                found_skills.add(normalized_skill)
-                break
-
-    # Дополнительные паттерны для извлечения
-    skill_patterns = [
-        r'\b(python|javascript|java|sql|html|css|react|vue|angular|node|docker|kubernetes|aws|git|linux)\b',
-        r'\b(machine learning|data science|data analysis|business intelligence|computer vision)\b',
-        r'\b(программирование|разработка|анализ данных|тестирование|автоматизация)\b'
-    ]
-
-    for pattern in skill_patterns:
-        matches = re.findall(pattern, text_lower)
-        for match in matches:
-            if isinstance(match, tuple):
-                match = match[0]
-            normalized_skill = normalize_skill(match)
-            found_skills.add(normalized_skill)
-
-    return list(found_skills)
+    return skill_taxonomy.extract_skills(text)
 
 def extract_experience(text: str) -> str:
     """Извлекает информацию об опыте"""
@@ -206,13 +161,7 @@ def extract_education_level(text: str) -> str:
 
 def normalize_skill(skill: str) -> str:
     """Нормализует название навыка"""
-    skill = skill.lower().strip()
-
-    for normalized_skill, synonyms in SKILLS_SYNONYMS.items():
-        if skill in synonyms:
-            return normalized_skill
-
-    return skill
+    return skill_taxonomy.normalize_skill(skill)
 
 
 def calculate_skill_similarity(skill1: str, skill2: str) -> float:
@@ -231,22 +180,31 @@ def format_skills_list(skills: List[str]) -> str:
 
 # Функция №2: Подбор вакансий по профилю
 @tool
-def find_matching_vacancies(user_skills: Optional[List[str]] = None, experience_level: Optional[str] = None) -> str:
+def find_matching_vacancies(user_skills: Optional[List[str]] = None, experience_level: Optional[str] = None,
+                            query: Optional[str] = None, location: Optional[str] = None,
+                            schedule: Optional[str] = None, employment: Optional[str] = None,
+                            min_salary: Optional[int] = None, offset: int = 0,
+                            limit: int = VACANCIES_PAGE_SIZE) -> str:
     """
     Подбирает подходящие вакансии на основе навыков пользователя и уровня опыта.
 
     Args:
         user_skills: Список навыков пользователя
         experience_level: Уровень опыта (нет опыта, beginner, junior, middle)
+        query: Свободный текст о желаемой сфере или условиях (например, "финтех", "геймдев", "удалёнка")
+        location: Город (например, "Москва", "СПб")
+        schedule: График работы (например, "удалённо", "полный день")
+        employment: Тип занятости (например, "полная", "частичная", "проектная")
+        min_salary: Минимальная зарплата в рублях (например, 100000)
+        offset: Сколько вакансий пропустить (для запроса «покажи ещё» передай число уже показанных)
+        limit: Сколько вакансий показать (по умолчанию 5)
 
     Returns:
         str: Отформатированный список подходящих вакансий
     """
-    print(f"Вызвана функция: find_matching_vacancies")
-    print(f"DEBUG: Переданные навыки: {user_skills}")
-    print(f"DEBUG: Переданный опыт: {experience_level}")
-
-    vacancies_data = load_vacancies_data()
+    logger.debug("find_matching_vacancies: навыки=%s, опыт=%s, запрос=%s, город=%s, график=%s, занятость=%s, "
+                 "зарплата от=%s, offset=%s, limit=%s", user_skills, experience_level, query, location, schedule,
+                 employment, min_salary, offset, limit)
 
     # Если навыки/опыт не переданы — используем заглушки (лучше, если агент передаёт их)
     if not user_skills:
@@ -254,58 +212,104 @@ def find_matching_vacancies(user_skills: Optional[List[str]] = None, experience_
     if not experience_level:
         experience_level = 'Нет опыта'
 
-    matching_vacancies = []
+    offset = max(offset or 0, 0)
+    limit = min(max(limit or VACANCIES_PAGE_SIZE, 1), MAX_VACANCIES_PAGE_SIZE)
 
-    for vacancy in vacancies_data:
-        # Проверяем соответствие уровню опыта
-        # В данных поле опыта может называться по-разному
-        vacancy_exp = (vacancy.get("experience") or vacancy.get("experience_level") or "").lower()
-        if experience_level.lower() in ("нет опыта", "без опыта") and "от 3" in vacancy_exp:
-            continue
+    corpus = get_vacancy_corpus()
+    ranking = rank_vacancies(corpus, user_skills, experience_level, query, location, schedule,
+                             employment, parse_salary_amount(min_salary), depth=offset + limit)
 
-        # Расчет соответствия навыков
-        # В разных источниках навыки могут называться по-разному
-        vacancy_skills = vacancy.get("skills") or vacancy.get("required_skills") or []
-        match_score = calculate_vacancy_match(user_skills, vacancy_skills)
+    if ranking is None:
+        return f"К сожалению, по запросу «{query}» не найдено подходящих вакансий. Попробуйте сформулировать его иначе."
+    if ranking.total == 0:
+        return "К сожалению, по вашему запросу не найдено подходящих вакансий. Попробуйте расширить список навыков."
 
-        if match_score > 0.3:  # Пороговое значение
-            matching_vacancies.append({
-                "vacancy": vacancy,
-                "match_score": match_score
-            })
+    page = ranking.page(offset, limit)
+    if not page:
+        return f"Больше подходящих вакансий нет: всего найдено {ranking.total}."
 
-    # Сортировка по релевантности
-    matching_vacancies.sort(key=lambda x: x["match_score"], reverse=True)
+    # Форматируем только выбранную страницу
+    selected = [{"vacancy": corpus.vacancies[position], "match_score": score} for score, position in page]
+    return format_vacancies_response(selected, start=offset + 1, total=ranking.total)
 
-    if not matching_vacancies:
-        return "К сожалению, по вашему запросу не найдено подходящих вакансий. Попробуйте расширить список навыков."
 
-    return format_vacancies_response(matching_vacancies[:5])
+def rank_vacancies(corpus, user_skills: List[str], experience_level: str, query: Optional[str] = None,
+                   location: Optional[str] = None, schedule: Optional[str] = None,
+                   employment: Optional[str] = None, min_salary: Optional[float] = None,
+                   depth: int = VACANCIES_PAGE_SIZE) -> Optional[Ranking]:
+    """Ранжирует вакансии и кэширует результат для следующих страниц.
 
-  
+    Возвращает None, если полнотекстовый запрос не совпал ни с одной вакансией.
+    """
+    cache_key = (corpus.version, tuple(sorted(skill.lower() for skill in user_skills)),
+                 experience_level.lower(), (query or "").strip().lower(), location, schedule,
+                 employment, min_salary)
+    ranking = _RANKING_CACHE.get(cache_key, depth)
+    if ranking is not None:
+        return ranking
+
+    vacancies_data = corpus.vacancies
+
+    # Навыки пользователя в идентификаторах корпуса: совпадение — пересечение множеств
+    vacancy_skills = corpus.skills
+    user_skill_ids = vacancy_skills.vocabulary.lookup(user_skills)
+
+    # Семантическая близость профиля ко всем вакансиям одним матричным умножением
+    semantic_scores = corpus.embeddings.similarities(encode_query(" ".join(user_skills))) if is_semantic() else None
+
+    # Полнотекстовый запрос сужает выдачу до вакансий, где он встречается
+    query_scores = None
+    if query and query.strip():
+        query_scores = corpus.fulltext.scores(query)
+        max_query_score = float(query_scores.max()) if len(query_scores) else 0.0
+        if max_query_score <= 0:
+            return None
+        query_scores = query_scores / max_query_score
+
+    # Кандидаты — пересечение фасетных фильтров (включая опыт) и совпадений по запросу
+    candidate_mask = corpus.facets.filter(location=location, schedule=schedule, employment=employment,
+                                          experience_level=experience_level, min_salary=min_salary)
+    if query_scores is not None:
+        query_mask = query_scores > 0
+        candidate_mask = query_mask if candidate_mask is None else candidate_mask & query_mask
+    candidates = range(len(vacancies_data)) if candidate_mask is None else np.flatnonzero(candidate_mask)
+
+    # Ранжирование глубже запрошенной страницы, чтобы "показать ещё" шло из кэша
+    selector = TopK(max(depth, RANKING_DEPTH))
+
+    for position in candidates:
+        skill_score = vacancy_skills.overlap(user_skill_ids, position)
+        match_score = (calculate_hybrid_score(skill_score, float(semantic_scores[position]))
+                       if semantic_scores is not None else skill_score)
+        if query_scores is not None:
+            match_score = (1 - QUERY_WEIGHT) * match_score + QUERY_WEIGHT * float(query_scores[position])
+
+        if match_score > 0.3:  # Пороговое значение
+            selector.push(match_score, int(position))
 
+    ranking = Ranking(selector.result(), selector.seen)
+    _RANKING_CACHE.put(cache_key, ranking)
+    return ranking
 
-def calculate_vacancy_match(user_skills: List[str], vacancy_skills: List[str]) -> float:
-    """Рассчитывает соответствие между навыками пользователя и вакансии"""
-    if not user_skills or not vacancy_skills:
-        return 0.0
 
-    matched_skills = 0
-    for vacancy_skill in vacancy_skills:
-        for user_skill in user_skills:
-            if calculate_skill_similarity(user_skill, vacancy_skill) > 0.7:
-                matched_skills += 1
-                break
+def ranking_cache_stats() -> Dict:
+    """Попадания в кэш ранжирований вакансий (для /stats)"""
+    return _RANKING_CACHE.stats()
 
-    return matched_skills / len(vacancy_skills)
 
+def calculate_hybrid_score(skill_score: float, semantic_score: float) -> float:
+    """Комбинирует совпадение навыков с семантической близостью профиля и вакансии"""
+    return (1 - SEMANTIC_WEIGHT) * skill_score + SEMANTIC_WEIGHT * max(semantic_score, 0.0)
 
-def format_vacancies_response(vacancies: List[Dict]) -> str:
+
+def format_vacancies_response(vacancies: List[Dict], start: int = 1, total: Optional[int] = None) -> str:
     """Форматирует ответ с вакансиями. Всегда включает ссылки на вакансии."""
-    response = "🔍 Найдены подходящие вакансии:\n"
-    response += "❗ Обязательно переходите по ссылкам ниже, чтобы увидеть полное описание вакансий\n\n"
+    parts = [
+        "🔍 Найдены подходящие вакансии:\n",
+        "❗ Обязательно переходите по ссылкам ниже, чтобы увидеть полное описание вакансий\n\n",
+    ]
 
-    for i, vac_data in enumerate(vacancies, 1):
+    for i, vac_data in enumerate(vacancies, start):
         vacancy = vac_data["vacancy"]
         match_score = vac_data["match_score"]
 
@@ -330,18 +334,25 @@ def format_vacancies_response(vacancies: List[Dict]) -> str:
                     # общий fallback
                     url = f"{source.rstrip('/')}/vacancy/{vid}" if source else 'Ссылка не найдена'
 
-        response += f"{i}. {title}\n"
-        response += f"   🏢 {company}\n"
-        response += f"   💰 {salary}\n"
-        response += f"   📄 Требуемые навыки: {', '.join(skills_list)}\n"
-        response += f"   🎯 Совпадение: {match_score:.0%}\n"
-        response += f"   📍 {experience_str}\n"
-        # Принудительно добавляем ссылку, даже если она не найдена
-        response += f"   🔗 Ссылка на вакансию: {url or 'Не найдена'}\n"
-        response += "   " + "=" * 50 + "\n\n"
-
-    response += "Хотите увидеть больше вакансий или получить детали по конкретной позиции?"
-    return response
+        parts.append(
+            f"{i}. {title}\n"
+            f"   🏢 {company}\n"
+            f"   💰 {salary}\n"
+            f"   📄 Требуемые навыки: {', '.join(skills_list)}\n"
+            f"   🎯 Совпадение: {match_score:.0%}\n"
+            f"   📍 {experience_str}\n"
+            # Принудительно добавляем ссылку, даже если она не найдена
+            f"   🔗 Ссылка на вакансию: {url or 'Не найдена'}\n"
+            f"   {'=' * 50}\n\n"
+        )
+
+    shown = start + len(vacancies) - 1
+    if total is not None and shown < total:
+        parts.append(f"Показаны вакансии {start}–{shown} из {total}. "
+                     "Хотите увидеть больше вакансий или получить детали по конкретной позиции?")
+    else:
+        parts.append("Хотите увидеть больше вакансий или получить детали по конкретной позиции?")
+    return "".join(parts)
 
 #print(find_matching_vacancies())
 
@@ -359,99 +370,34 @@ def create_learning_plan(skills: List[str], target_position: str) -> str:
     Returns:
         str: Структурированный учебный план
     """
-    print("Вызвана функция: create_learning_plan")
+    logger.debug("create_learning_plan: навыки=%s, должность=%s", skills, target_position)
 
     # user_skills должны прийти из данных о пользователе
     # target_position может прийти из сообщения пользователя
     #target_position = "frontend-разработчик"
     #skills = ['Git', 'Go', 'React', 'JavaScript']
 
-    courses_data = load_courses_data()
-    #print(f"Результат загрузки курсов {courses_data[2:4]}")
-
-    # Определяем требуемые навыки для целевой позиции
-    required_skills_map = {
-        "python-разработчик": ["Python", "Django", "FastAPI", "PostgreSQL", "Docker", "Git", "REST API", "Linux"],
-        "backend-разработчик": ["Python", "FastAPI", "Django", "PostgreSQL", "Redis", "Docker", "REST API", "SQL"],
-        "frontend-разработчик": ["JavaScript", "TypeScript", "React", "Node.js", "CSS", "HTML", "Webpack", "CI/CD"],
-        "qa инженер": ["Python", "Postman", "PostgreSQL", "Functional Testing", "Regression Testing", "Manual Testing",
-                       "Automation Testing", "Bug Tracking Systems"],
-        "data scientist": ["Python", "pandas", "Numpy", "scikit-learn", "PyTorch", "Machine Learning", "Deep Learning",
-                           "Data Analysis", "Statistics"],
-        "devops инженер": ["Linux", "Docker", "Kubernetes", "CI/CD", "Monitoring Tools", "Container Orchestration",
-                           "Infrastructure Automation"],
-        "system administrator": ["Linux", "Shell Scripting", "Networking", "Virtualization", "Security Practices",
-                                 "Database Administration"],
-        "mobile-разработчик": ["Swift", "Objective-C", "Kotlin", "Java", "iOS SDK", "Android SDK", "Firebase",
-                               "Xamarin", "Flutter"],
-        "ml-инженер": ["Python", "PyTorch", "TensorFlow", "Machine Learning", "Deep Learning", "Data Processing",
-                       "Model Deployment"],
-        "business analyst": ["SQL", "Excel", "Data Analysis", "Requirements Gathering", "Stakeholder Management",
-                             "Product Documentation"]
-    }
-
-    target_skills = required_skills_map.get(target_position.lower(), [])
-    user_skills_lower = [skill.lower() for skill in skills]
-    target_skills_lower = [skill.lower() for skill in target_skills]
-    # Преобразуем массивы в множества
-    current_set = set(user_skills_lower)
-    required_set = set(target_skills_lower)
-
-    # Находим недостающие навыки (разность множеств)
-    missing_skills_set = required_set - current_set
-    missing_skills = list(missing_skills_set)
+    course_corpus = get_course_corpus()
 
+    # Свободное название должности приводится к роли из карты требований,
+    # а нераспознанное — к группе вакансий с тем же названием ("java developer")
+    role = resolve_role(target_position) or cluster_key(target_position)
+    plan = build_learning_plan(skills, role, course_corpus)
+    missing_skills = plan["missing_skills"]
 
+    if not plan["target_skills"]:
+        return (f"😔 Пока не знаю требований для должности \"{target_position}\": ее нет в карте ролей и "
+                f"по ней мало вакансий. Попробуйте указать должность иначе, например \"backend-разработчик\".")
     if not missing_skills:
         return f"Отлично! Ваши текущие навыки уже соответствуют требованиям для {target_position}. Рекомендуется сосредоточиться на практике и создании проектов для портфолио."
 
-    # Подбираем курсы для недостающих навыков
-    recommended_courses = []
-    unique_courses = set()  # Множество для хранения уникальных курсов
-
-    for skill in missing_skills:
-        matching_courses = find_courses_for_skill(skill, courses_data)
-        if matching_courses:
-            for course in matching_courses[:2]:
-                if course['id'] not in unique_courses:
-                    recommended_courses.append(course)
-                    unique_courses.add(course['id'])
-
-    # Упорядочиваем курсы по зависимости навыков
-    sorted_courses = []
-    current_skills = set(user_skills_lower)  # Текущие навыки пользователя
-
-    while recommended_courses:
-        found_course = False
-        for course in recommended_courses:
-            course_skills = set(course.get("skills", []))
-            if (course_skills == {}) or (course_skills.issubset(current_skills)):
-                sorted_courses.append(course)
-                current_skills.update(course.get("category", []))  # Добавляем навыки, которые можно получить от курса
-                recommended_courses.remove(course)
-                found_course = True
-                break
-        if not found_course:
-            break  # Если не нашли курс, который можно пройти с текущими навыками, завершаем цикл
-
-    return format_learning_plan_response(target_position, missing_skills, sorted_courses)
-
-
-def find_courses_for_skill(skill: str, courses_data: Dict) -> List[Dict]:
-    """Находит курсы для развития конкретного навыка"""
-    matching_courses = []
-    for course in courses_data:
-        course_categorys = course.get("category", [])
-        for course_category in course_categorys:
-            if calculate_skill_similarity(skill, course_category) > 0.7:
-                matching_courses.append(course)
-
-    return matching_courses
-
-
-def format_learning_plan_response(target_position: str, missing_skills: List[str], courses: List[Dict]) -> str:
+    return format_learning_plan_response(target_position, missing_skills, plan["courses"], plan["total_hours"])
+
+
+def format_learning_plan_response(target_position: str, missing_skills: List[str], courses: List[Dict],
+                                  total_hours: Optional[float] = None) -> str:
     """Форматирует ответ с учебным планом"""
-    response = f"""🎓 Учебный план для подготовки к должности "{target_position}"
+    parts = [f"""🎓 Учебный план для подготовки к должности "{target_position}"
 📋 Помимо ваших навыков могут потребоваться:
 {format_skills_list(missing_skills)}
 
@@ -459,18 +405,21 @@ def format_learning_plan_response(target_position: str, missing_skills: List[str
 
 📚 Рекомендуемые курсы:
 
-"""
+"""]
 
     for i, course in enumerate(courses, 1):
-        response += f"{i}. {course.get('title', 'Название курса')}\n"
-        response += f"   📺 Платформа: {course.get('platform', 'Не указана')}\n"
-        response += f"   ⏱️ Длительность: {course.get('duration', 'Не указана')}\n"
-        response += f"   🎯 Уровень: {course.get('level', 'Не указан')}\n"
-        response += f"   🔗 Ссылка: {course.get('url', 'Не доступна')}\n\n"
+        parts.append(f"{i}. {course.get('title', 'Название курса')}\n"
+                     f"   📺 Платформа: {course.get('platform', 'Не указана')}\n"
+                     f"   ⏱️ Длительность: {course.get('duration', 'Не указана')}\n"
+                     f"   🎯 Уровень: {course.get('level', 'Не указан')}\n"
+                     f"   🔗 Ссылка: {course.get('url', 'Не доступна')}\n\n")
+
+    if courses and total_hours:
+        parts.append(f"⏳ Суммарное время обучения: около {round(total_hours)} ч.\n\n")
 
-    response += "💡 Совет: Сочетайте обучение на курсах с практическими проектами для лучшего закрепления материала."
+    parts.append("💡 Совет: Сочетайте обучение на курсах с практическими проектами для лучшего закрепления материала.")
 
-    return response
+    return "".join(parts)
 
 #print(create_learning_plan())
 
@@ -486,70 +435,70 @@ def provide_career_advice(question: str) -> str:
     Returns:
         str: Ответ с рекомендациями и советами
     """
-    print("Вызвана функция: provide_career_advice")
-
-    #question = 'Я хочу сменить профессию, что делать?'
-
-    # База знаний по карьерным вопросам
-    career_advice_db = {
-        "старт карьеры": """
-            🚀 С чего начать карьеру в ИТ:
-
-            1. Определите интересы - попробуйте разные направления через небольшие проекты
-            2. Освойте базовые навыки - Git, основы программирования, английский язык
-            3. Создайте портфолио - даже учебные проекты имеют значение
-            4. Ищите стажировки - многие компании предлагают программы для начинающих
-            5. Участвуйте в комьюнити - хабр, meetups, открытые источники
-
-            Начните с бесплатных курсов и постепенно переходите к более сложным задачам.
-            """,
-                    "смена профессии или работы": """
-            🔄 Переход в ИТ из другой профессии:
-
-            • Используйте свой предыдущий опыт - многие навыки универсальны
-            • Начните с смежных ролей (бизнес-аналитик, продакт-менеджер)
-            • Рассмотрите интенсивные курсы с трудоустройством
-            • Уделяйте время практике - теория без применения малоэффективна
-
-            Помните: средний возраст успешного сменщика профессии - 28-35 лет!
-            """,
-                    "повышение квалификации": """
-            📈 Повышение квалификации и рост:
-
-            • Определите целевой уровень (Middle, Senior, Lead)
-            • Изучите требования к целевой позиции
-            • Составьте план развития на 6-12 месяцев
-            • Найдите ментора или вступите в профессиональное сообщество
-            • Участвуйте в сложных проектах и берите на себя ответственность
-
-            Регулярно обновляйте резюме и отслеживайте свой прогресс.
-            """
-    }
-
-    # Поиск наиболее релевантного ответа
-    question_lower = question.lower()
-    best_match = None
-    max_similarity = 0
-
-    for key in career_advice_db.keys():
-        similarity = calculate_skill_similarity(question_lower, key)
-        if similarity > max_similarity:
-            max_similarity = similarity
-            best_match = key
-
-    if best_match and max_similarity > 0.3:
-        return career_advice_db[best_match]
-    else:
-        return """
-🤔 По вашему вопросу я могу предложить общие рекомендации:
+    logger.debug("provide_career_advice: вопрос=%s", question)
+
+    # Поиск по базе советов (jsons/career_advice.json)
+    base = get_advice_base()
+    results = base.search(question, k=ADVICE_TOP_K)
+    if not results:
+        return base.fallback or "🤔 Можете задать более конкретный вопрос о карьере в ИТ?"
+
+    best_article, best_score = results[0]
+    parts = [best_article["answer"]]
+    related = [article["topic"] for article, score in results[1:] if score >= best_score * ADVICE_RELATED_RATIO]
+    if related:
+        parts.append("\n\n📌 Также могу рассказать: " + ", ".join(related) + ".")
+    return "".join(parts)
 
-• Изучите востребованные технологии на рынке труда
-• Сосредоточьтесь на практических навыках, а не только на теории
-• Создайте сильное портфолио с реальными проектами
-• Развивайте soft skills - коммуникация, работа в команде, тайм-менеджмент
-• Не бойтесь начинать с junior-позиций - это нормальный путь роста
+#print(provide_career_advice())
 
-Можете задать более конкретный вопрос о карьере в ИТ?
-"""
+# Функция №5: Обзор рынка вакансий
+@tool
+def get_market_overview(target_position: Optional[str] = None, location: Optional[str] = None,
+                        skills: Optional[List[str]] = None) -> str:
+    """
+    Показывает, что сейчас востребовано на рынке: самые частые навыки в вакансиях,
+    зарплаты (перцентили) и динамику спроса по неделям.
 
-#print(provide_career_advice())
\ No newline at end of file
+    Args:
+        target_position: Должность или направление (например, "frontend-разработчик"), необязательно
+        location: Город, необязательно
+        skills: Навыки, по которым нужны зарплаты, необязательно
+
+    Returns:
+        str: Сводка по рынку вакансий
+    """
+    logger.debug("get_market_overview: должность=%s, город=%s, навыки=%s", target_position, location, skills)
+    # Нераспознанная должность — срез по группе вакансий с тем же названием, а не весь рынок
+    role = (resolve_role(target_position) or cluster_key(target_position)) if target_position else None
+    stats = get_vacancy_corpus().market
+    summary = stats.summary(role=role, city=location,
+                            skills=[normalize_skill(skill) for skill in skills or []])
+    return format_market_response(summary, target_position)
+
+
+def format_market_response(summary: Dict, target_position: Optional[str] = None) -> str:
+    """Форматирует сводку по рынку вакансий"""
+    if not summary["vacancies"]:
+        return "😔 По этому направлению и городу в базе вакансий пока нет данных."
+
+    scope = target_position or "ИТ"
+    if summary["city"]:
+        scope += f", {summary['city']}"
+    parts = [f"📊 Рынок вакансий ({scope}): {summary['vacancies']} вакансий\n\n🔥 Самые востребованные навыки:\n"]
+    for row in summary["top_skills"]:
+        parts.append(f"• {row['skill'].capitalize()} — в {round(row['share'] * 100)}% вакансий\n")
+
+    salary = summary["salary"]
+    if salary:
+        parts.append(f"\n💰 Зарплата (медиана): {salary['p50']:,} руб. "
+                     f"(половина вакансий — от {salary['p25']:,} до {salary['p75']:,} руб.)\n".replace(",", " "))
+    if summary["skill_salaries"]:
+        parts.append("\n💵 Медианная зарплата по навыкам:\n")
+        for skill, skill_salary in summary["skill_salaries"].items():
+            parts.append(f"• {skill.capitalize()}: {skill_salary['p50']:,} руб.\n".replace(",", " "))
+
+    trend = summary["trend"][-6:]
+    if len(trend) > 1:
+        parts.append("\n📈 Новые вакансии по неделям: " + ", ".join(f"{week}: {count}" for week, count in trend) + "\n")
+    return "".join(parts)
@@ -0,0 +1,265 @@
+"""Трассировка обработки запроса.
+
+Спаны совместимы с OpenTelemetry: идентификаторы и заголовок traceparent в
+формате W3C Trace Context, экспорт — построчный JSON с полями OTLP
+(traceId, spanId, parentSpanId, startTimeUnixNano, ...) в файл
+TRACE_EXPORT_PATH, откуда его забирает коллектор (например, filelog
+receiver OpenTelemetry Collector). Длительность каждого спана попадает в
+гистограмму этапов для /metrics. Узлы LangGraph, вызовы GigaChat и
+инструменты оборачиваются в спаны через обработчик колбэков LangChain.
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from metrics import STAGE_ERRORS, STAGE_LATENCY
+
+
+logger = logging.getLogger(__name__)
+
+# Файл экспорта спанов (пустое значение отключает экспорт; метрики собираются всегда)
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "career-navigator-api")
+
+_TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Заголовок traceparent -> (trace_id, parent_span_id) или None, если он некорректен"""
+    match = _TRACEPARENT_RE.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    return f"00-{trace_id}-{span_id}-01"
+
+
+class Span:
+    """Интервал работы одного этапа"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._started
+        STAGE_LATENCY.observe(self.duration, self.name)
+        if self.error:
+            STAGE_ERRORS.inc(self.name)
+        exporter.export(self)
+
+    def to_otlp(self) -> Dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.start_ns + int(self.duration * 1e9),
+            "attributes": {"service.name": SERVICE_NAME, **self.attributes},
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class FileExporter:
+    """Экспорт завершенных спанов в файл построчным JSON"""
+
+    def __init__(self, path: str = TRACE_EXPORT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        if not self.path:
+            return
+        line = json.dumps(span.to_otlp(), ensure_ascii=False, default=str)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning("Не удалось записать спан в %s: %s", self.path, e)
+
+
+exporter = FileExporter()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, parent: Optional[Span] = None, traceparent: Optional[str] = None, **attributes) -> Span:
+    """Новый спан: дочерний для parent, для заголовка traceparent или для текущего спана"""
+    parent = parent or current_span()
+    remote = parse_traceparent(traceparent) if traceparent else None
+    if remote:
+        trace_id, parent_id = remote
+    elif parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        trace_id, parent_id = new_trace_id(), None
+    return Span(name, trace_id, parent_id, attributes)
+
+
+@contextmanager
+def span(name: str, traceparent: Optional[str] = None, **attributes):
+    """Контекстный менеджер: спан становится текущим на время блока"""
+    current = start_span(name, traceparent=traceparent, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def traced(name: Optional[str] = None):
+    """Декоратор: вызов функции (обычной или async) оборачивается в спан"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Спаны для узлов LangGraph, вызовов модели и инструментов агента.
+
+    Родитель спана определяется по parent_run_id колбэка; если родительский
+    запуск не отслеживается (внутренние цепочки LangGraph), спан вешается на
+    ближайший отслеживаемый предок или на текущий спан запроса.
+    """
+
+    def __init__(self):
+        self.root = current_span()
+        self._spans: Dict[UUID, Span] = {}
+        # run_id -> parent_run_id для всех запусков, в том числе без спана
+        self._parents: Dict[UUID, Optional[UUID]] = {}
+        self._lock = threading.Lock()
+
+    def _parent_span(self, parent_run_id: Optional[UUID]) -> Optional[Span]:
+        while parent_run_id is not None:
+            if parent_run_id in self._spans:
+                return self._spans[parent_run_id]
+            parent_run_id = self._parents.get(parent_run_id)
+        return self.root
+
+    def _start(self, name: str, run_id: UUID, parent_run_id: Optional[UUID], **attributes):
+        with self._lock:
+            parent = self._parent_span(parent_run_id)
+            self._spans[run_id] = start_span(name, parent=parent, **attributes)
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None):
+        with self._lock:
+            self._parents.pop(run_id, None)
+            current = self._spans.pop(run_id, None)
+        if current is None:
+            return
+        if error is not None:
+            current.record_error(error)
+        current.finish()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        with self._lock:
+            self._parents[run_id] = parent_run_id
+        node = (metadata or {}).get("langgraph_node")
+        # Узел графа — это цепочка с именем узла; вложенные в него цепочки пропускаются
+        if node and kwargs.get("name") == node:
+            self._start(f"node:{node}", run_id, parent_run_id, step=(metadata or {}).get("langgraph_step"))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm:GigaChat", run_id, parent_run_id, messages=sum(len(batch) for batch in messages))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm:GigaChat", run_id, parent_run_id, prompts=len(prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage")
+        if usage and run_id in self._spans:
+            self._spans[run_id].set_attribute("token_usage", dict(usage) if isinstance(usage, dict) else str(usage))
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(f"tool:{name}", run_id, parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+if __name__ == "__main__":
+    # Пример: вложенные спаны с продолжением трассы из заголовка бота
+    exporter.path = exporter.path or "/dev/stdout"
+    incoming = format_traceparent(new_trace_id(), new_span_id())
+    with span("handle_career_query", traceparent=incoming, tg_id=1):
+        with span("get_user_data_by_tg_id"):
+            time.sleep(0.01)
+        with span("run_agent"):
+            time.sleep(0.02)
+    from metrics import REGISTRY
+    print(REGISTRY.render())
@@ -0,0 +1,169 @@
+"""Прогрев API после запуска.
+
+Этапы выполняются параллельно в пуле потоков: токен GigaChat и агент,
+пул соединений с базой, корпуса вакансий и курсов со всеми индексами и
+база советов. Пока прогрев не завершен, /ready отвечает 503, так что
+балансировщик не отправит первый запрос на холодный экземпляр. Этапы,
+завершившиеся ошибкой (база или GigaChat недоступны при запуске),
+повторяются в фоне с растущей паузой, пока все не пройдут, поэтому
+временный сбой при запуске не оставляет экземпляр неготовым навсегда.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Пауза перед повтором неудавшихся этапов (удваивается после каждой неудачи до максимума)
+WARMUP_RETRY_DELAY = float(os.getenv("WARMUP_RETRY_DELAY", "2"))
+WARMUP_RETRY_MAX_DELAY = float(os.getenv("WARMUP_RETRY_MAX_DELAY", "60"))
+
+# Время последнего получения токена GigaChat (None — токен взят из окружения при запуске)
+token_updated_at: Optional[float] = None
+
+
+def refresh_gigachat_token() -> str:
+    """Получает токен GigaChat и делает его доступным процессу (а не только файлу .env)"""
+    global token_updated_at
+    from Token.set_token import set_gigachat_access_token
+
+    token = set_gigachat_access_token()
+    os.environ["GIGACHAT_ACCESS_TOKEN"] = token
+    token_updated_at = time.time()
+    return token
+
+
+def token_age() -> Optional[float]:
+    """Возраст токена в секундах"""
+    return time.time() - token_updated_at if token_updated_at is not None else None
+
+
+def warm_gigachat():
+    from main import _get_agent
+
+    refresh_gigachat_token()
+    _get_agent()
+
+
+def warm_database():
+    from db import get_pool
+
+    get_pool()
+
+
+def warm_vacancies():
+    from corpus import get_vacancy_corpus
+    from embeddings import is_semantic
+
+    corpus = get_vacancy_corpus()
+    # Порядок важен: рыночные агрегаты и требования ролей читают навыки.
+    # Эмбеддинги используются только с моделью (см. embeddings.is_semantic)
+    indexes = ("skills", "facets", "fulltext", "embeddings", "role_skills", "market")
+    for index in indexes if is_semantic() else tuple(i for i in indexes if i != "embeddings"):
+        getattr(corpus, index)
+
+
+def warm_courses():
+    from corpus import get_course_corpus
+
+    get_course_corpus().skill_index
+
+
+def warm_advice():
+    from advice import get_advice_base
+
+    get_advice_base().index
+
+
+# Этапы прогрева по умолчанию
+STAGES: Dict[str, Callable[[], None]] = {
+    "gigachat": warm_gigachat,
+    "database": warm_database,
+    "vacancies": warm_vacancies,
+    "courses": warm_courses,
+    "advice": warm_advice,
+}
+
+
+class Warmup:
+    """Состояние прогрева: этапы с длительностью, ошибками и числом попыток, флаг готовности"""
+
+    def __init__(self, stages: Optional[Dict[str, Callable[[], None]]] = None,
+                 retry_delay: float = WARMUP_RETRY_DELAY, retry_max_delay: float = WARMUP_RETRY_MAX_DELAY):
+        self.stages = dict(stages or STAGES)
+        self.results: Dict[str, Dict] = {name: {"status": "pending"} for name in self.stages}
+        self.attempts: Dict[str, int] = {name: 0 for name in self.stages}
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Первый проход всех этапов завершен
+        self._done = threading.Event()
+        self._stop = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set() and all(r["status"] == "ok" for r in self.results.values())
+
+    def failed(self) -> List[str]:
+        return [name for name, r in self.results.items() if r["status"] == "error"]
+
+    def _run_stage(self, name: str):
+        self.attempts[name] += 1
+        self.results[name] = {"status": "running", "attempts": self.attempts[name]}
+        started = time.perf_counter()
+        try:
+            self.stages[name]()
+        except Exception as e:
+            self.results[name] = {"status": "error", "seconds": round(time.perf_counter() - started, 3),
+                                  "attempts": self.attempts[name], "error": f"{type(e).__name__}: {e}"}
+            logger.exception("Этап прогрева %s завершился ошибкой (попытка %d)", name, self.attempts[name])
+        else:
+            self.results[name] = {"status": "ok", "seconds": round(time.perf_counter() - started, 3),
+                                  "attempts": self.attempts[name]}
+
+    def _run_stages(self, names: List[str], max_workers: Optional[int]):
+        with ThreadPoolExecutor(max_workers=max_workers or len(names),
+                                thread_name_prefix="warmup") as executor:
+            list(executor.map(self._run_stage, names))
+
+    def run(self, max_workers: Optional[int] = None) -> bool:
+        """Выполняет все этапы параллельно, затем повторяет неудавшиеся до успеха или stop()"""
+        self.started_at = time.time()
+        started = time.perf_counter()
+        self._run_stages(list(self.stages), max_workers)
+        self._done.set()
+        logger.info("Прогрев завершен за %.2f с: %s", time.perf_counter() - started,
+                    ", ".join(f"{name}={r['status']}/{r.get('seconds', '-')}с" for name, r in self.results.items()))
+        delay = self.retry_delay
+        while self.failed() and not self._stop.wait(delay):
+            logger.info("Повтор этапов прогрева: %s", ", ".join(self.failed()))
+            self._run_stages(self.failed(), max_workers)
+            delay = min(delay * 2, self.retry_max_delay)
+        if self.ready:
+            self.finished_at = time.time()
+        return self.ready
+
+    def stop(self):
+        """Прекращает повторы неудавшихся этапов (при остановке сервера)"""
+        self._stop.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        self._done.wait(timeout)
+        return self.ready
+
+    def report(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "finished": self._done.is_set(),
+            "retrying": self._done.is_set() and bool(self.failed()) and not self._stop.is_set(),
+            "seconds": round(self.finished_at - self.started_at, 3) if self.finished_at and self.started_at else None,
+            "stages": self.results,
+        }
+
+
+warmup = Warmup()
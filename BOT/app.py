@@ -1,6 +1,7 @@
 import asyncio
 from config import bot, dp ,logger
 from handlers import start, query
+from misc.profile_writer import profile_writer
 
 async def main():
 
@@ -11,8 +12,15 @@ async def main():
     # Уведомление бота о запуске 
     await bot.send_message(chat_id=618425933, text='Бот запущен')
 
+    # Фоновая запись анкет в базу
+    await profile_writer.start()
+
     # Запуск бота
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        # Дописываем анкеты из очереди перед выходом
+        await profile_writer.stop()
 
 
 if __name__ == '__main__':
@@ -5,15 +5,12 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from dotenv import load_dotenv
 import psycopg2.pool
 
+from misc.logging_setup import setup_logging
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,                                          
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[logging.StreamHandler()]                              
-)
+
+# Настройка логирования (очередь и отдельный поток вывода, см. misc/logging_setup.py)
+setup_logging()
 logger = logging.getLogger(__name__)
-logging.getLogger('aiogram.event').setLevel(logging.WARNING) 
 
 load_dotenv()
 
@@ -32,8 +29,8 @@ try:
             logger.info("Database connection is OK")
             conn.commit()
     except Exception as e:
-        logger.error(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
         
 except psycopg2.OperationalError as e:
-    logger.error(f"Failed to connect to database: {e}")
+    logger.error("Failed to connect to database: %s", e)
     raise
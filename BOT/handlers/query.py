@@ -34,13 +34,8 @@ async def handle_career_callback(callback: CallbackQuery, state: FSMContext):
         "get_study_plan": "Составь индивидуальный план обучения в сфере ИТ для меня. Используй функцию create_learning_plan"
     }
 
-    # Добавляем контекст профиля к промпту
-    full_prompt = (
-        f"Пользователь {user_data['name']}, {user_data['age']} лет.\n"
-        f"Образование: {user_data['education']}.\n"
-        f"Интересы: {user_data.get('interests', 'не указаны')}.\n\n"
-        f"{prompts.get(callback.data, "Дай совет по карьере в ИТ.")}"
-    )
+    # Профиль пользователя API берет из БД и добавляет к запросу сам
+    full_prompt = prompts.get(callback.data, "Дай совет по карьере в ИТ.")
 
     await callback.answer()
     await callback.message.answer("🤖 Думаю над ответом, подождите немного...")
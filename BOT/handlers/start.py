@@ -3,7 +3,8 @@ from aiogram.types import Message
 from aiogram.filters import CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from misc.functions import send_career_query, addUserData
+from misc.functions import send_career_query
+from misc.profile_writer import profile_writer
 from misc.keyboards import choice_inl_kb
 
 router = Router()
@@ -124,7 +125,8 @@ async def process_target_position(message: Message, state: FSMContext):
     }
 
 
-    success = addUserData(user_data)
+    # Запись в базу отложенная (пачками в фоне); API до записи получает анкету в запросе
+    success = profile_writer.submit(user_data)
 
     if not success:
         await message.answer("❗️Произошла ошибка при сохранении твоих данных. Попробуй ещё раз позже.")
@@ -156,17 +158,8 @@ async def handle_user_query(message: Message, state: FSMContext):
 
     await message.answer("💭 Думаю над ответом...")
 
-    # Формируем промпт для API
-    prompt = (
-        f"Пользователь {user_data['name']}, {user_data['age']} лет.\n"
-        f"Образование: {user_data['education']}.\n"
-        f"Навыки: {user_data['skills']}.\n"
-        f"Опыт работы: {user_data['experience']}.\n"
-        f"Целевая позиция: {user_data['target_position']}.\n"
-        f"Вопрос: {user_text}"
-    )
-
-    response = await send_career_query(str(message.from_user.id), user_data, prompt)
+    # Профиль пользователя API берет из БД и добавляет к запросу сам, поэтому отправляем только вопрос
+    response = await send_career_query(str(message.from_user.id), user_data, user_text)
 
     answer_text = response.get("response", "⚠️ Не удалось получить ответ от сервера.")
     await message.answer(answer_text)
@@ -23,7 +23,7 @@ def create_tables():
                 connection.commit()
                 logger.info("Все таблицы успешно созданы.")
     except Exception as e:
-        logger.error(f"Ошибка при создании таблиц: {e}")
+        logger.error("Ошибка при создании таблиц: %s", e)
     finally:
         connection.close()
 
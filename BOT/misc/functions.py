@@ -1,7 +1,11 @@
 import aiohttp
-from config import logger, connection_pool
+from config import logger
+from misc.profile_writer import profile_writer
+from misc.tracing import span
 
 CAREER_QUERY_URL = "http://0.0.0.0:8001/career_query"
+# Сколько бот ждет ответа API; API получает этот срок (с запасом) в X-Request-Timeout
+CAREER_QUERY_TIMEOUT = 90
 
 async def send_career_query(tg_id: str, user_data: dict, prompt: str) -> dict:
     """
@@ -15,48 +19,34 @@ async def send_career_query(tg_id: str, user_data: dict, prompt: str) -> dict:
     payload = {
         "tg_id": tg_id,
         "user_data": user_data,
-        "prompt": prompt
+        "prompt": prompt,
+        # Анкета еще в очереди записи: API должен взять ее из запроса, а не из базы
+        "profile_pending": profile_writer.is_pending(tg_id)
     }
+    # Контекст трассировки W3C: спан бота экспортируется, спаны API становятся его дочерними
+    with span("bot:career_query", tg_id=tg_id) as current:
+        headers = {"traceparent": current.traceparent,
+                   "X-Request-Timeout": str(CAREER_QUERY_TIMEOUT - 5)}
+        result = await _post_career_query(payload, headers)
+        if "error" in result:
+            current.record_error(result["error"])
+        logger.info("career_query tg_id=%s trace_id=%s: %.2f с",
+                    tg_id, current.trace_id, current.elapsed())
+        return result
 
-    async with aiohttp.ClientSession() as session:
+
+async def _post_career_query(payload: dict, headers: dict) -> dict:
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=CAREER_QUERY_TIMEOUT)) as session:
         try:
-            async with session.post(CAREER_QUERY_URL, json=payload) as resp:
+            async with session.post(CAREER_QUERY_URL, json=payload, headers=headers) as resp:
                 if resp.status == 200:
                     return await resp.json()
+                elif resp.status in (429, 503):
+                    # Лимит частоты или очередь API: пользователю показывается причина отказа
+                    detail = (await resp.json(content_type=None) or {}).get("detail")
+                    return {"error": f"Ошибка при запросе API: {resp.status}",
+                            "response": f"⏳ {detail}" if detail else "⏳ Попробуйте чуть позже"}
                 else:
                     return {"error": f"Ошибка при запросе API: {resp.status}"}
         except Exception as e:
             return {"error": f"Ошибка при выполнении запроса: {str(e)}"}
-        
-
-def addUserData(user_data):
-    try:
-        conn = connection_pool.getconn()
-        try:
-            with conn.cursor() as cur:
-                cur.execute("""
-                    INSERT INTO user_data (tg_id, name, age, education, skills, experience, target_position)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (tg_id) DO UPDATE
-                    SET name = EXCLUDED.name,
-                        age = EXCLUDED.age,
-                        education = EXCLUDED.education,
-                        skills = EXCLUDED.skills,
-                        experience = EXCLUDED.experience,
-                        target_position = EXCLUDED.target_position;
-                """, (
-                    user_data["tg_id"],
-                    user_data["name"],
-                    user_data.get("age"),
-                    user_data.get("education"),
-                    user_data.get("skills", []),
-                    user_data.get("experience"),
-                    user_data.get("target_position")
-                ))
-                conn.commit()
-                return True
-        finally:
-            connection_pool.putconn(conn)
-    except Exception as e:
-        logger.error(f"Ошибка добавления данных пользователя (addUserData): \n{e}")
-        return False
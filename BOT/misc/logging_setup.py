@@ -0,0 +1,163 @@
+"""Настройка логирования бота (та же, что в API/logging_setup.py).
+
+Записи уходят в очередь (QueueHandler) и пишутся в поток отдельным
+потоком QueueListener, поэтому обработчики aiogram не ждут вывода.
+Сообщения логируются в стиле logging.debug("... %s", value): если уровень
+отключен, строка не форматируется, а форматирование включенных записей
+выполняется в потоке вывода. Переменные окружения:
+
+    LOG_LEVEL=INFO                          уровень корневого логгера
+    LOG_LEVELS=handlers=DEBUG,aiogram=INFO  уровни отдельных модулей
+    LOG_FORMAT=json                         JSON по строке на запись (по умолчанию текст)
+    LOG_SAMPLING=handlers=0.1               доля DEBUG-записей модуля, которая выводится
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Шумные библиотеки по умолчанию пишут только предупреждения
+DEFAULT_LEVELS = {"aiogram.event": "WARNING"}
+
+# Атрибуты LogRecord, которые не считаются пользовательскими полями (extra)
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def parse_module_values(text: Optional[str]) -> Dict[str, str]:
+    """'tools=DEBUG,httpx=WARNING' -> {'tools': 'DEBUG', 'httpx': 'WARNING'}"""
+    values = {}
+    for part in (text or "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            values[name.strip()] = value.strip()
+    return values
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись одной строкой JSON: время, уровень, логгер, сообщение, trace_id и поля extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает только долю DEBUG-записей модулей из списка (для частых событий)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.dropped = 0
+
+    def _rate(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.dropped += 1
+        return False
+
+
+class TraceContextFilter(logging.Filter):
+    """Добавляет к записи trace_id/span_id текущего спана (в потоке, где запись создана)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        try:
+            from misc.tracing import current_span
+        except ImportError:
+            return True
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+            record.span_id = span.span_id
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler без форматирования в потоке вызова: сообщение собирается в потоке вывода"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None, stream=None) -> logging.Logger:
+    """Настраивает корневой логгер (повторные вызовы ничего не меняют)"""
+    global _listener
+    root = logging.getLogger()
+    with _setup_lock:
+        if _listener is not None:
+            return root
+        fmt = (fmt or os.getenv("LOG_FORMAT", "text")).lower()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        handler = DeferredQueueHandler(queue.SimpleQueue())
+        rates = {name: float(rate) for name, rate in parse_module_values(os.getenv("LOG_SAMPLING")).items()}
+        if rates:
+            handler.addFilter(SamplingFilter(rates))
+        handler.addFilter(TraceContextFilter())
+
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+        for name, module_level in {**DEFAULT_LEVELS, **parse_module_values(os.getenv("LOG_LEVELS"))}.items():
+            logging.getLogger(name).setLevel(module_level.upper())
+
+        _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        # Оставшиеся в очереди записи выводятся при завершении процесса
+        atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+if __name__ == "__main__":
+    import time
+
+    setup_logging(fmt=sys.argv[1] if len(sys.argv) > 1 else None)
+    logger = logging.getLogger("handlers")
+    payload = {"skills": ["Python", "SQL"] * 20}
+    repeats = 100_000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        logger.debug("Переданные навыки: %s", payload)
+    print(f"Отключенный DEBUG: {(time.perf_counter() - start) / repeats * 1e9:.0f} нс на вызов")
+    logger.info("Пример записи: %d навыков", len(payload["skills"]), extra={"tg_id": 42})
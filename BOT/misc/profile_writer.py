@@ -0,0 +1,199 @@
+"""Отложенная запись анкет пользователей в user_data.
+
+Обработчик бота только кладет анкету в очередь (submit) и сразу отвечает
+пользователю. Фоновая задача пишет накопленные анкеты одной командой
+INSERT ... ON CONFLICT на несколько строк: когда набралось
+PROFILE_BATCH_SIZE анкет или через PROFILE_FLUSH_INTERVAL секунд после
+первой. Несколько анкет одного tg_id до записи сливаются в последнюю.
+При ошибке базы пачка возвращается в очередь и запись повторяется с
+растущей паузой. При остановке бота очередь дописывается, а то, что
+записать не удалось, сохраняется в PROFILE_SPILL_PATH и дописывается при
+следующем запуске.
+
+Пока анкета не записана, is_pending(tg_id) истинно: бот передает анкету в
+запросе к API с пометкой profile_pending, и API берет ее из запроса, а не
+из базы (см. handoff в API/api.py).
+"""
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from psycopg2.extras import execute_values
+
+from config import connection_pool, logger
+
+
+PROFILE_BATCH_SIZE = int(os.getenv("PROFILE_BATCH_SIZE", "100"))
+PROFILE_FLUSH_INTERVAL = float(os.getenv("PROFILE_FLUSH_INTERVAL", "0.5"))
+# Сколько анкет может ждать записи (при недоступной базе новые не принимаются)
+PROFILE_MAX_PENDING = int(os.getenv("PROFILE_MAX_PENDING", "10000"))
+PROFILE_SPILL_PATH = Path(os.getenv("PROFILE_SPILL_PATH") or Path(__file__).parent.parent / 'pending_profiles.jsonl')
+# Паузы между повторами записи: от 0.5 с с удвоением до 30 с
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+# Попытки записи при остановке, после которых остаток уходит в файл
+SHUTDOWN_ATTEMPTS = 3
+
+FIELDS = ("tg_id", "name", "age", "education", "skills", "experience", "target_position")
+
+UPSERT_SQL = """
+    INSERT INTO user_data (tg_id, name, age, education, skills, experience, target_position)
+    VALUES %s
+    ON CONFLICT (tg_id) DO UPDATE
+    SET name = EXCLUDED.name,
+        age = EXCLUDED.age,
+        education = EXCLUDED.education,
+        skills = EXCLUDED.skills,
+        experience = EXCLUDED.experience,
+        target_position = EXCLUDED.target_position
+"""
+
+
+def upsert_profiles(profiles: List[Dict]):
+    """Записывает пачку анкет одной командой (tg_id в пачке не повторяются)"""
+    rows = [(p["tg_id"], p["name"], p.get("age"), p.get("education"), p.get("skills") or [],
+             p.get("experience"), p.get("target_position")) for p in profiles]
+    conn = connection_pool.getconn()
+    broken = False
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, UPSERT_SQL, rows, page_size=len(rows))
+        conn.commit()
+    except Exception:
+        broken = bool(conn.closed)
+        if not broken:
+            conn.rollback()
+        raise
+    finally:
+        connection_pool.putconn(conn, close=broken)
+
+
+class ProfileWriter:
+    def __init__(self, batch_size: int = PROFILE_BATCH_SIZE, flush_interval: float = PROFILE_FLUSH_INTERVAL,
+                 spill_path: Path = PROFILE_SPILL_PATH):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        # tg_id -> последняя анкета; порядок вставки — порядок записи
+        self._pending: Dict[int, Dict] = {}
+        self._writing: Dict[int, Dict] = {}
+        self._first_pending_at: Optional[float] = None
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.failures = 0
+
+    def submit(self, user_data: Dict) -> bool:
+        """Ставит анкету в очередь записи; False — очередь переполнена"""
+        tg_id = int(user_data["tg_id"])
+        if tg_id not in self._pending and len(self._pending) >= PROFILE_MAX_PENDING:
+            logger.error("Очередь записи анкет переполнена (%d), анкета tg_id=%s не принята",
+                         len(self._pending), tg_id)
+            return False
+        self._pending.pop(tg_id, None)
+        self._pending[tg_id] = {field: user_data.get(field) for field in FIELDS}
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+        self._wakeup.set()
+        return True
+
+    def is_pending(self, tg_id) -> bool:
+        """Анкета пользователя еще не записана в базу"""
+        tg_id = int(tg_id)
+        return tg_id in self._pending or tg_id in self._writing
+
+    async def start(self):
+        self._load_spill()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую запись, дописывает очередь, остаток сохраняет в файл"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for attempt in range(SHUTDOWN_ATTEMPTS):
+            while self._pending:
+                if not await self.flush():
+                    break
+            if not self._pending:
+                break
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+        if self._pending:
+            self._spill()
+
+    async def _run(self):
+        delay = RETRY_BASE_DELAY
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            # Ждем, пока наберется пачка, но не дольше flush_interval от первой анкеты в очереди
+            wait = self._first_pending_at + self.flush_interval - time.monotonic()
+            if len(self._pending) < self.batch_size and wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if await self.flush():
+                delay = RETRY_BASE_DELAY
+            else:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX_DELAY)
+
+    async def flush(self) -> bool:
+        """Записывает одну пачку; при ошибке возвращает ее в очередь"""
+        batch_ids = list(self._pending)[:self.batch_size]
+        self._writing = {tg_id: self._pending.pop(tg_id) for tg_id in batch_ids}
+        self._first_pending_at = time.monotonic() if self._pending else None
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(upsert_profiles, list(self._writing.values()))
+        except asyncio.CancelledError:
+            # Остановка во время записи: пачка остается в очереди (повторный upsert безопасен)
+            self._requeue()
+            raise
+        except Exception as e:
+            self.failures += 1
+            logger.warning("Не удалось записать %d анкет, повтор позже: %s", len(self._writing), e)
+            self._requeue()
+            return False
+        self.written += len(self._writing)
+        logger.debug("Записано %d анкет за %.3f с", len(self._writing), time.perf_counter() - started)
+        self._writing = {}
+        return True
+
+    def _requeue(self):
+        # Анкеты, обновленные за время записи, новее возвращаемых
+        for tg_id, profile in self._writing.items():
+            self._pending.setdefault(tg_id, profile)
+        self._writing = {}
+        if self._pending and self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+
+    def _spill(self):
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for profile in self._pending.values():
+                f.write(json.dumps(profile, ensure_ascii=False) + "\n")
+        logger.error("База недоступна: %d анкет сохранены в %s и будут записаны при запуске",
+                     len(self._pending), self.spill_path)
+        self._pending.clear()
+
+    def _load_spill(self):
+        if not self.spill_path.exists():
+            return
+        with open(self.spill_path, encoding="utf-8") as f:
+            profiles = [json.loads(line) for line in f if line.strip()]
+        self.spill_path.unlink()
+        for profile in profiles:
+            self.submit(profile)
+        logger.info("Из %s восстановлено %d анкет для записи", self.spill_path, len(profiles))
+
+
+profile_writer = ProfileWriter()
@@ -0,0 +1,122 @@
+"""Трассировка запросов бота к API.
+
+Тот же формат, что у API (API/tracing.py): идентификаторы и заголовок
+traceparent по W3C Trace Context, экспорт — построчный JSON с полями OTLP
+в файл TRACE_EXPORT_PATH. Спан запроса бота становится корнем трассы, а
+спаны API — его дочерними, поэтому в коллекторе видна вся цепочка.
+"""
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Файл экспорта спанов (пустое значение отключает экспорт)
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "career-navigator-bot")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def new_trace_id() -> str:
+    return secrets.token_hex(16)
+
+
+def new_span_id() -> str:
+    return secrets.token_hex(8)
+
+
+def format_traceparent(trace_id: str, span_id: str) -> str:
+    return f"00-{trace_id}-{span_id}-01"
+
+
+class Span:
+    """Интервал работы одного этапа"""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = trace_id or new_trace_id()
+        self.span_id = new_span_id()
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    @property
+    def traceparent(self) -> str:
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    def finish(self):
+        self.duration = self.elapsed()
+        exporter.export(self)
+
+    def to_otlp(self) -> Dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.start_ns + int(self.duration * 1e9),
+            "attributes": {"service.name": SERVICE_NAME, **self.attributes},
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class FileExporter:
+    """Экспорт завершенных спанов в файл построчным JSON"""
+
+    def __init__(self, path: str = TRACE_EXPORT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        if not self.path:
+            return
+        line = json.dumps(span.to_otlp(), ensure_ascii=False, default=str)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning("Не удалось записать спан в %s: %s", self.path, e)
+
+
+exporter = FileExporter()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Контекстный менеджер: корневой спан трассы, текущий на время блока (trace_id попадает в логи)"""
+    current = Span(name, attributes=attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
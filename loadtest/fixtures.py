@@ -0,0 +1,137 @@
+"""Postgres для нагрузочного теста: временный кластер и засеянная таблица user_data.
+
+Если передан DSN, используется существующая база (например, из
+docker-compose.yml в корне репозитория); иначе поднимается временный
+кластер через initdb/pg_ctl на свободном порту и удаляется после теста.
+Тестовые пользователи получают tg_id начиная с LOADTEST_TG_ID_BASE, чтобы
+не пересекаться с настоящими, и удаляются по окончании.
+"""
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'API'))
+from roles import ROLE_ALIASES  # noqa: E402
+
+
+LOADTEST_TG_ID_BASE = 9_000_000_000_000
+
+# Схема таблицы как в BOT/migrate.py
+USER_DATA_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user_data (
+        id SERIAL PRIMARY KEY,
+        tg_id BIGINT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        age INT CHECK (age >= 0),
+        education TEXT,
+        skills TEXT[] DEFAULT '{}',
+        experience TEXT,
+        target_position TEXT
+    );
+"""
+
+NAMES = ("Иван", "Мария", "Алексей", "Анна", "Дмитрий", "Екатерина", "Сергей", "Ольга", "Никита", "Полина")
+EDUCATION = ("Среднее общее", "Среднее профессиональное", "Бакалавриат", "Магистратура", "Студент 3 курса")
+EXPERIENCE = ("Нет опыта", "Стажировка 3 месяца", "1 год разработчиком", "Опыта нет, учусь сам",
+              "2 года в поддержке", "Не указан")
+SKILLS = ("Python", "SQL", "Git", "Docker", "JavaScript", "HTML", "CSS", "React", "Linux", "Java", "Excel",
+          "Pandas", "Django", "C++", "Go", "PostgreSQL", "Figma", "Kotlin", "Selenium", "Английский язык")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TemporaryPostgres:
+    """Временный кластер Postgres (нужны initdb и pg_ctl в PATH)"""
+
+    def __init__(self):
+        self.directory: Optional[Path] = None
+        self.port = _free_port()
+
+    @property
+    def dsn(self) -> str:
+        return f"host=127.0.0.1 port={self.port} dbname=postgres user=postgres sslmode=disable"
+
+    def start(self) -> str:
+        if not (shutil.which("initdb") and shutil.which("pg_ctl")):
+            raise RuntimeError("initdb/pg_ctl не найдены: передайте --dsn существующей базы "
+                               "(например, docker compose up -d db)")
+        self.directory = Path(tempfile.mkdtemp(prefix="loadtest-pg-"))
+        data = self.directory / "data"
+        subprocess.run(["initdb", "-D", str(data), "-U", "postgres", "--auth=trust", "-E", "UTF8"],
+                       check=True, stdout=subprocess.DEVNULL)
+        subprocess.run(["pg_ctl", "-D", str(data), "-l", str(self.directory / "postgres.log"), "-w",
+                        "-o", f"-p {self.port} -k {self.directory} -c max_connections=200", "start"],
+                       check=True, stdout=subprocess.DEVNULL)
+        return self.dsn
+
+    def stop(self):
+        if self.directory is None:
+            return
+        subprocess.run(["pg_ctl", "-D", str(self.directory / "data"), "-m", "fast", "-w", "stop"],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory = None
+
+
+def generate_users(count: int, seed: int = 42) -> List[Dict]:
+    """Профили тестовых пользователей в том виде, в каком их сохраняет бот"""
+    rng = random.Random(seed)
+    positions = [alias for role, aliases in ROLE_ALIASES.items() for alias in [role, *aliases]]
+    return [{
+        "tg_id": LOADTEST_TG_ID_BASE + number,
+        "name": rng.choice(NAMES),
+        "age": rng.randint(16, 40),
+        "education": rng.choice(EDUCATION),
+        "skills": rng.sample(SKILLS, k=rng.randint(1, 6)),
+        "experience": rng.choice(EXPERIENCE),
+        "target_position": rng.choice(positions),
+    } for number in range(count)]
+
+
+def seed_users(dsn: str, count: int, seed: int = 42) -> List[int]:
+    """Создает таблицу (если ее нет) и записывает тестовых пользователей; возвращает их tg_id"""
+    users = generate_users(count, seed)
+    started = time.perf_counter()
+    with psycopg2.connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute(USER_DATA_SCHEMA)
+            execute_values(cur, """
+                INSERT INTO user_data (tg_id, name, age, education, skills, experience, target_position)
+                VALUES %s
+                ON CONFLICT (tg_id) DO UPDATE
+                SET name = EXCLUDED.name, age = EXCLUDED.age, education = EXCLUDED.education,
+                    skills = EXCLUDED.skills, experience = EXCLUDED.experience,
+                    target_position = EXCLUDED.target_position
+            """, [(u["tg_id"], u["name"], u["age"], u["education"], u["skills"], u["experience"],
+                   u["target_position"]) for u in users], page_size=1000)
+    print(f"Засеяно пользователей: {count} за {time.perf_counter() - started:.2f} с")
+    return [u["tg_id"] for u in users]
+
+
+def drop_users(dsn: str):
+    """Удаляет тестовых пользователей"""
+    with psycopg2.connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM user_data WHERE tg_id >= %s", (LOADTEST_TG_ID_BASE,))
+
+
+if __name__ == "__main__":
+    # Засеять существующую базу: python fixtures.py "<DSN>" 1000
+    dsn = sys.argv[1] if len(sys.argv) > 1 else os.getenv("DSN")
+    if not dsn:
+        sys.exit("Использование: python fixtures.py <DSN> [число пользователей]")
+    seed_users(dsn, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
@@ -0,0 +1,159 @@
+"""Генератор нагрузки на /career_query, повторяющий трафик бота.
+
+Каждый виртуальный пользователь ведет себя как пользователь бота: берет
+профиль из засеянных tg_id (частота обращений по закону Ципфа — у части
+пользователей много вопросов подряд), отправляет запрос тем же телом и с
+тем же заголовком traceparent, что и send_career_query, и "думает" между
+запросами (экспоненциальная пауза). Запросы — кнопки главного меню и
+свободные вопросы в заданных пропорциях. Уровни конкурентности
+прогоняются по очереди, по каждому собирается пропускная способность,
+задержки и ошибки.
+"""
+import asyncio
+import random
+import secrets
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+import aiohttp
+import numpy as np
+
+
+# Запросы кнопок из BOT/handlers/query.py и свободные вопросы после анкеты (BOT/handlers/start.py)
+BUTTON_PROMPTS = (
+    "Подбери подходящие вакансии для меня, учитывая мой профиль. Используй функцию find_matching_vacancies",
+    "Какие вопросы я могу задать тебе по карьере в айти?. Для ответов на вопросы пользователя используй "
+    "функцию provide_career_advice",
+    "Составь индивидуальный план обучения в сфере ИТ для меня. Используй функцию create_learning_plan",
+)
+FREE_TEXT_PROMPTS = (
+    "Что сейчас востребовано на рынке в Москве?",
+    "Как подготовиться к первому собеседованию?",
+    "Покажи вакансии на удалёнке от 100 тысяч",
+    "Какие курсы пройти, чтобы стать тестировщиком?",
+    "Стоит ли идти в ИТ без профильного образования?",
+    "Сколько платят джунам в Санкт-Петербурге?",
+    "Покажи еще вакансии",
+)
+# Доля нажатий кнопок среди всех запросов
+BUTTON_SHARE = 0.7
+
+
+class TrafficModel:
+    """Кто и что спрашивает: пользователи по Ципфу, запросы по долям кнопок и текста"""
+
+    def __init__(self, tg_ids: Sequence[int], zipf_s: float = 1.1, think_time: float = 5.0,
+                 seed: Optional[int] = None):
+        self.tg_ids = list(tg_ids)
+        self.think_time = think_time
+        self.rng = random.Random(seed)
+        weights = 1.0 / np.arange(1, len(self.tg_ids) + 1) ** zipf_s
+        self.cumulative = np.cumsum(weights / weights.sum())
+
+    def user(self) -> int:
+        return self.tg_ids[min(int(np.searchsorted(self.cumulative, self.rng.random())), len(self.tg_ids) - 1)]
+
+    def prompt(self) -> str:
+        if self.rng.random() < BUTTON_SHARE:
+            return self.rng.choice(BUTTON_PROMPTS)
+        return self.rng.choice(FREE_TEXT_PROMPTS)
+
+    def pause(self) -> float:
+        return self.rng.expovariate(1.0 / self.think_time) if self.think_time > 0 else 0.0
+
+
+class LevelResult:
+    """Результаты одного уровня конкурентности"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.started = 0.0
+        self.finished = 0.0
+
+    def record(self, latency: float, error: Optional[str] = None):
+        if error:
+            self.errors[error] += 1
+        else:
+            self.latencies.append(latency)
+
+    def summary(self) -> Dict:
+        duration = max(self.finished - self.started, 1e-9)
+        ok = len(self.latencies)
+        failed = sum(self.errors.values())
+        latencies = np.asarray(self.latencies or [0.0])
+        return {
+            "concurrency": self.concurrency,
+            "requests": ok + failed,
+            "ok": ok,
+            "errors": dict(self.errors),
+            "error_rate": round(failed / (ok + failed), 4) if ok + failed else 0.0,
+            "throughput_rps": round(ok / duration, 2),
+            "p50_s": round(float(np.percentile(latencies, 50)), 3),
+            "p90_s": round(float(np.percentile(latencies, 90)), 3),
+            "p99_s": round(float(np.percentile(latencies, 99)), 3),
+            "max_s": round(float(latencies.max()), 3),
+        }
+
+
+async def send_query(session: aiohttp.ClientSession, url: str, tg_id: int, prompt: str,
+                     timeout: float) -> Optional[str]:
+    """Запрос как в BOT/misc/functions.send_career_query; возвращает текст ошибки или None"""
+    payload = {"tg_id": str(tg_id), "user_data": None, "prompt": prompt}
+    headers = {"traceparent": f"00-{secrets.token_hex(16)}-{secrets.token_hex(8)}-01"}
+    try:
+        async with session.post(url, json=payload, headers=headers,
+                                timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            await resp.read()
+            return None if resp.status == 200 else f"http_{resp.status}"
+    except asyncio.TimeoutError:
+        return "timeout"
+    except aiohttp.ClientError as e:
+        return type(e).__name__
+
+
+async def _virtual_user(session, url: str, traffic: TrafficModel, result: LevelResult, deadline: float,
+                        timeout: float):
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        error = await send_query(session, url, traffic.user(), traffic.prompt(), timeout)
+        result.record(time.perf_counter() - started, error)
+        await asyncio.sleep(min(traffic.pause(), max(deadline - time.perf_counter(), 0)))
+
+
+async def run_level(url: str, traffic: TrafficModel, concurrency: int, duration: float,
+                    timeout: float = 120.0) -> LevelResult:
+    """Прогон одного уровня: concurrency виртуальных пользователей в течение duration секунд"""
+    result = LevelResult(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        result.started = time.perf_counter()
+        deadline = result.started + duration
+        await asyncio.gather(*(_virtual_user(session, url, traffic, result, deadline, timeout)
+                               for _ in range(concurrency)))
+        result.finished = time.perf_counter()
+    return result
+
+
+async def run_levels(url: str, traffic: TrafficModel, levels: Sequence[int], duration: float,
+                     timeout: float = 120.0) -> List[Dict]:
+    summaries = []
+    for concurrency in levels:
+        print(f"Уровень {concurrency}: {duration:.0f} с...")
+        result = await run_level(url, traffic, concurrency, duration, timeout)
+        summaries.append(result.summary())
+        print_report(summaries[-1:])
+    return summaries
+
+
+def print_report(summaries: List[Dict]):
+    header = (f"{'конкур.':>8}{'запросов':>10}{'rps':>9}{'p50, с':>9}{'p90, с':>9}{'p99, с':>9}"
+              f"{'макс, с':>9}{'ошибки':>9}")
+    print(header)
+    for row in summaries:
+        print(f"{row['concurrency']:>8}{row['requests']:>10}{row['throughput_rps']:>9.2f}{row['p50_s']:>9.2f}"
+              f"{row['p90_s']:>9.2f}{row['p99_s']:>9.2f}{row['max_s']:>9.2f}{row['error_rate']:>9.1%}")
+        if row["errors"]:
+            print(f"{'':>8}  ошибки: {row['errors']}")
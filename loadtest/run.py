@@ -0,0 +1,147 @@
+"""Нагрузочный тест всего стека без сети и квоты GigaChat.
+
+Поднимает заглушку GigaChat, Postgres с тестовыми пользователями и API
+(uvicorn api:app) с переменными окружения, направляющими клиента GigaChat
+на заглушку; затем прогоняет генератор нагрузки по уровням
+конкурентности и сохраняет отчет.
+
+    python run.py --levels 1,4,16,32 --duration 60 --users 1000 --median 1.5 --output report.json
+    python run.py --dsn "host=localhost port=54321 dbname=aigovnodb user=postgres password=4268" ...
+
+Без --dsn нужен Postgres в PATH (initdb/pg_ctl) для временного кластера.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+from fixtures import TemporaryPostgres, _free_port, drop_users, seed_users
+from load_generator import TrafficModel, print_report, run_levels
+
+
+API_DIR = Path(__file__).resolve().parent.parent / 'API'
+LOADTEST_DIR = Path(__file__).resolve().parent
+
+
+def wait_for(url: str, timeout: float = 120.0):
+    """Ждет, пока адрес начнет отвечать кодом 200 (/ready у API — после прогрева)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2):
+                return
+        except Exception:
+            time.sleep(0.5)
+    raise TimeoutError(f"{url} не ответил за {timeout:.0f} с")
+
+
+def start_stub(args, port: int) -> subprocess.Popen:
+    command = [sys.executable, str(LOADTEST_DIR / 'stub_gigachat.py'), "--port", str(port),
+               "--median", str(args.median), "--sigma", str(args.sigma), "--error-rate", str(args.error_rate)]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command)
+    wait_for(f"http://127.0.0.1:{port}/stats")
+    return process
+
+
+def start_api(dsn: str, stub_port: int, api_port: int, workdir: str, log_path: Path) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update({
+        "DSN": dsn,
+        "GIGACHAT_BASE_URL": f"http://127.0.0.1:{stub_port}/api/v1",
+        "GIGACHAT_AUTH_URL": f"http://127.0.0.1:{stub_port}/api/v2/oauth",
+        # Заглушка принимает любой ключ; значение в base64, как у настоящих учетных данных
+        "GIGACHAT_ACCESS_TOKEN": "bG9hZHRlc3Q6bG9hZHRlc3Q=",
+        "RESPONSE_CACHE_PATH": str(Path(workdir) / 'responses.sqlite3'),
+    })
+    # Лимит частоты по tg_id по умолчанию отключен: тест меряет емкость агента, а не ответы 429
+    env.setdefault("RATE_LIMIT_PER_MINUTE", "0")
+    # Рабочий каталог временный: set_gigachat_access_token пишет токен в ./.env
+    log = open(log_path, "w")
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "api:app", "--app-dir", str(API_DIR),
+                                "--port", str(api_port), "--log-level", "warning"],
+                               cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    wait_for(f"http://127.0.0.1:{api_port}/ready", timeout=300.0)
+    return process
+
+
+def stop(process: subprocess.Popen):
+    if process and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест /career_query")
+    parser.add_argument("--levels", default="1,4,16", help="уровни конкурентности через запятую")
+    parser.add_argument("--duration", type=float, default=60.0, help="длительность уровня, с")
+    parser.add_argument("--users", type=int, default=1000, help="число тестовых пользователей")
+    parser.add_argument("--think-time", type=float, default=5.0, help="средняя пауза между запросами, с")
+    parser.add_argument("--timeout", type=float, default=120.0, help="таймаут запроса, с")
+    parser.add_argument("--median", type=float, default=1.5, help="медиана задержки заглушки GigaChat, с")
+    parser.add_argument("--sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ошибок заглушки GigaChat")
+    parser.add_argument("--no-cache", action="store_true", help="отключить кэш ответов агента")
+    parser.add_argument("--dsn", help="существующая база вместо временного кластера")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    if args.no_cache:
+        os.environ["RESPONSE_CACHE"] = "0"
+    postgres = None if args.dsn else TemporaryPostgres()
+    dsn = args.dsn or postgres.start()
+    stub = api = None
+    workdir = tempfile.mkdtemp(prefix="loadtest-api-")
+    api_log = Path(workdir) / 'api.log'
+    try:
+        tg_ids = seed_users(dsn, args.users, args.seed)
+        stub_port, api_port = _free_port(), _free_port()
+        stub = start_stub(args, stub_port)
+        api = start_api(dsn, stub_port, api_port, workdir, api_log)
+        print(f"API: http://127.0.0.1:{api_port} (лог: {api_log})")
+
+        traffic = TrafficModel(tg_ids, think_time=args.think_time, seed=args.seed)
+        levels = [int(level) for level in args.levels.split(",") if level.strip()]
+        summaries = asyncio.run(run_levels(f"http://127.0.0.1:{api_port}/career_query", traffic, levels,
+                                           args.duration, args.timeout))
+        with urllib.request.urlopen(f"http://127.0.0.1:{stub_port}/stats") as resp:
+            stub_stats = json.load(resp)
+    finally:
+        stop(api)
+        stop(stub)
+        if args.dsn:
+            drop_users(dsn)
+        elif postgres:
+            postgres.stop()
+
+    print("\n=== Итог ===")
+    print_report(summaries)
+    print(f"Вызовов заглушки GigaChat: {stub_stats['requests']} (ошибок: {stub_stats['errors']})")
+    if args.output:
+        report = {
+            "meta": {"date": datetime.now().isoformat(timespec="seconds"), "users": args.users,
+                     "duration": args.duration, "think_time": args.think_time, "median": args.median,
+                     "sigma": args.sigma, "error_rate": args.error_rate, "cache": not args.no_cache},
+            "levels": summaries,
+            "gigachat_stub": stub_stats,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Отчет сохранен: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""Локальная заглушка GigaChat API для нагрузочного тестирования.
+
+Реализует эндпоинты, которыми пользуется клиент gigachat/langchain-gigachat:
+выдачу токена OAuth, список моделей и /chat/completions с вызовом функций.
+На первый запрос пользователя модель-заглушка выбирает инструмент по словам
+запроса и возвращает function_call с аргументами; получив результат функции,
+отвечает итоговым текстом. Задержка ответа — логнормальное распределение
+(медиана и разброс задаются параметрами), доля ошибок настраивается.
+
+    python stub_gigachat.py --port 8090 --median 1.5 --sigma 0.5 --error-rate 0.01
+
+Клиент направляется на заглушку переменными окружения
+GIGACHAT_BASE_URL=http://127.0.0.1:8090/api/v1 и
+GIGACHAT_AUTH_URL=http://127.0.0.1:8090/api/v2/oauth.
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class LatencyModel:
+    """Логнормальная задержка ответа: median — медиана в секундах, sigma — разброс"""
+
+    def __init__(self, median: float = 1.0, sigma: float = 0.5, per_token: float = 0.0, seed: Optional[int] = None):
+        self.median = median
+        self.sigma = sigma
+        self.per_token = per_token
+        self.rng = random.Random(seed)
+
+    def sample(self, completion_tokens: int = 0) -> float:
+        base = self.rng.lognormvariate(math.log(self.median), self.sigma) if self.median > 0 else 0.0
+        return base + self.per_token * completion_tokens
+
+
+# Ключевые слова запроса -> инструмент, который вызовет модель-заглушка
+TOOL_KEYWORDS = (
+    ("create_learning_plan", ("план", "обучени", "курс", "изучить")),
+    ("get_market_overview", ("рынок", "рынке", "востребован", "зарплат", "спрос")),
+    ("find_matching_vacancies", ("ваканси", "работу", "работа")),
+    ("provide_career_advice", ("вопрос", "совет", "карьер", "собеседован")),
+)
+# Навыки и роли, которые "извлекаются" из профиля в запросе
+KNOWN_SKILLS = ("Python", "SQL", "Git", "Docker", "JavaScript", "React", "Linux", "Java", "Go", "Excel")
+
+
+def _user_text(messages: List[Dict]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def _choose_tool(text: str, functions: List[Dict]) -> Optional[str]:
+    available = {function.get("name") for function in functions}
+    lowered = text.lower()
+    for name, keywords in TOOL_KEYWORDS:
+        if name in available and (name in text or any(keyword in lowered for keyword in keywords)):
+            return name
+    return "provide_career_advice" if "provide_career_advice" in available else None
+
+
+def _tool_arguments(name: str, text: str) -> Dict:
+    skills = [skill for skill in KNOWN_SKILLS if skill.lower() in text.lower()] or ["Python", "Git"]
+    if name == "find_matching_vacancies":
+        return {"user_skills": skills, "experience_level": "Нет опыта"}
+    if name == "create_learning_plan":
+        return {"skills": skills, "target_position": "Python-разработчик"}
+    if name == "get_market_overview":
+        return {"target_position": "Python-разработчик"}
+    return {"question": text[:300]}
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def completion(messages: List[Dict], functions: List[Dict], model: str) -> Dict:
+    """Ответ модели-заглушки в формате GigaChat"""
+    last = messages[-1] if messages else {}
+    prompt_tokens = sum(_tokens(message.get("content") or "") for message in messages)
+    tool = None
+    if last.get("role") == "user" and functions:
+        tool = _choose_tool(_user_text(messages), functions)
+
+    if tool:
+        message = {"role": "assistant", "content": "",
+                   "function_call": {"name": tool, "arguments": _tool_arguments(tool, _user_text(messages))},
+                   "functions_state_id": str(uuid.uuid4())}
+        finish_reason = "function_call"
+    else:
+        result = (last.get("content") or "") if last.get("role") == "function" else ""
+        content = ("Вот что удалось найти:\n\n" + result[:1500]) if result else \
+            "Это ответ заглушки GigaChat для нагрузочного теста."
+        message = {"role": "assistant", "content": content}
+        finish_reason = "stop"
+
+    completion_tokens = _tokens(message.get("content") or "") + 10
+    return {
+        "choices": [{"message": message, "index": 0, "finish_reason": finish_reason}],
+        "created": int(time.time()),
+        "model": model,
+        "object": "chat.completion",
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens, "precached_prompt_tokens": 0},
+    }
+
+
+def create_app(latency: LatencyModel, error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.errors = 0
+
+    @app.post("/api/v2/oauth")
+    async def oauth():
+        return {"access_token": f"stub-{uuid.uuid4().hex}", "expires_at": int((time.time() + 1800) * 1000)}
+
+    @app.get("/api/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "GigaChat-2", "object": "model", "owned_by": "stub"}]}
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        response = completion(body.get("messages") or [], body.get("functions") or [],
+                              body.get("model") or "GigaChat-2")
+        await asyncio.sleep(latency.sample(response["usage"]["completion_tokens"]))
+        if error_rate and latency.rng.random() < error_rate:
+            app.state.errors += 1
+            status = latency.rng.choice((429, 500, 503))
+            return JSONResponse(status_code=status, content={"status": status, "message": "stub error"})
+        return response
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests, "errors": app.state.errors}
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Заглушка GigaChat API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--median", type=float, default=1.0, help="медиана задержки ответа, с")
+    parser.add_argument("--sigma", type=float, default=0.5, help="разброс логнормальной задержки")
+    parser.add_argument("--per-token", type=float, default=0.0, help="добавка к задержке на токен ответа, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой 429/5xx")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    model = LatencyModel(args.median, args.sigma, args.per_token, args.seed)
+    print(f"Заглушка GigaChat: http://{args.host}:{args.port}/api/v1 "
+          f"(задержка: медиана {args.median} с, sigma {args.sigma}; ошибки {args.error_rate:.1%})")
+    uvicorn.run(create_app(model, args.error_rate), host=args.host, port=args.port, log_level="warning")